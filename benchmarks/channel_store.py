@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+#
+# Copyright (c) 2023-2025 liya <liyaliya@tutamail.com>
+#
+# This file is part of yuki-iptv.
+#
+# yuki-iptv is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# yuki-iptv is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with yuki-iptv. If not, see <https://www.gnu.org/licenses/>.
+#
+# The Font Awesome pictograms are licensed under the CC BY 4.0 License.
+# Font Awesome Free 5.15.4 by @fontawesome - https://fontawesome.com
+# https://creativecommons.org/licenses/by/4.0/
+#
+# Channel store memory benchmark
+#
+# Parses generated M3U playlist and compares memory used by channel store
+# (columns and value pool) against dict per channel (previous
+# representation of YukiData.array), checks that channels are the same
+# and reports load and access times.
+#
+# Usage: python3 benchmarks/channel_store.py [channels]
+#
+import os
+import sys
+import gc
+import time
+import random
+import tracemalloc
+
+sys.path.insert(
+    0, os.path.join(os.path.dirname(__file__), "..", "usr", "lib", "yuki-iptv")
+)
+
+from yuki_iptv.playlist_m3u import M3UParser  # noqa: E402
+from yuki_iptv.channel_store import ChannelStore  # noqa: E402
+
+GROUPS = [f"Group {i}" for i in range(200)]
+USER_AGENTS = ("", "", "", "Mozilla/5.0", "VLC/3.0.20 LibVLC/3.0.20")
+
+
+def generate_m3u(channels):
+    playlist = ['#EXTM3U x-tvg-url="http://example.com/epg.xml.gz"']
+    for channel in range(channels):
+        attributes = [
+            f'tvg-id="ch{channel}.tv"',
+            f'tvg-name="Channel {channel}"',
+            f'tvg-logo="http://example.com/logo/{channel}.png"',
+            f'group-title="{random.choice(GROUPS)}"',
+        ]
+        if random.random() < 0.3:
+            attributes.append('catchup="default" catchup-days="7"')
+            attributes.append(
+                'catchup-source="http://example.com/{utc}-{lutc}/index.m3u8"'
+            )
+        user_agent = random.choice(USER_AGENTS)
+        if user_agent:
+            attributes.append(f'user-agent="{user_agent}"')
+        playlist.append(f"#EXTINF:-1 {' '.join(attributes)},Channel {channel}")
+        playlist.append(f"http://example.com/live/user/password/{channel}.ts")
+    return "\n".join(playlist) + "\n"
+
+
+def load_channels(m3u, array):
+    # In batches, as in read_playlist_channels
+    batch = {}
+    for channel in M3UParser("").parse_m3u_lines(m3u.split("\n")):
+        batch[channel["title"]] = channel
+        if len(batch) == 1000:
+            array.update(batch)
+            batch = {}
+    array.update(batch)
+    return array
+
+
+def measure_memory(m3u, array):
+    gc.collect()
+    tracemalloc.start()
+    load_channels(m3u, array)
+    gc.collect()
+    memory = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return array, memory
+
+
+def load_time(m3u, array):
+    # Without tracemalloc, it slows down allocations a lot
+    gc.collect()
+    t = time.perf_counter()
+    load_channels(m3u, array)
+    return time.perf_counter() - t
+
+
+def access_time(array):
+    t = time.perf_counter()
+    for title in array:
+        array[title]["tvg-group"]
+    return time.perf_counter() - t
+
+
+def main():
+    channels = int(sys.argv[1]) if len(sys.argv) > 1 else 500000
+    random.seed(0)
+    m3u = generate_m3u(channels)
+    print(f"{channels} channels, {len(m3u) / 1024 / 1024:.1f} MB of M3U")
+
+    dicts, legacy = measure_memory(m3u, {})
+    store, compact = measure_memory(m3u, ChannelStore())
+    for title in random.sample(list(dicts), min(1000, len(dicts))):
+        if dicts[title] != store[title] or list(dicts[title]) != list(store[title]):
+            raise Exception(f"Channel {title} is different in channel store")
+
+    print(f"     dicts: {legacy / 1024 / 1024:.1f} MB")
+    print(f"     store: {compact / 1024 / 1024:.1f} MB")
+    print(f" reduction: {legacy / compact:.1f}x")
+    print(
+        f"load time: dicts {load_time(m3u, {}):.2f} s, "
+        f"store {load_time(m3u, ChannelStore()):.2f} s"
+    )
+    print(
+        f"field access (every channel): dicts {access_time(dicts):.2f} s, "
+        f"store {access_time(store):.2f} s"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+#
+# Copyright (c) 2023-2025 liya <liyaliya@tutamail.com>
+#
+# This file is part of yuki-iptv.
+#
+# yuki-iptv is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# yuki-iptv is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with yuki-iptv. If not, see <https://www.gnu.org/licenses/>.
+#
+# The Font Awesome pictograms are licensed under the CC BY 4.0 License.
+# Font Awesome Free 5.15.4 by @fontawesome - https://fontawesome.com
+# https://creativecommons.org/licenses/by/4.0/
+#
+# EPG programme memory benchmark
+#
+# Parses generated XMLTV and compares memory used by compact programme
+# records against per-programme dicts (previous representation).
+#
+# Usage: python3 benchmarks/epg_memory.py [channels] [programmes per channel]
+#
+import io
+import os
+import sys
+import gc
+import time
+import random
+import tracemalloc
+
+sys.path.insert(
+    0, os.path.join(os.path.dirname(__file__), "..", "usr", "lib", "yuki-iptv")
+)
+
+from yuki_iptv.epg_xmltv import parse_as_xmltv  # noqa: E402
+
+CATEGORIES = ("News", "Movie", "Series", "Sports", "Kids", "Documentary", "Music")
+
+
+def generate_xmltv(channels, programmes):
+    # Series titles and descriptions repeat, like in real feeds
+    titles = [f"Series {i}" for i in range(500)]
+    descs = [f"Episode description {i}. " * 5 for i in range(5000)]
+    start = 1735689600  # 2025-01-01 00:00 UTC
+    out = io.StringIO()
+    out.write('<?xml version="1.0" encoding="UTF-8"?>\n<tv>\n')
+    for channel in range(channels):
+        out.write(
+            f'<channel id="ch{channel}">'
+            f"<display-name>Channel {channel}</display-name></channel>\n"
+        )
+    for channel in range(channels):
+        for i in range(programmes):
+            programme_start = time.strftime(
+                "%Y%m%d%H%M%S", time.gmtime(start + i * 1800)
+            )
+            programme_stop = time.strftime(
+                "%Y%m%d%H%M%S", time.gmtime(start + (i + 1) * 1800)
+            )
+            out.write(
+                f'<programme start="{programme_start} +0000" '
+                f'stop="{programme_stop} +0000" channel="ch{channel}">'
+                f"<title>{random.choice(titles)}</title>"
+                f"<desc>{random.choice(descs)}</desc>"
+                f"<category>{random.choice(CATEGORIES)}</category>"
+                "</programme>\n"
+            )
+    out.write("</tv>\n")
+    return out.getvalue().encode("utf-8")
+
+
+def copy_string(string):
+    # Parser without interning creates new string object for every element
+    return string.encode("utf-8").decode("utf-8")
+
+
+def as_dicts(epg):
+    return {
+        channel_id: [
+            {
+                "start": programme.start,
+                "stop": programme.stop,
+                "title": copy_string(programme.title),
+                "desc": copy_string(programme.desc),
+                "category": copy_string(programme.category),
+                "catchup-id": copy_string(programme.catchup_id),
+            }
+            for programme in programmes
+        ]
+        for channel_id, programmes in epg.items()
+    }
+
+
+def main():
+    channels = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+    programmes = int(sys.argv[2]) if len(sys.argv) > 2 else 336
+    settings = {"epgoffset": 0}
+    data = generate_xmltv(channels, programmes)
+    print(
+        f"{channels} channels, {channels * programmes} programmes, "
+        f"{len(data) / 1024 / 1024:.1f} MB of XMLTV"
+    )
+
+    gc.collect()
+    tracemalloc.start()
+    epg = parse_as_xmltv(io.BytesIO(data), settings)["epg"]
+    gc.collect()
+    compact = tracemalloc.get_traced_memory()[0]
+
+    dicts = as_dicts(epg)
+    del epg
+    gc.collect()
+    legacy = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del dicts
+
+    print(f"     dicts: {legacy / 1024 / 1024:.1f} MB")
+    print(f"   compact: {compact / 1024 / 1024:.1f} MB")
+    print(f" reduction: {legacy / compact:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+#
+# Copyright (c) 2023-2025 liya <liyaliya@tutamail.com>
+#
+# This file is part of yuki-iptv.
+#
+# yuki-iptv is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# yuki-iptv is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with yuki-iptv. If not, see <https://www.gnu.org/licenses/>.
+#
+# The Font Awesome pictograms are licensed under the CC BY 4.0 License.
+# Font Awesome Free 5.15.4 by @fontawesome - https://fontawesome.com
+# https://creativecommons.org/licenses/by/4.0/
+# TV guide search benchmark
+#
+# Writes generated programmes to pre-parsed EPG cache, maps it
+# and reports search index build time and query times.
+#
+# Usage: python3 benchmarks/epg_search.py [channels] [programmes per channel]
+#
+import os
+import sys
+import time
+import random
+import tempfile
+
+sys.path.insert(
+    0, os.path.join(os.path.dirname(__file__), "..", "usr", "lib", "yuki-iptv")
+)
+
+from yuki_iptv.epg_cache import save_epg_cache, load_epg_cache  # noqa: E402
+from yuki_iptv.epg_index import EPGIndex  # noqa: E402
+from yuki_iptv.epg_programme import Programme  # noqa: E402
+from yuki_iptv.epg_search import EPGSearchIndex  # noqa: E402
+
+CATEGORIES = ("News", "Movie", "Series", "Sports", "Kids", "Documentary", "Music")
+WORDS = ("football", "match", "café", "arsenal", "olympique", "marseille")
+SYLLABLES = ("ka", "lo", "mi", "ré", "tu", "sen", "dor", "va", "né", "pi", "ro", "bel")
+QUERIES = ("arsenal", "cafe", "news arsenal", "olymp", "news", "kalo", "zzz")
+
+
+def generate_epg(channels, programmes):
+    # Titles repeat, like in real feeds
+    vocabulary = list(WORDS)
+    for _i in range(5000):
+        vocabulary.append("".join(random.choices(SYLLABLES, k=3)))
+    titles = [
+        " ".join(random.sample(vocabulary, random.randint(1, 4))) + f" {i}"
+        for i in range(channels * 20)
+    ]
+    descs = [" ".join(random.sample(vocabulary, 10)) for _i in range(channels * 5)]
+    start = time.time() - 86400
+    epg = {}
+    for channel in range(channels):
+        epg[f"ch{channel}"] = [
+            Programme(
+                start + i * 1800,
+                start + (i + 1) * 1800,
+                random.choice(titles),
+                random.choice(descs),
+                random.choice(CATEGORIES),
+                "",
+            )
+            for i in range(programmes)
+        ]
+    return {"ids": {}, "names": {}, "icons": {}, "epg": epg}
+
+
+def main():
+    channels = int(sys.argv[1]) if len(sys.argv) > 1 else 3000
+    programmes = int(sys.argv[2]) if len(sys.argv) > 2 else 336
+    print(f"{channels} channels, {channels * programmes} programmes")
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        cache_filename = os.path.join(temp_dir, "epg.epgc")
+        save_epg_cache(cache_filename, generate_epg(channels, programmes), {})
+        epg_array = {"epg": load_epg_cache(cache_filename)}
+    epg_index = EPGIndex(epg_array)
+
+    for fields in (("title", "category"), ("title", "category", "desc")):
+        search_index = EPGSearchIndex()
+        t = time.perf_counter()
+        search_index.update(epg_array, fields)
+        print(f"{', '.join(fields)}: index built in {time.perf_counter() - t:.2f} s")
+        for query in QUERIES:
+            t = time.perf_counter()
+            results = search_index.search(query, epg_index)
+            print(
+                f"  {query!r:>16}: {len(results):>3} results, "
+                f"{(time.perf_counter() - t) * 1000:.1f} ms"
+            )
+
+
+if __name__ == "__main__":
+    main()
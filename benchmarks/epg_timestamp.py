@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+#
+# Copyright (c) 2023-2025 liya <liyaliya@tutamail.com>
+#
+# This file is part of yuki-iptv.
+#
+# yuki-iptv is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# yuki-iptv is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with yuki-iptv. If not, see <https://www.gnu.org/licenses/>.
+#
+# The Font Awesome pictograms are licensed under the CC BY 4.0 License.
+# Font Awesome Free 5.15.4 by @fontawesome - https://fontawesome.com
+# https://creativecommons.org/licenses/by/4.0/
+#
+# XMLTV timestamp parser micro-benchmark
+#
+# Usage: python3 benchmarks/epg_timestamp.py [count]
+#
+import os
+import sys
+import time
+import random
+
+sys.path.insert(
+    0, os.path.join(os.path.dirname(__file__), "..", "usr", "lib", "yuki-iptv")
+)
+
+from yuki_iptv.epg_timestamp import TimestampParser, parse_timestamp  # noqa: E402
+
+
+def generate_timestamps(count):
+    # Two weeks of 30 minute programmes in a few timezones, like real XMLTV
+    timezones = ("+0000", "+0100", "+0300", "-0500")
+    start = 1735689600  # 2025-01-01 00:00 UTC
+    timestamps = []
+    for i in range(count):
+        ts = time.gmtime(start + (i % 672) * 1800)
+        timestamps.append(
+            time.strftime("%Y%m%d%H%M%S", ts) + " " + random.choice(timezones)
+        )
+    return timestamps
+
+
+def run(name, func, timestamps):
+    t = time.perf_counter()
+    for ts_string in timestamps:
+        func(ts_string)
+    elapsed = time.perf_counter() - t
+    print(
+        f"{name:>10}: {elapsed:.3f} s, "
+        f"{len(timestamps) / elapsed / 1000000:.2f} M timestamps/s"
+    )
+    return elapsed
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 1000000
+    timestamps = generate_timestamps(count)
+    parser = TimestampParser()
+
+    for ts_string in timestamps[:10000]:
+        assert parser.parse(ts_string) == parse_timestamp(ts_string)
+
+    print(f"Parsing {count} timestamps")
+    fallback = run("fallback", parse_timestamp, timestamps)
+    fast = run("fast path", parser.parse, timestamps)
+    print(f"Speedup: {fallback / fast:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
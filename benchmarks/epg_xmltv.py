@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+#
+# Copyright (c) 2023-2025 liya <liyaliya@tutamail.com>
+#
+# This file is part of yuki-iptv.
+#
+# yuki-iptv is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# yuki-iptv is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with yuki-iptv. If not, see <https://www.gnu.org/licenses/>.
+#
+# The Font Awesome pictograms are licensed under the CC BY 4.0 License.
+# Font Awesome Free 5.15.4 by @fontawesome - https://fontawesome.com
+# https://creativecommons.org/licenses/by/4.0/
+#
+# XMLTV parser backends benchmark
+#
+# Generates synthetic XMLTV file and parses it with every available backend,
+# each in a separate process, reports throughput and peak RSS.
+#
+# Usage: python3 benchmarks/epg_xmltv.py [channels] [programmes]
+#
+import os
+import sys
+import time
+import random
+import resource
+import tempfile
+import subprocess
+
+sys.path.insert(
+    0, os.path.join(os.path.dirname(__file__), "..", "usr", "lib", "yuki-iptv")
+)
+
+from yuki_iptv import epg_xmltv  # noqa: E402
+from yuki_iptv.epg_xmltv import XMLTV_BACKENDS, XMLTVBuilder  # noqa: E402
+
+CATEGORIES = ("News", "Movie", "Series", "Sports", "Kids", "Documentary", "Music")
+
+
+def generate_xmltv(filename, channels, programmes):
+    titles = [f"Series {i}" for i in range(2000)]
+    start = 1735689600  # 2025-01-01 00:00 UTC
+    per_channel = max(1, programmes // channels)
+    with open(filename, "w", encoding="utf-8") as xmltv_file:
+        xmltv_file.write('<?xml version="1.0" encoding="UTF-8"?>\n<tv>\n')
+        for channel in range(channels):
+            xmltv_file.write(
+                f'<channel id="ch{channel}">'
+                f'<display-name lang="en">Channel {channel}</display-name>'
+                f'<icon src="http://example.com/{channel}.png"/></channel>\n'
+            )
+        timestamps = [
+            time.strftime("%Y%m%d%H%M%S +0000", time.gmtime(start + i * 1800))
+            for i in range(per_channel + 1)
+        ]
+        for channel in range(channels):
+            for i in range(per_channel):
+                xmltv_file.write(
+                    f'<programme start="{timestamps[i]}" '
+                    f'stop="{timestamps[i + 1]}" channel="ch{channel}">'
+                    f'<title lang="en">{random.choice(titles)}</title>'
+                    f'<desc lang="en">Episode {random.randrange(100000)} '
+                    "description, long enough to look like a real one.</desc>"
+                    f"<category>{random.choice(CATEGORIES)}</category>"
+                    "</programme>\n"
+                )
+        xmltv_file.write("</tv>\n")
+    return channels * per_channel
+
+
+def run_backend(backend, filename):
+    # Runs in its own process, so peak RSS belongs to this backend only
+    builder = XMLTVBuilder()
+    t = time.perf_counter()
+    with open(filename, "rb") as xmltv_file:
+        XMLTV_BACKENDS[backend](xmltv_file, builder)
+    elapsed = time.perf_counter() - t
+    programmes = sum(len(x) for x in builder.ret["epg"].values())
+    peak_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    print(
+        f"{backend:>6}: {elapsed:.2f} s, {programmes / elapsed:,.0f} programmes/s, "
+        f"peak RSS {peak_rss:.0f} MB"
+    )
+
+
+def main():
+    if len(sys.argv) == 4 and sys.argv[1] == "--run":
+        run_backend(sys.argv[2], sys.argv[3])
+        return
+    channels = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+    programmes = int(sys.argv[2]) if len(sys.argv) > 2 else 1000000
+    with tempfile.TemporaryDirectory() as tmpdir:
+        filename = os.path.join(tmpdir, "epg.xml")
+        programmes = generate_xmltv(filename, channels, programmes)
+        print(
+            f"{channels} channels, {programmes} programmes, "
+            f"{os.path.getsize(filename) / 1024 / 1024:.0f} MB of XMLTV"
+        )
+        for backend in XMLTV_BACKENDS:
+            if backend == "lxml" and epg_xmltv.lxml is None:
+                print(f"{backend:>6}: not available")
+                continue
+            subprocess.run(
+                [sys.executable, __file__, "--run", backend, filename], check=True
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,174 @@
+#!/usr/bin/env python3
+#
+# Copyright (c) 2023-2025 liya <liyaliya@tutamail.com>
+#
+# This file is part of yuki-iptv.
+#
+# yuki-iptv is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# yuki-iptv is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with yuki-iptv. If not, see <https://www.gnu.org/licenses/>.
+#
+# The Font Awesome pictograms are licensed under the CC BY 4.0 License.
+# Font Awesome Free 5.15.4 by @fontawesome - https://fontawesome.com
+# https://creativecommons.org/licenses/by/4.0/
+#
+# M3U parser benchmark
+#
+# Parses synthetic playlists with #EXTINF attribute scanner and with
+# previous parser (one regular expression search per attribute),
+# checks that results are the same and reports parse times.
+#
+# Usage: python3 benchmarks/playlist_m3u.py [lines ...]
+#
+import os
+import re
+import sys
+import time
+import random
+
+sys.path.insert(
+    0, os.path.join(os.path.dirname(__file__), "..", "usr", "lib", "yuki-iptv")
+)
+
+from yuki_iptv.playlist_m3u import M3UParser  # noqa: E402
+
+GROUPS = ("News", "Movies", "Sports", "Kids", "Music", "Documentary")
+
+
+class RegexpM3UParser(M3UParser):
+    """Previous #EXTINF parsing, for comparison"""
+
+    regexp_cache = {}
+
+    def parse_regexp(self, name, line_info, default=""):
+        regexp = name + '="(.*?)"'
+        if regexp not in self.regexp_cache:
+            self.regexp_cache[regexp] = re.compile(regexp)
+        re_match = self.regexp_cache[regexp].search(line_info)
+        try:
+            res = re_match.group(1)
+        except AttributeError:
+            res = default
+        if name == "catchup-days":
+            try:
+                res = str(int(res))
+            except Exception:
+                res = default
+        return res.strip()
+
+    def get_title(self, line_info):
+        title_regex = re.sub('\\="(.*?)"', "", line_info).split(",", 1)
+        if len(title_regex) < 2:
+            return ""
+        return title_regex[1].strip()
+
+    def parse_channel(self, line_info, ch_url, overrides):
+        tvg_url = self.parse_regexp("tvg-url", line_info)
+        url_tvg = self.parse_regexp("url-tvg", line_info)
+        if not tvg_url and url_tvg:
+            tvg_url = url_tvg
+        group = self.parse_regexp("group-title", line_info, "")
+        if not group:
+            group = self.parse_regexp("tvg-group", line_info, self.all_channels)
+            if not group:
+                group = self.all_channels
+        catchup_tag = self.parse_regexp("catchup", line_info, "")
+        if not catchup_tag:
+            catchup_tag = self.parse_regexp(
+                "catchup-type", line_info, self.catchup_data[0]
+            )
+        ch_array = {
+            "title": self.get_title(line_info),
+            "tvg-name": self.parse_regexp("tvg-name", line_info),
+            "tvg-ID": self.parse_regexp("tvg-id", line_info),
+            "tvg-logo": self.parse_regexp("tvg-logo", line_info),
+            "tvg-group": group,
+            "tvg-url": tvg_url,
+            "catchup": catchup_tag,
+            "catchup-source": self.parse_regexp(
+                "catchup-source", line_info, self.catchup_data[2]
+            ),
+            "catchup-days": self.parse_regexp(
+                "catchup-days", line_info, self.catchup_data[1]
+            ),
+            "useragent": self.parse_regexp("user-agent", line_info),
+            "referer": "",
+            "url": ch_url,
+        }
+        ch_array["orig_title"] = ch_array["title"]
+        tvg_id_2 = self.parse_regexp("tvg-ID", line_info)
+        if tvg_id_2 and not ch_array["tvg-ID"]:
+            ch_array["tvg-ID"] = tvg_id_2
+        channel_url, kodi_useragent, kodi_referrer = (
+            self.parse_url_kodi_style_arguments(ch_array["url"])
+        )
+        if kodi_useragent:
+            ch_array["useragent"] = kodi_useragent
+        if kodi_referrer:
+            ch_array["referer"] = kodi_referrer
+        ch_array["url"] = channel_url
+        for override in overrides:
+            ch_array[override] = overrides[override]
+        return ch_array
+
+
+def generate_m3u(lines):
+    playlist = ['#EXTM3U x-tvg-url="http://example.com/epg.xml.gz" catchup="shift"']
+    channel = 0
+    while len(playlist) < lines:
+        channel += 1
+        attributes = [f'tvg-id="ch{channel}.tv"', f'tvg-name="Channel {channel}"']
+        if random.random() < 0.8:
+            attributes.append(f'tvg-logo="http://example.com/logo/{channel}.png"')
+        if random.random() < 0.3:
+            attributes.append('catchup="default" catchup-days="7"')
+            attributes.append(
+                'catchup-source="http://example.com/{utc}-{lutc}/index.m3u8"'
+            )
+        if random.random() < 0.1:
+            attributes.append('tvg-ID="alt.tv"')
+        random.shuffle(attributes)
+        attributes.append(f'group-title="{random.choice(GROUPS)}"')
+        title = f"Channel {channel}"
+        if random.random() < 0.05:
+            title += ", HD"
+        playlist.append(f"#EXTINF:-1 {' '.join(attributes)},{title}")
+        if random.random() < 0.1:
+            playlist.append(f"#EXTGRP:{random.choice(GROUPS)}")
+        playlist.append(f"http://example.com/live/{channel}.ts")
+    return "\n".join(playlist[:lines]) + "\n"
+
+
+def benchmark(parser, m3u):
+    t = time.perf_counter()
+    channels, epg_url = parser.parse_m3u(m3u)
+    return time.perf_counter() - t, channels, epg_url
+
+
+def main():
+    sizes = [int(arg) for arg in sys.argv[1:]] or [10000, 100000, 500000]
+    random.seed(0)
+    print(f"{'lines':>8} {'channels':>9} {'regexp, s':>10} {'scanner, s':>11} speed-up")
+    for lines in sizes:
+        m3u = generate_m3u(lines)
+        regexp_time, regexp_channels, regexp_epg = benchmark(RegexpM3UParser(""), m3u)
+        scanner_time, channels, epg_url = benchmark(M3UParser(""), m3u)
+        if (channels, epg_url) != (regexp_channels, regexp_epg):
+            raise Exception("Parsers returned different results")
+        print(
+            f"{lines:>8} {len(channels):>9} {regexp_time:>10.2f} "
+            f"{scanner_time:>11.2f} {regexp_time / scanner_time:>7.1f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
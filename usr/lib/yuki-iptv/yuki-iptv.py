@@ -43,6 +43,7 @@ import urllib.parse
 import yuki_iptv.environ  # noqa: F401
 from pathlib import Path
 from functools import partial
+from collections.abc import Mapping
 from gi.repository import Gio, GLib
 from PyQt6 import QtGui, QtCore, QtWidgets
 from multiprocessing import Manager, get_context, active_children
@@ -50,22 +51,28 @@ from yuki_iptv.qt_info import get_qt_info
 from yuki_iptv.qt_exception import show_exception
 from yuki_iptv.args import loglevel, parsed_args
 from yuki_iptv.i18n import _, load_qt_translations
+from yuki_iptv.epg_index import EPGIndex, NowNextTable
+from yuki_iptv.epg_service import EPGService
 from yuki_iptv.kill_process_childs import kill_process_childs
 from yuki_iptv.epg import (
-    epg_worker,
-    epg_is_in_date,
-    worker_get_epg_id,
+    get_epg_urls,
+    get_epg_scope,
+    epg_day_range,
+    worker_resolve_epg_id,
     worker_get_epg_icon,
+    worker_get_epg_timeline,
     worker_get_all_epg_names,
-    worker_get_epg_programmes,
     worker_get_current_programme,
     worker_check_programmes_actual,
+    get_epg_source_name,
+    get_epg_offsets,
 )
 from yuki_iptv.gui import YukiGUIClass, show_window, move_window_to_center
 from yuki_iptv.xdg import CACHE_DIR, LOCAL_DIR, SAVE_FOLDER_DEFAULT
 from yuki_iptv.misc import (
     WINDOW_SIZE,
     TVGUIDE_WIDTH,
+    PROGRAMME_BOUNDARY_MAX_INTERVAL,
     DOCKWIDGET_PLAYLIST_WIDTH,
     DOCKWIDGET_CONTROLPANEL_HEIGHT_LOW,
     DOCKWIDGET_CONTROLPANEL_HEIGHT_HIGH,
@@ -107,7 +114,14 @@ from yuki_iptv.keybinds import (
     main_keybinds_internal,
     main_keybinds_translations,
 )
-from yuki_iptv.playlist import load_playlist
+from yuki_iptv.playlist import (
+    load_playlist,
+    update_playlist,
+    revalidate_playlist,
+    load_cached_playlist,
+    update_channel_sets,
+)
+from yuki_iptv.xtream import XTREAM_SHORT_EPG
 from yuki_iptv.mpv_options import get_mpv_options
 from yuki_iptv.channel_logos import channel_logos_worker
 from yuki_iptv.settings import parse_settings, get_epg_url
@@ -143,10 +157,9 @@ if __name__ == "__main__":
     def exit_handler(*args):
         try:
             try:
-                if YukiData.epg_pool:
+                if YukiData.epg_service:
                     try:
-                        YukiData.epg_pool.close()
-                        YukiData.epg_pool = None
+                        YukiData.epg_service.shutdown()
                     except Exception:
                         pass
             except Exception:
@@ -242,6 +255,7 @@ if __name__ == "__main__":
 
         multiprocessing_manager = Manager()
         YukiData.mp_manager_dict = multiprocessing_manager.dict()
+        YukiData.epg_service = EPGService(YukiData.mp_manager_dict)
 
         if not os.path.isfile(str(Path(LOCAL_DIR, "favplaylist.m3u"))):
             file01 = open(str(Path(LOCAL_DIR, "favplaylist.m3u")), "w", encoding="utf8")
@@ -266,7 +280,8 @@ if __name__ == "__main__":
 
         YukiData.settings, settings_loaded = parse_settings()
 
-        YukiData.favourite_sets = []
+        # Used as an ordered set
+        YukiData.favourite_sets = {}
 
         def save_favourite_sets():
             favourite_sets_2 = {}
@@ -276,7 +291,9 @@ if __name__ == "__main__":
                 ) as fsetfile:
                     favourite_sets_2 = json.loads(fsetfile.read())
             if YukiData.settings["m3u"]:
-                favourite_sets_2[YukiData.settings["m3u"]] = YukiData.favourite_sets
+                favourite_sets_2[YukiData.settings["m3u"]] = list(
+                    YukiData.favourite_sets
+                )
             file2 = open(
                 Path(LOCAL_DIR, "favouritechannels.json"), "w", encoding="utf8"
             )
@@ -289,7 +306,9 @@ if __name__ == "__main__":
             file1 = open(Path(LOCAL_DIR, "favouritechannels.json"), encoding="utf8")
             favourite_sets1 = json.loads(file1.read())
             if YukiData.settings["m3u"] in favourite_sets1:
-                YukiData.favourite_sets = favourite_sets1[YukiData.settings["m3u"]]
+                YukiData.favourite_sets = dict.fromkeys(
+                    favourite_sets1[YukiData.settings["m3u"]]
+                )
             file1.close()
 
         YukiData.player_tracks = {}
@@ -344,27 +363,61 @@ if __name__ == "__main__":
                         ]["epgname"]
             return epg_name
 
-        def _get_epg_id(tvg_id, tvg_name, channel_name):
+        def resolve_epg_id(epg_index, title, tvg_id, tvg_name, channel_name):
+            if title not in epg_index.epg_ids:
+                epg_index.epg_ids[title] = worker_resolve_epg_id(
+                    tvg_id,
+                    tvg_name,
+                    channel_name,
+                    get_epg_name(channel_name),
+                    epg_index,
+                )
+            return epg_index.epg_ids[title][1]
+
+        def resolve_playlist_epg_ids(epg_index):
+            t = time.time()
+            for title, channel in YukiData.array.items():
+                resolve_epg_id(
+                    epg_index,
+                    title,
+                    channel["tvg-ID"],
+                    channel["tvg-name"],
+                    channel["orig_title"] if "orig_title" in channel else title,
+                )
+            logger.info(
+                f"EPG ids resolved for {len(epg_index.epg_ids)} channels, "
+                f"took {round(time.time() - t, 2)} seconds"
+            )
+
+        def invalidate_epg_ids(channel_name):
+            # EPG name override is stored for the original channel title,
+            # so it also applies to duplicates like "Channel (1)"
+            titles = []
+            for title, channel in YukiData.array.items():
+                orig_title = channel["orig_title"] if "orig_title" in channel else title
+                if channel_name in (title, orig_title):
+                    titles.append(title)
+            YukiData.epg_index.invalidate_epg_ids(titles)
+
+        def _get_epg_id(title, tvg_id, tvg_name, channel_name):
             ret = None
             if not YukiData.epg_pool_running:
                 try:
-                    ret = worker_get_epg_id(
-                        tvg_id,
-                        tvg_name,
-                        channel_name,
-                        get_epg_name(channel_name),
-                        YukiData.epg_array,
+                    ret = resolve_epg_id(
+                        YukiData.epg_index, title, tvg_id, tvg_name, channel_name
                     )
                 except Exception:
                     logger.warning("get_epg_id failed")
             return ret
 
         def get_epg_id(_data):
-            if isinstance(_data, dict):
+            if isinstance(_data, Mapping):
                 _epg_title = (
                     _data["orig_title"] if "orig_title" in _data else _data["title"]
                 )
-                return _get_epg_id(_data["tvg-ID"], _data["tvg-name"], _epg_title)
+                return _get_epg_id(
+                    _data["title"], _data["tvg-ID"], _data["tvg-name"], _epg_title
+                )
             elif isinstance(_data, str):
                 if _data in YukiData.array:
                     _epg_title = (
@@ -373,39 +426,43 @@ if __name__ == "__main__":
                         else YukiData.array[_data]["title"]
                     )
                     return _get_epg_id(
+                        _data,
                         YukiData.array[_data]["tvg-ID"],
                         YukiData.array[_data]["tvg-name"],
                         _epg_title,
                     )
                 else:
-                    return _get_epg_id("", "", _data)
+                    return _get_epg_id(_data, "", "", _data)
             else:
                 # logger.warning("get_epg_id failed - unknown type passed")
                 return None
 
-        def get_epg_programmes(epg_id):
+        def get_epg_timeline(epg_id):
             ret = None
             if not YukiData.epg_pool_running:
                 try:
-                    ret = worker_get_epg_programmes(epg_id, YukiData.epg_array)
+                    ret = worker_get_epg_timeline(epg_id, YukiData.epg_index)
                 except Exception:
-                    logger.warning("get_epg_programmes failed")
+                    logger.warning("get_epg_timeline failed")
             return ret
 
         def get_epg_icon(epg_id):
             ret = None
             if not YukiData.epg_pool_running:
                 try:
-                    ret = worker_get_epg_icon(epg_id, YukiData.epg_array)
+                    ret = worker_get_epg_icon(epg_id, YukiData.epg_index)
                 except Exception:
                     logger.warning("get_epg_programmes failed")
             return ret
 
+        def has_epg():
+            return bool(get_epg_url()) or YukiData.xtream_short_epg is not None
+
         def check_programmes_actual():
             ret = None
             if not YukiData.epg_pool_running:
                 try:
-                    ret = worker_check_programmes_actual(YukiData.epg_array)
+                    ret = worker_check_programmes_actual(YukiData.epg_index)
                 except Exception:
                     logger.warning("check_programmes_actual failed")
             return ret
@@ -414,7 +471,7 @@ if __name__ == "__main__":
             ret = None
             if not YukiData.epg_pool_running:
                 try:
-                    ret = worker_get_all_epg_names(YukiData.epg_array)
+                    ret = worker_get_all_epg_names(YukiData.epg_index)
                 except Exception:
                     logger.warning("get_all_epg_names failed")
             return ret
@@ -423,23 +480,18 @@ if __name__ == "__main__":
             ret = None
             if not YukiData.epg_pool_running:
                 try:
-                    ret = worker_get_current_programme(epg_id, YukiData.epg_array)
+                    ret = worker_get_current_programme(epg_id, YukiData.epg_index)
                 except Exception:
                     logger.warning("get_current_programme failed")
             return ret
 
-        def purge_epg_cache():
-            if not YukiData.epg_pool_running:
-                logger.info("Purging EPG cache")
-                for epg_cache_filename in os.listdir(Path(CACHE_DIR, "epg")):
-                    epg_cache_file = Path(CACHE_DIR, "epg", epg_cache_filename)
-                    if os.path.isfile(epg_cache_file):
-                        os.remove(epg_cache_file)
-
         def force_update_epg_act():
             logger.info("Force update EPG triggered")
-            purge_epg_cache()
-            thread_epg_update_2 = threading.Thread(target=epg_update, daemon=True)
+            # Cached EPG is revalidated instead of being purged,
+            # unchanged sources are not downloaded again
+            thread_epg_update_2 = threading.Thread(
+                target=epg_update, args=(True,), daemon=True
+            )
             thread_epg_update_2.start()
 
         def mainwindow_isvisible():
@@ -559,7 +611,17 @@ if __name__ == "__main__":
                 if YukiData.settings["m3u"] in channel_sort3:
                     YukiData.channel_sort = channel_sort3[YukiData.settings["m3u"]]
 
-        groups, m3u_exists, xt = load_playlist()
+        def playlist_loading_progress(channel_count):
+            # Main window is not shown yet
+            logger.info(f"{channel_count} channels loaded")
+
+        # Playlist is shown from parsed playlist cache (if any),
+        # fresh copy is loaded in background after main window is shown
+        playlist_loaded = load_cached_playlist()
+        playlist_from_cache = playlist_loaded is not None
+        if not playlist_from_cache:
+            playlist_loaded = load_playlist(playlist_loading_progress)
+        groups, m3u_exists, xt = playlist_loaded
 
         def sigint_handler(*args):
             if YukiData.mpris_loop:
@@ -743,25 +805,30 @@ if __name__ == "__main__":
                 channel_url = getArrayItem(archive_json[0])["url"]
                 start_time = archive_json[1]
                 end_time = archive_json[2]
-                prog_index = archive_json[3]
 
                 if "#__rewind__" not in link:
                     YukiData.archive_epg = archive_json
 
                 catchup_id = ""
                 try:
-                    current_programmes = None
+                    timeline = None
                     epg_id = get_epg_id(archive_json[0])
                     if epg_id:
-                        programmes = get_epg_programmes(epg_id)
-                        if programmes:
-                            current_programmes = programmes
-
-                    if current_programmes:
-                        if "catchup-id" in current_programmes[int(prog_index)]:
-                            catchup_id = current_programmes[int(prog_index)][
-                                "catchup-id"
-                            ]
+                        timeline = get_epg_timeline(epg_id)
+
+                    if timeline:
+                        # Expired programmes are pruned, so index in link
+                        # can be outdated - look programme up by start time
+                        pr_index = timeline.find(
+                            datetime.datetime.strptime(
+                                start_time, "%d.%m.%Y %H:%M:%S"
+                            ).timestamp()
+                        )
+                        if (
+                            pr_index != -1
+                            and "catchup-id" in timeline.programmes[pr_index]
+                        ):
+                            catchup_id = timeline.programmes[pr_index]["catchup-id"]
                 except Exception:
                     logger.warning("do_open_archive / catchup_id parsing failed")
                     logger.warning(traceback.format_exc())
@@ -1363,6 +1430,7 @@ if __name__ == "__main__":
 
         def channel_settings_save():
             channel_3 = YukiGUI.title.text()
+            epgname_old = get_epg_name(channel_3)
             if YukiData.settings["m3u"] not in YukiData.channel_sets:
                 YukiData.channel_sets[YukiData.settings["m3u"]] = {}
             YukiData.channel_sets[YukiData.settings["m3u"]][channel_3] = {
@@ -1386,6 +1454,17 @@ if __name__ == "__main__":
                 ),
             }
             save_channel_sets()
+            group_new = update_channel_sets(channel_3)
+            if group_new is not None and group_new not in groups:
+                groups.append(group_new)
+                refill_groups_combobox()
+            invalidate_epg_ids(channel_3)
+            if get_epg_name(channel_3) != epgname_old and (
+                YukiData.settings["epgscope"] and not YukiData.epg_full_view
+            ):
+                # Programmes of new EPG name are not loaded yet
+                YukiData.epg_update_pending = True
+                threading.Thread(target=epg_update, daemon=True).start()
             if YukiData.playing_channel == channel_3:
                 YukiData.player.deinterlace = YukiGUI.deinterlace_chk.isChecked()
                 YukiData.player.contrast = YukiGUI.contrast_choose.value()
@@ -1419,6 +1498,8 @@ if __name__ == "__main__":
                 settings_file.write(json.dumps(settings_arr))
             YukiGUI.settings_win.hide()
             YukiData.do_save_settings = True
+            # Playlist may be switched, EPG of the old one is not needed
+            YukiData.epg_service.cancel()
             app.quit()
 
         YukiData.save_settings = save_settings
@@ -1784,6 +1865,7 @@ if __name__ == "__main__":
                 get_keybind,
                 show_tvguide_2,
                 show_multi_epg,
+                show_epg_search,
                 reload_playlist,
                 show_shortcuts,
                 yuki_track_set,
@@ -2292,7 +2374,7 @@ if __name__ == "__main__":
                     channel_name = channel_name[: MAX_CHAN_SIZE - 3] + "..."
                 setChannelText("  " + channel_name)
                 current_prog = None
-                if get_epg_url() and array_item:
+                if has_epg() and array_item:
                     epg_id = get_epg_id(array_item)
                     if epg_id:
                         programme = get_current_programme(epg_id)
@@ -2678,6 +2760,211 @@ if __name__ == "__main__":
 
         max_width = win.listWidget.sizeHint().width()
 
+        def set_channel_programme(channel_widget, channel, epg_id):
+            """Current programme part of playlist row"""
+            try:
+                tooltip_group = "{}: {}".format(
+                    _("Group"), YukiData.array[channel]["tvg-group"]
+                )
+            except Exception:
+                tooltip_group = "{}: {}".format(_("Group"), _("All channels"))
+            channel_widget.epg_id = epg_id
+            channel_widget.programme = None
+            channel_widget.programme_tooltip = f"<b>{channel}</b><br>{tooltip_group}"
+            programme = None
+            next_programme = None
+            if epg_id and not YukiData.epg_pool_running:
+                programme, next_programme, _boundary = YukiData.now_next.get(epg_id)
+            if (
+                programme
+                and programme["start"] != 0
+                and (programme["title"] or not YukiData.settings["hideepgpercentage"])
+                and not YukiData.settings["hideepgfromplaylist"]
+            ):
+                orig_desc = programme["desc"]
+                orig_category = programme["category"]
+                desc1 = ""
+                wrap_desc = 40
+                if orig_desc:
+                    if YukiData.settings["description_view"] == 0:
+                        desc_wrapped = textwrap.fill(
+                            (f"({orig_category}) " if orig_category else "")
+                            + orig_desc,
+                            wrap_desc,
+                        ).split("\n")
+                        if len(desc_wrapped) > 2:
+                            desc_wrapped = desc_wrapped[:2]
+                            desc_wrapped[1] = desc_wrapped[1][:-3] + "..."
+                        desc_wrapped = "<br>".join(desc_wrapped)
+                        desc1 = "<br>" + desc_wrapped
+                    elif YukiData.settings["description_view"] == 1:
+                        desc1 = "<br>" + "<br>".join(
+                            textwrap.fill(
+                                (
+                                    (f"({orig_category}) " if orig_category else "")
+                                    + orig_desc
+                                ),
+                                wrap_desc,
+                            ).split("\n")
+                        )
+                prog_desc = ""
+                if orig_desc:
+                    prog_desc = "\n\n" + textwrap.fill(orig_desc, 100)
+                if next_programme:
+                    prog_desc += "\n\n{}: {} {}".format(
+                        _("Next"),
+                        datetime.datetime.fromtimestamp(
+                            next_programme["start"]
+                        ).strftime("%H:%M"),
+                        next_programme["title"],
+                    )
+                channel_widget.programme = programme
+                channel_widget.programme_description = desc1
+                channel_widget.programme_tooltip_desc = prog_desc
+                channel_widget.progress_label.setText(
+                    datetime.datetime.fromtimestamp(programme["start"]).strftime(
+                        "%H:%M"
+                    )
+                )
+                channel_widget.end_label.setText(
+                    datetime.datetime.fromtimestamp(programme["stop"]).strftime("%H:%M")
+                )
+                update_channel_progress(channel_widget)
+                channel_widget.showDescription()
+            else:
+                channel_widget.setDescription("", channel_widget.programme_tooltip)
+                channel_widget.hideDescription()
+
+        def update_channel_progress(channel_widget):
+            """Percentage of current programme, no EPG lookups"""
+            programme = channel_widget.programme
+            percentage = round(
+                (time.time() - programme["start"])
+                / (programme["stop"] - programme["start"])
+                * 100,
+                2,
+            )
+            if YukiData.settings["hideepgpercentage"]:
+                prog = programme["title"]
+            else:
+                prog = str(percentage) + "% " + programme["title"]
+            channel_widget.setDescription(
+                "<i>" + prog + "</i>" + channel_widget.programme_description,
+                (
+                    channel_widget.programme_tooltip + "<br><br>"
+                    "<i>" + prog + "</i>" + channel_widget.programme_tooltip_desc
+                ).replace("\n", "<br>"),
+            )
+            channel_widget.progress_bar.setValue(int(percentage))
+
+        def update_playing_channel_progress():
+            current_programme = None
+            if YukiData.playing_channel and not YukiData.epg_pool_running:
+                epg_id = get_epg_id(YukiData.playing_channel)
+                if epg_id:
+                    current_programme = YukiData.now_next.get(epg_id)[0]
+            show_progress(current_programme)
+
+        def update_channels_progress():
+            for channel_widget in YukiData.channel_rows.values():
+                try:
+                    if channel_widget.programme:
+                        update_channel_progress(channel_widget)
+                except Exception:
+                    pass
+            update_playing_channel_progress()
+
+        def schedule_programme_boundary():
+            """Fire programme_boundary_reached when the first of current
+            programmes of visible channels (or playing channel) changes"""
+            if YukiData.programme_boundary_timer is None:
+                YukiData.programme_boundary_timer = QtCore.QTimer()
+                YukiData.programme_boundary_timer.setSingleShot(True)
+                YukiData.programme_boundary_timer.setTimerType(
+                    QtCore.Qt.TimerType.PreciseTimer
+                )
+                YukiData.programme_boundary_timer.timeout.connect(
+                    programme_boundary_reached
+                )
+            YukiData.programme_boundary_timer.stop()
+            next_boundary = YukiData.now_next.next_boundary()
+            if next_boundary != math.inf:
+                # Programme is current only after its start, fire just after
+                YukiData.programme_boundary_timer.start(
+                    max(
+                        0,
+                        min(
+                            math.ceil((next_boundary - time.time()) * 1000) + 1,
+                            PROGRAMME_BOUNDARY_MAX_INTERVAL,
+                        ),
+                    )
+                )
+
+        def programme_boundary_reached():
+            try:
+                changed_epg_ids = YukiData.now_next.refresh()
+                if changed_epg_ids:
+                    for channel, channel_widget in YukiData.channel_rows.items():
+                        if channel_widget.epg_id in changed_epg_ids:
+                            set_channel_programme(
+                                channel_widget, channel, channel_widget.epg_id
+                            )
+                    update_playing_channel_progress()
+                    update_tvguide()
+            except Exception:
+                logger.warning("Programme boundary update failed")
+                logger.warning(traceback.format_exc())
+            schedule_programme_boundary()
+
+        def request_xtream_short_epg():
+            """Fetch XTream short EPG of visible channels and playing channel"""
+            if YukiData.xtream_short_epg is None or YukiData.epg_pool_running:
+                return
+            channels = list(YukiData.channel_rows)
+            if YukiData.playing_channel in YukiData.array:
+                channels.insert(0, YukiData.playing_channel)
+            epg_ids = []
+            for channel in channels:
+                epg_id = get_epg_id(channel)
+                # Channels found in other EPG sources do not need short EPG
+                if (
+                    epg_id
+                    and YukiData.epg_index.epg_ids.get(channel, (None,))[0]
+                    == XTREAM_SHORT_EPG
+                ):
+                    epg_ids.append(epg_id)
+            YukiData.xtream_short_epg.request(
+                epg_ids,
+                lambda programmes: execute_in_main_thread(
+                    partial(xtream_short_epg_fetched, programmes)
+                ),
+            )
+
+        def xtream_short_epg_fetched(programmes):
+            try:
+                YukiData.xtream_short_epg.merge(programmes)
+                YukiData.epg_index.update_channels(XTREAM_SHORT_EPG, programmes)
+                YukiData.now_next.invalidate(programmes)
+                for channel, channel_widget in YukiData.channel_rows.items():
+                    if channel_widget.epg_id in programmes:
+                        set_channel_programme(
+                            channel_widget, channel, channel_widget.epg_id
+                        )
+                update_playing_channel_progress()
+                schedule_programme_boundary()
+                update_tvguide()
+            except Exception:
+                logger.warning("XTream short EPG update failed")
+                logger.warning(traceback.format_exc())
+
+        def get_group_channels(group):
+            """Channels of group (all channels if group is not set)"""
+            if not group or group == all_channels_lang:
+                return YukiData.channel_index.channels
+            if group == favourites_lang:
+                return YukiData.channel_index.get_favourites()
+            return YukiData.channel_index.get_group(group)
+
         def generate_channels():
             channel_logos_request = {}
 
@@ -2687,23 +2974,15 @@ if __name__ == "__main__":
                 idx = 0
 
             # Group and favourites filter
-            array_filtered = []
-            for j1 in YukiData.array_sorted:
-                group1 = YukiData.array[j1]["tvg-group"]
-                if YukiData.current_group != all_channels_lang:
-                    if YukiData.current_group == favourites_lang:
-                        if j1 not in YukiData.favourite_sets:
-                            continue
-                    else:
-                        if group1 != YukiData.current_group:
-                            continue
-                array_filtered.append(j1)
-
-            ch_array = [
-                x13
-                for x13 in array_filtered
-                if YukiData.search.lower().strip() in x13.lower().strip()
-            ]
+            array_filtered = get_group_channels(YukiData.current_group)
+
+            ch_array = array_filtered
+            if YukiData.search:
+                ch_array = [
+                    x13
+                    for x13 in array_filtered
+                    if YukiData.search.lower().strip() in x13.lower().strip()
+                ]
             ch_array = ch_array[idx : idx + 100]
             try:
                 if YukiData.search:
@@ -2715,66 +2994,16 @@ if __name__ == "__main__":
             except Exception:
                 pass
             res = {}
+            YukiData.now_next = NowNextTable(YukiData.epg_index)
+            YukiData.channel_rows = {}
             k0 = -1
             k = 0
             for i in ch_array:
                 k0 += 1
                 k += 1
-                prog = ""
-                orig_category = ""
-                orig_desc = ""
-                prog_desc = ""
 
                 epg_id = get_epg_id(YukiData.array[i])
-                epg_found = False
 
-                if epg_id:
-                    current_prog = get_current_programme(epg_id)
-                    if current_prog and current_prog["start"] != 0:
-                        epg_found = True
-                        start_time = datetime.datetime.fromtimestamp(
-                            current_prog["start"]
-                        ).strftime("%H:%M")
-                        stop_time = datetime.datetime.fromtimestamp(
-                            current_prog["stop"]
-                        ).strftime("%H:%M")
-                        t_t = time.time()
-                        percentage = round(
-                            (t_t - current_prog["start"])
-                            / (current_prog["stop"] - current_prog["start"])
-                            * 100,
-                            2,
-                        )
-                        if YukiData.settings["hideepgpercentage"]:
-                            prog = current_prog["title"]
-                        else:
-                            prog = str(percentage) + "% " + current_prog["title"]
-                        try:
-                            if current_prog["desc"]:
-                                orig_desc = current_prog["desc"]
-                                prog_desc = "\n\n" + textwrap.fill(
-                                    current_prog["desc"], 100
-                                )
-                            else:
-                                orig_desc = ""
-                                prog_desc = ""
-                        except Exception:
-                            orig_desc = ""
-                            prog_desc = ""
-                        try:
-                            if current_prog["category"]:
-                                orig_category = current_prog["category"]
-                        except Exception:
-                            orig_category = ""
-                    else:
-                        start_time = ""
-                        stop_time = ""
-                        t_t = time.time()
-                        percentage = 0
-                        prog = ""
-                        orig_desc = ""
-                        prog_desc = ""
-                        orig_category = ""
                 MyPlaylistWidget = YukiGUI.PlaylistWidget(YukiGUI)
                 channel_name = i
 
@@ -2812,65 +3041,8 @@ if __name__ == "__main__":
                 MyPlaylistWidget.name_label.setText(
                     append_symbol + str(k) + ". " + channel_name
                 )
-                orig_prog = prog
-                try:
-                    tooltip_group = "{}: {}".format(
-                        _("Group"), YukiData.array[i]["tvg-group"]
-                    )
-                except Exception:
-                    tooltip_group = "{}: {}".format(_("Group"), _("All channels"))
-                if (
-                    epg_found
-                    and orig_prog
-                    and not YukiData.settings["hideepgfromplaylist"]
-                ):
-                    desc1 = ""
-                    wrap_desc = 40
-                    if orig_desc:
-                        if YukiData.settings["description_view"] == 0:
-                            desc_wrapped = textwrap.fill(
-                                (f"({orig_category}) " if orig_category else "")
-                                + orig_desc,
-                                wrap_desc,
-                            ).split("\n")
-                            if len(desc_wrapped) > 2:
-                                desc_wrapped = desc_wrapped[:2]
-                                desc_wrapped[1] = desc_wrapped[1][:-3] + "..."
-                            desc_wrapped = "<br>".join(desc_wrapped)
-                            desc1 = "<br>" + desc_wrapped
-                        elif YukiData.settings["description_view"] == 1:
-                            desc1 = "<br>" + "<br>".join(
-                                textwrap.fill(
-                                    (
-                                        (f"({orig_category}) " if orig_category else "")
-                                        + orig_desc
-                                    ),
-                                    wrap_desc,
-                                ).split("\n")
-                            )
-                    MyPlaylistWidget.setDescription(
-                        "<i>" + prog + "</i>" + desc1,
-                        (
-                            f"<b>{i}</b>" + f"<br>{tooltip_group}<br><br>"
-                            "<i>" + orig_prog + "</i>" + prog_desc
-                        ).replace("\n", "<br>"),
-                    )
-                    MyPlaylistWidget.showDescription()
-                    try:
-                        if start_time:
-                            MyPlaylistWidget.progress_label.setText(start_time)
-                            MyPlaylistWidget.end_label.setText(stop_time)
-                            MyPlaylistWidget.progress_bar.setValue(int(percentage))
-                        else:
-                            MyPlaylistWidget.progress_bar.hide()
-                    except Exception:
-                        logger.warning("Async EPG load problem, ignoring")
-                else:
-                    MyPlaylistWidget.setDescription(
-                        "", f"<b>{i}</b><br>{tooltip_group}"
-                    )
-                    MyPlaylistWidget.progress_bar.hide()
-                    MyPlaylistWidget.hideDescription()
+                set_channel_programme(MyPlaylistWidget, i, epg_id)
+                YukiData.channel_rows[i] = MyPlaylistWidget
 
                 MyPlaylistWidget.setPixmap(YukiGUI.tv_icon)
 
@@ -2948,15 +3120,9 @@ if __name__ == "__main__":
                     )
                 )
                 res[k0] = [myQListWidgetItem, MyPlaylistWidget, k0, i]
-            j1 = YukiData.playing_channel
-            if j1:
-                current_programme = None
-                epg_id = get_epg_id(j1)
-                if epg_id:
-                    programme = get_current_programme(epg_id)
-                    if programme:
-                        current_programme = programme
-                show_progress(current_programme)
+            update_playing_channel_progress()
+            schedule_programme_boundary()
+            request_xtream_short_epg()
 
             # Fetch channel logos
             try:
@@ -3252,9 +3418,9 @@ if __name__ == "__main__":
                     QtWidgets.QMessageBox.StandardButton.Yes,
                 )
                 if isdelete_fav_msg == QtWidgets.QMessageBox.StandardButton.Yes:
-                    YukiData.favourite_sets.remove(YukiData.item_selected)
+                    YukiData.channel_index.remove_favourite(YukiData.item_selected)
             else:
-                YukiData.favourite_sets.append(YukiData.item_selected)
+                YukiData.channel_index.add_favourite(YukiData.item_selected)
             save_favourite_sets()
             execute_in_main_thread(partial(redraw_channels))
 
@@ -3432,24 +3598,27 @@ if __name__ == "__main__":
         YukiData.combobox = QtWidgets.QComboBox()
         YukiData.combobox.currentIndexChanged.connect(group_change)
 
-        if YukiData.settings["sort_categories"] == 1:
-            groups_sorted = sorted(groups)
-        elif YukiData.settings["sort_categories"] == 2:
-            groups_sorted = sorted(groups, reverse=True)
-        else:
-            groups_sorted = groups
+        def fill_groups_combobox():
+            if YukiData.settings["sort_categories"] == 1:
+                groups_sorted = sorted(groups)
+            elif YukiData.settings["sort_categories"] == 2:
+                groups_sorted = sorted(groups, reverse=True)
+            else:
+                groups_sorted = groups
+
+            if YukiData.settings["sort_categories"] in (1, 2):
+                groups_sorted.remove(_("All channels"))
+                YukiData.combobox.addItem(_("All channels"))
 
-        if YukiData.settings["sort_categories"] in (1, 2):
-            groups_sorted.remove(_("All channels"))
-            YukiData.combobox.addItem(_("All channels"))
+                groups_sorted.remove(_("Favourites"))
+                YukiData.combobox.addItem(_("Favourites"))
 
-            groups_sorted.remove(_("Favourites"))
-            YukiData.combobox.addItem(_("Favourites"))
+            YukiData.groups_sorted = groups_sorted
 
-        YukiData.groups_sorted = groups_sorted
+            for group in groups_sorted:
+                YukiData.combobox.addItem(group)
 
-        for group in groups_sorted:
-            YukiData.combobox.addItem(group)
+        fill_groups_combobox()
 
         def update_movie_icons():
             if YukiData.settings["channellogos"] != 3:  # Do not load any logos
@@ -3571,14 +3740,22 @@ if __name__ == "__main__":
 
         win.moviesWidget.itemDoubleClicked.connect(movies_play)
 
-        movies_groups = []
+        def fill_movies_combobox():
+            movies_groups = []
+            for movie_combobox in YukiData.movies:
+                if "tvg-group" in YukiData.movies[movie_combobox]:
+                    if (
+                        YukiData.movies[movie_combobox]["tvg-group"]
+                        not in movies_groups
+                    ):
+                        movies_groups.append(
+                            YukiData.movies[movie_combobox]["tvg-group"]
+                        )
+            for movie_group in movies_groups:
+                movies_combobox.addItem(movie_group)
+
         movies_combobox = QtWidgets.QComboBox()
-        for movie_combobox in YukiData.movies:
-            if "tvg-group" in YukiData.movies[movie_combobox]:
-                if YukiData.movies[movie_combobox]["tvg-group"] not in movies_groups:
-                    movies_groups.append(YukiData.movies[movie_combobox]["tvg-group"])
-        for movie_group in movies_groups:
-            movies_combobox.addItem(movie_group)
+        fill_movies_combobox()
         movies_combobox.currentIndexChanged.connect(movies_group_change)
         movies_group_change()
 
@@ -3887,120 +4064,112 @@ if __name__ == "__main__":
                 if do_return:
                     newline_symbol = "!@#$%^^&*("
 
-                current_programmes = None
+                timeline = None
                 epg_id = get_epg_id(channel_2)
                 if epg_id:
-                    programmes = get_epg_programmes(epg_id)
-                    if programmes:
-                        current_programmes = programmes
-
-                if current_programmes:
+                    timeline = get_epg_timeline(epg_id)
+
+                if timeline:
+                    current_programmes = timeline.programmes
+                    if date_selected is not None:
+                        programmes_range = timeline.range(*epg_day_range(date_selected))
+                    elif show_all_guides:
+                        programmes_range = timeline.range(-math.inf, time.time() + 1)
+                    else:
+                        programmes_range = timeline.range(time.time() - 1, math.inf)
                     txt = newline_symbol
-                    for pr in current_programmes:
-                        override_this = False
-                        if show_all_guides:
-                            override_this = pr["start"] < time.time() + 1
-                        else:
-                            override_this = pr["stop"] > time.time() - 1
+                    for pr_index in programmes_range:
+                        pr = current_programmes[pr_index]
                         archive_btn = ""
-                        if date_selected is not None:
-                            override_this = epg_is_in_date(pr, date_selected)
-                        if override_this:
-                            use_placeholder = "%d.%m.%y %H:%M"
-                            if mark_integers:
-                                use_placeholder = "%d.%m.%Y %H:%M:%S"
-                            start_2 = (
-                                datetime.datetime.fromtimestamp(pr["start"]).strftime(
-                                    use_placeholder
-                                )
-                                + " - "
+                        use_placeholder = "%d.%m.%y %H:%M"
+                        if mark_integers:
+                            use_placeholder = "%d.%m.%Y %H:%M:%S"
+                        start_2 = (
+                            datetime.datetime.fromtimestamp(pr["start"]).strftime(
+                                use_placeholder
                             )
-                            stop_2 = (
-                                datetime.datetime.fromtimestamp(pr["stop"]).strftime(
-                                    use_placeholder
-                                )
-                                + "\n"
+                            + " - "
+                        )
+                        stop_2 = (
+                            datetime.datetime.fromtimestamp(pr["stop"]).strftime(
+                                use_placeholder
                             )
+                            + "\n"
+                        )
+                        try:
+                            title_2 = pr["title"] if "title" in pr else ""
+                        except Exception:
+                            title_2 = ""
+                        try:
+                            desc_2 = ("\n" + pr["desc"] + "\n") if "desc" in pr else ""
+                        except Exception:
+                            desc_2 = ""
+                        attach_1 = ""
+                        if mark_integers:
+                            attach_1 = f" ({pr_index})"
+                        if (
+                            date_selected is not None
+                            and YukiGUI.showonlychplaylist_chk.isChecked()
+                        ):
                             try:
-                                title_2 = pr["title"] if "title" in pr else ""
-                            except Exception:
-                                title_2 = ""
-                            try:
-                                desc_2 = (
-                                    ("\n" + pr["desc"] + "\n") if "desc" in pr else ""
-                                )
+                                catchup_days2 = int(channel_1_item["catchup-days"])
                             except Exception:
-                                desc_2 = ""
-                            attach_1 = ""
-                            if mark_integers:
-                                try:
-                                    marked_integer = current_programmes.index(pr)
-                                except Exception:
-                                    marked_integer = -1
-                                attach_1 = f" ({marked_integer})"
+                                catchup_days2 = 7
+                            # support for seconds
+                            if catchup_days2 < 1000:
+                                catchup_days2 = catchup_days2 * 86400
                             if (
-                                date_selected is not None
-                                and YukiGUI.showonlychplaylist_chk.isChecked()
+                                pr["start"] < time.time() + 1
+                                and not (
+                                    time.time() > pr["start"]
+                                    and time.time() < pr["stop"]
+                                )
+                                and pr["stop"] > time.time() - catchup_days2
                             ):
-                                try:
-                                    catchup_days2 = int(channel_1_item["catchup-days"])
-                                except Exception:
-                                    catchup_days2 = 7
-                                # support for seconds
-                                if catchup_days2 < 1000:
-                                    catchup_days2 = catchup_days2 * 86400
-                                if (
-                                    pr["start"] < time.time() + 1
-                                    and not (
-                                        time.time() > pr["start"]
-                                        and time.time() < pr["stop"]
+                                archive_link = urllib.parse.quote_plus(
+                                    json.dumps(
+                                        [
+                                            channel_1,
+                                            datetime.datetime.fromtimestamp(
+                                                pr["start"]
+                                            ).strftime("%d.%m.%Y %H:%M:%S"),
+                                            datetime.datetime.fromtimestamp(
+                                                pr["stop"]
+                                            ).strftime("%d.%m.%Y %H:%M:%S"),
+                                            pr_index,
+                                        ]
                                     )
-                                    and pr["stop"] > time.time() - catchup_days2
-                                ):
-                                    archive_link = urllib.parse.quote_plus(
-                                        json.dumps(
-                                            [
-                                                channel_1,
-                                                datetime.datetime.fromtimestamp(
-                                                    pr["start"]
-                                                ).strftime("%d.%m.%Y %H:%M:%S"),
-                                                datetime.datetime.fromtimestamp(
-                                                    pr["stop"]
-                                                ).strftime("%d.%m.%Y %H:%M:%S"),
-                                                current_programmes.index(pr),
-                                            ]
-                                        )
-                                    )
-                                    archive_btn = (
-                                        '\n<a href="#__archive__'
-                                        + archive_link
-                                        + '">'
-                                        + _("Open archive")
-                                        + "</a>"
-                                    )
-                            start_symbl = ""
-                            stop_symbl = ""
-                            if YukiData.use_dark_icon_theme:
-                                start_symbl = '<span style="color: white;">'
-                                stop_symbl = "</span>"
-                            use_epg_color = "green"
-                            if time.time() > pr["start"] and time.time() < pr["stop"]:
-                                use_epg_color = "red"
-                            txt += (
-                                f'<span style="color: {use_epg_color};">'
-                                + start_2
-                                + stop_2
-                                + "</span>"
-                                + start_symbl
-                                + "<b>"
-                                + title_2
-                                + "</b>"
-                                + archive_btn
-                                + desc_2
-                                + attach_1
-                                + stop_symbl
-                                + newline_symbol
-                            )
+                                )
+                                archive_btn = (
+                                    '\n<a href="#__archive__'
+                                    + archive_link
+                                    + '">'
+                                    + _("Open archive")
+                                    + "</a>"
+                                )
+                        start_symbl = ""
+                        stop_symbl = ""
+                        if YukiData.use_dark_icon_theme:
+                            start_symbl = '<span style="color: white;">'
+                            stop_symbl = "</span>"
+                        use_epg_color = "green"
+                        if time.time() > pr["start"] and time.time() < pr["stop"]:
+                            use_epg_color = "red"
+                        txt += (
+                            f'<span style="color: {use_epg_color};">'
+                            + start_2
+                            + stop_2
+                            + "</span>"
+                            + start_symbl
+                            + "<b>"
+                            + title_2
+                            + "</b>"
+                            + archive_btn
+                            + desc_2
+                            + attach_1
+                            + stop_symbl
+                            + newline_symbol
+                        )
                 if txt == newline_symbol or not txt:
                     txt = _("No TV guide for channel")
                 if do_return:
@@ -4034,6 +4203,10 @@ if __name__ == "__main__":
                 for channel_0 in YukiData.array_sorted:
                     YukiGUI.epg_win_checkbox.addItem(channel_0)
             else:
+                if not YukiData.epg_full_view and (
+                    YukiData.settings["epgscope"] or is_xtream_epg_deferred()
+                ):
+                    threading.Thread(target=load_full_epg, daemon=True).start()
                 epg_names = get_all_epg_names()
                 if not epg_names:
                     epg_names = set()
@@ -4055,23 +4228,7 @@ if __name__ == "__main__":
                 YukiGUI.epg_win.show()
 
         def get_channels_page(group, page):
-            if isinstance(YukiData.array_sorted, list):
-                channels = YukiData.array_sorted
-            else:
-                channels = list(YukiData.array_sorted.keys())
-            if group and group != _("All channels"):
-                if group == _("Favourites"):
-                    channels = [
-                        channel
-                        for channel in channels
-                        if channel in YukiData.favourite_sets
-                    ]
-                else:
-                    channels = [
-                        channel
-                        for channel in channels
-                        if YukiData.array[channel]["tvg-group"] == group
-                    ]
+            channels = get_group_channels(group)
             channels_on_page = 10
             page_start = (page * channels_on_page) - channels_on_page
             page_end = page * channels_on_page
@@ -4084,8 +4241,8 @@ if __name__ == "__main__":
                 YukiGUI.multiepg_win._set(
                     getArrayItem=getArrayItem,
                     get_epg_id=get_epg_id,
-                    get_epg_programmes=get_epg_programmes,
-                    epg_is_in_date=epg_is_in_date,
+                    get_epg_timeline=get_epg_timeline,
+                    epg_day_range=epg_day_range,
                     font_bold=YukiGUI.font_bold,
                     font_italic=YukiGUI.font_italic,
                     get_channels_page=get_channels_page,
@@ -4094,6 +4251,79 @@ if __name__ == "__main__":
                 YukiGUI.multiepg_win.first()
                 YukiGUI.multiepg_win.show()
 
+        def search_epg(text):
+            """(channel, programme, archive link) for programmes matching text"""
+            if YukiData.epg_pool_running or not YukiData.array:
+                return []
+            t = time.time()
+            channels = {}
+            for channel in YukiData.array:
+                epg_id = get_epg_id(channel)
+                if epg_id:
+                    channels.setdefault(epg_id, []).append(channel)
+            current_time = time.time()
+            results = []
+            for epg_id, programme in YukiData.epg_search_index.search(
+                text,
+                YukiData.epg_index,
+                channels,
+                current_time - get_catchup_days(is_seconds=True),
+            ):
+                for channel in channels[epg_id]:
+                    archive_link = ""
+                    try:
+                        catchup_days = int(YukiData.array[channel]["catchup-days"])
+                    except Exception:
+                        catchup_days = 7
+                    # support for seconds
+                    if catchup_days < 1000:
+                        catchup_days = catchup_days * 86400
+                    if current_time - catchup_days < programme["stop"] < current_time:
+                        timeline = get_epg_timeline(epg_id)
+                        pr_index = timeline.find(programme["start"]) if timeline else -1
+                        archive_link = urllib.parse.quote_plus(
+                            json.dumps(
+                                [
+                                    channel,
+                                    datetime.datetime.fromtimestamp(
+                                        programme["start"]
+                                    ).strftime("%d.%m.%Y %H:%M:%S"),
+                                    datetime.datetime.fromtimestamp(
+                                        programme["stop"]
+                                    ).strftime("%d.%m.%Y %H:%M:%S"),
+                                    pr_index,
+                                ]
+                            )
+                        )
+                    results.append((channel, programme, archive_link))
+            logger.debug(
+                f"TV guide search: {len(results)} results, "
+                f"took {round(time.time() - t, 3)} seconds"
+            )
+            return results
+
+        def show_epg_search():
+            if YukiGUI.epgsearch_win.isVisible():
+                YukiGUI.epgsearch_win.hide()
+            else:
+                YukiGUI.epgsearch_win._set(
+                    search_epg=search_epg,
+                    do_open_archive=do_open_archive,
+                )
+                YukiGUI.epgsearch_win.first()
+                YukiGUI.epgsearch_win.show()
+
+        def update_epg_search_index(epg_array):
+            if YukiData.settings["epgsearchdesc"]:
+                fields = ("title", "category", "desc")
+            else:
+                fields = ("title", "category")
+            try:
+                YukiData.epg_search_index.update(epg_array, fields)
+            except Exception:
+                logger.warning("EPG search index update failed")
+                logger.warning(traceback.format_exc())
+
         def show_archive():
             if not YukiGUI.epg_win.isVisible():
                 show_tvguide_2()
@@ -5047,24 +5277,19 @@ if __name__ == "__main__":
                     ).timestamp()
                     s_index = YukiData.archive_epg[3]
                 else:
-                    if get_epg_url() and YukiData.playing_channel:
-                        prog1 = None
+                    if has_epg() and YukiData.playing_channel:
+                        timeline = None
                         epg_id = get_epg_id(YukiData.playing_channel)
                         if epg_id:
-                            programmes = get_epg_programmes(epg_id)
-                            if programmes:
-                                prog1 = programmes
-                        if prog1:
-                            for pr in prog1:
-                                if (
-                                    time.time() > pr["start"]
-                                    and time.time() < pr["stop"]
-                                ):
-                                    s_start = pr["start"]
-                                    s_stop = (
-                                        datetime.datetime.now().timestamp()
-                                    )  # pr["stop"]
-                                    s_index = prog1.index(pr)
+                            timeline = get_epg_timeline(epg_id)
+                        if timeline:
+                            pr_index = timeline.at(time.time())
+                            if pr_index != -1:
+                                s_start = timeline.programmes[pr_index]["start"]
+                                s_stop = (
+                                    datetime.datetime.now().timestamp()
+                                )  # pr["stop"]
+                                s_index = pr_index
                 if not s_start:
                     return None
                 return (
@@ -5201,10 +5426,9 @@ if __name__ == "__main__":
                         Path(CACHE_DIR, "logo", channel_logo)
                     ) and channel_logo.endswith(".png"):
                         os.remove(Path(CACHE_DIR, "logo", channel_logo))
-                if YukiData.epg_pool:
+                if YukiData.epg_service:
                     try:
-                        YukiData.epg_pool.close()
-                        YukiData.epg_pool = None
+                        YukiData.epg_service.shutdown()
                     except Exception:
                         pass
                 uninhibit()
@@ -5325,11 +5549,17 @@ if __name__ == "__main__":
             YukiData.ic += 0.1
 
             # redraw every 15 seconds
+            # Programme changes are handled by programme_boundary_reached,
+            # playlist is redrawn only while channel logos are loading
             if YukiData.ic > (
                 14.9 if not YukiData.mp_manager_dict["logos_inprogress"] else 2.9
             ):
                 YukiData.ic = 0
-                execute_in_main_thread(partial(redraw_channels))
+                if YukiData.mp_manager_dict["logos_inprogress"]:
+                    execute_in_main_thread(partial(redraw_channels))
+                else:
+                    execute_in_main_thread(partial(update_channels_progress))
+                execute_in_main_thread(partial(request_xtream_short_epg))
             YukiData.ic3 += 0.1
 
             if YukiData.ic3 > (
@@ -5352,13 +5582,23 @@ if __name__ == "__main__":
             YukiData.state.setTextYuki(_("TV guide update error!"))
             YukiData.time_stop = time.time() + 3
 
-        def thread_tvguide_update_outdated():
+        def thread_tvguide_update_outdated(epg_outdated):
             YukiData.static_text = ""
             YukiData.state.setStaticYuki(False)
             YukiData.state.show()
-            YukiData.state.setTextYuki(_("EPG is outdated!"))
+            YukiData.state.setTextYuki(
+                "{} ({})".format(
+                    _("EPG is outdated!"),
+                    ", ".join(get_epg_source_name(epg_url) for epg_url in epg_outdated),
+                )
+            )
             YukiData.time_stop = time.time() + 3
 
+        def thread_tvguide_update_cancel():
+            YukiData.static_text = ""
+            YukiData.state.setStaticYuki(False)
+            YukiData.time_stop = time.time()
+
         def thread_tvguide_update_end():
             YukiData.static_text = ""
             YukiData.state.setStaticYuki(False)
@@ -5507,11 +5747,12 @@ if __name__ == "__main__":
                                 ) < 86400  # 1 day
                             if not check_programmes_actual() or not is_actual:
                                 logger.info("EPG is outdated, updating it...")
-                                purge_epg_cache()
                                 thread_epg_update_3 = threading.Thread(
-                                    target=epg_update, daemon=True
+                                    target=epg_update, args=(True,), daemon=True
                                 )
                                 thread_epg_update_3.start()
+                            elif time.time() - YukiData.epg_prune_date > 3600:
+                                prune_epg()
             except Exception:
                 pass
 
@@ -5521,13 +5762,9 @@ if __name__ == "__main__":
                     YukiData.thread_tvguide_progress_lock = True
                     try:
                         if YukiData.epg_pool_running:
-                            if (
-                                "epg_progress" in YukiData.mp_manager_dict
-                                and YukiData.mp_manager_dict["epg_progress"]
-                            ):
-                                YukiData.static_text = YukiData.mp_manager_dict[
-                                    "epg_progress"
-                                ]
+                            epg_progress = YukiData.epg_service.progress()
+                            if epg_progress:
+                                YukiData.static_text = epg_progress
                                 YukiData.state.setTextYuki(is_previous=True)
                     except Exception:
                         pass
@@ -5951,6 +6188,7 @@ if __name__ == "__main__":
             "lowpanel_ch_1": lowpanel_ch_1,
             "show_tvguide_2": show_tvguide_2,
             "show_multi_epg": show_multi_epg,
+            "show_epg_search": show_epg_search,
             "do_record_1_INTERNAL": do_record,
             "mpv_mute_1_INTERNAL": mpv_mute,
             "mpv_play_1_INTERNAL": mpv_play,
@@ -6051,7 +6289,67 @@ if __name__ == "__main__":
             except Exception:
                 pass
 
-        def epg_update():
+        def get_epg_retention():
+            # Past - archive depth of playlist, future - from settings
+            return (
+                get_catchup_days(is_seconds=True),
+                86400 * YukiData.settings["epgdays"],
+            )
+
+        def prune_epg():
+            YukiData.epg_prune_date = time.time()
+            try:
+                YukiData.epg_index.prune(time.time() - get_epg_retention()[0])
+            except Exception:
+                logger.warning("prune_epg failed")
+                logger.warning(traceback.format_exc())
+
+        def get_epg_parse_options():
+            scope = None
+            if YukiData.settings["epgscope"] and not YukiData.epg_full_view:
+                channels = []
+                for title, channel in YukiData.array.items():
+                    orig_title = (
+                        channel["orig_title"] if "orig_title" in channel else title
+                    )
+                    channels.append(
+                        (
+                            channel["tvg-ID"],
+                            channel["tvg-name"],
+                            orig_title,
+                            get_epg_name(orig_title),
+                        )
+                    )
+                scope = get_epg_scope(channels)
+            return {"retention": get_epg_retention(), "scope": scope}
+
+        def is_xtream_epg_deferred():
+            # XTream short EPG is used, full dump is not loaded yet
+            return (
+                YukiData.xtream_short_epg is not None
+                and not YukiData.settings["epg"]
+                and not YukiData.settings["epg_temporary"]
+            )
+
+        def load_full_epg():
+            # Only playlist channels are loaded, load the rest on first request
+            if YukiData.epg_full_view:
+                return
+            if is_xtream_epg_deferred():
+                logger.info("Loading full XTream TV guide")
+                YukiData.settings["epg_temporary"] = YukiData.xtream_short_epg.xmltv_url
+                YukiData.epg_full_view = True
+                YukiData.epg_update_pending = True
+                epg_update()
+                execute_in_main_thread(partial(epg_win_checkbox_changed))
+            elif YukiData.settings["epgscope"]:
+                logger.info("Loading TV guide for all channels")
+                YukiData.epg_full_view = True
+                YukiData.epg_update_pending = True
+                epg_update()
+                execute_in_main_thread(partial(epg_win_checkbox_changed))
+
+        def epg_update(revalidate=False):
             if get_epg_url():
                 if YukiData.epg_pool_running:
                     logger.info("EPG already updating")
@@ -6063,36 +6361,117 @@ if __name__ == "__main__":
                             return
 
                     YukiData.epg_update_date = time.time()
+                    YukiData.epg_prune_date = time.time()
                     YukiData.epg_pool_running = True
+                    YukiData.epg_update_pending = False
                     execute_in_main_thread(partial(thread_tvguide_update_start))
 
-                    YukiData.epg_pool = get_context("spawn").Pool(1)
-                    (
-                        epg_failed,
-                        epg_outdated,
-                        YukiData.epg_array,
-                    ) = YukiData.epg_pool.apply(
-                        epg_worker,
-                        (
-                            get_epg_url(),
-                            YukiData.settings,
-                            YukiData.mp_manager_dict,
-                        ),
+                    parse_options = get_epg_parse_options()
+                    epg_failed, epg_outdated, epg_array = YukiData.epg_service.load(
+                        get_epg_urls(get_epg_url()),
+                        YukiData.settings,
+                        parse_options,
+                        revalidate,
                     )
-
-                    YukiData.epg_pool.close()
-                    YukiData.epg_pool = None
+                    if epg_array is None:
+                        execute_in_main_thread(partial(thread_tvguide_update_cancel))
+                        YukiData.epg_pool_running = False
+                        return
+                    if YukiData.xtream_short_epg is not None:
+                        # Lowest priority, channels of full EPG are not fetched
+                        epg_array[XTREAM_SHORT_EPG] = YukiData.xtream_short_epg.source
+
+                    epg_index = EPGIndex(
+                        epg_array, get_epg_offsets(YukiData.settings, epg_array)
+                    )
+                    if YukiData.array:
+                        resolve_playlist_epg_ids(epg_index)
+                    YukiData.epg_index = epg_index
 
                     if epg_outdated:
-                        execute_in_main_thread(partial(thread_tvguide_update_outdated))
+                        execute_in_main_thread(
+                            partial(thread_tvguide_update_outdated, epg_outdated)
+                        )
                     elif epg_failed:
                         execute_in_main_thread(partial(thread_tvguide_update_error))
                     else:
                         execute_in_main_thread(partial(thread_tvguide_update_end))
-                    YukiData.epg_failed = epg_outdated or epg_failed
+                    YukiData.epg_failed = bool(epg_outdated) or epg_failed
                     YukiData.epg_pool_running = False
 
+                    if YukiData.epg_update_pending:
+                        # Requested while EPG was updating (EPG URL or scope
+                        # has changed), loaded data is outdated
+                        epg_update()
+                        return
+
                     execute_in_main_thread(partial(redraw_channels))
+                    update_epg_search_index(epg_array)
+            elif YukiData.xtream_short_epg is not None:
+                # XTream short EPG is the only source, fetched on request
+                epg_array = {XTREAM_SHORT_EPG: YukiData.xtream_short_epg.source}
+                epg_index = EPGIndex(
+                    epg_array, get_epg_offsets(YukiData.settings, epg_array)
+                )
+                if YukiData.array:
+                    resolve_playlist_epg_ids(epg_index)
+                YukiData.epg_index = epg_index
+                execute_in_main_thread(partial(redraw_channels))
+
+        def refill_groups_combobox():
+            # Groups have changed, current group is kept if it still exists
+            current_group = YukiData.combobox.currentText()
+            YukiData.combobox.blockSignals(True)
+            YukiData.combobox.clear()
+            fill_groups_combobox()
+            YukiData.combobox.setCurrentIndex(
+                max(YukiData.combobox.findText(current_group), 0)
+            )
+            YukiData.combobox.blockSignals(False)
+            YukiData.comboboxIndex = YukiData.combobox.currentIndex()
+            YukiData.current_group = groups[YukiData.comboboxIndex]
+
+        def playlist_updated(playlist_update):
+            # Fresh copy of playlist shown from parsed playlist cache
+            epg_url_old = YukiData.settings["epg_temporary"]
+            groups_new, added, removed, changed = update_playlist(playlist_update)
+            logger.info(
+                f"Playlist updated: {len(added)} channels added, "
+                f"{len(removed)} removed, {len(changed)} changed"
+            )
+
+            groups[:] = groups_new
+            refill_groups_combobox()
+
+            current_movies_group = movies_combobox.currentText()
+            movies_combobox.blockSignals(True)
+            movies_combobox.clear()
+            fill_movies_combobox()
+            movies_combobox.setCurrentIndex(
+                max(movies_combobox.findText(current_movies_group), 0)
+            )
+            movies_combobox.blockSignals(False)
+            movies_group_change()
+
+            if YukiData.epg_index is not None:
+                YukiData.epg_index.invalidate_epg_ids(changed + removed)
+            redraw_channels()
+
+            if YukiData.settings["epg_temporary"] != epg_url_old or (
+                (added or changed) and YukiData.settings["epgscope"]
+            ):
+                # EPG URL or channels in EPG scope have changed
+                YukiData.epg_update_pending = True
+                threading.Thread(target=epg_update, daemon=True).start()
+
+        def playlist_revalidate():
+            try:
+                playlist_update = revalidate_playlist()
+                if playlist_update is not None:
+                    execute_in_main_thread(partial(playlist_updated, playlist_update))
+            except Exception:
+                logger.warning("Playlist revalidation failed")
+                logger.warning(traceback.format_exc())
 
         if YukiData.settings["m3u"] and m3u_exists:
             show_window(win)
@@ -6154,6 +6533,9 @@ if __name__ == "__main__":
 
             thread_epg_update_1 = threading.Thread(target=epg_update, daemon=True)
             thread_epg_update_1.start()
+
+            if playlist_from_cache:
+                threading.Thread(target=playlist_revalidate, daemon=True).start()
         else:
             YukiData.first_start = True
             show_playlists()
@@ -0,0 +1,105 @@
+#
+# Copyright (c) 2023-2025 liya <liyaliya@tutamail.com>
+#
+# This file is part of yuki-iptv.
+#
+# yuki-iptv is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# yuki-iptv is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with yuki-iptv. If not, see <https://www.gnu.org/licenses/>.
+#
+# The Font Awesome pictograms are licensed under the CC BY 4.0 License.
+# Font Awesome Free 5.15.4 by @fontawesome - https://fontawesome.com
+# https://creativecommons.org/licenses/by/4.0/
+#
+# Index of channels shown in the channel list
+#
+# Channels are kept in sorted (shown) order, position map gives position
+# of a channel in it. Channels of every group are kept in the same order,
+# so channels of a group (and a page of them) are a lookup and a slice,
+# not a scan of all channels.
+#
+from bisect import bisect
+
+
+class ChannelIndex:
+    """Sorted channels, channels of groups and favourites
+
+    favourites is a dict used as an ordered set (channel title -> None),
+    shared with the caller, changes are done with add/remove_favourite."""
+
+    def __init__(self, array, array_sorted, favourites):
+        self.channels = list(array_sorted)
+        self.positions = {}
+        self.groups = {}
+        self.favourites = favourites
+        self.favourite_channels = None
+        self.update_positions()
+        for title, group in zip(
+            self.channels, array.get_column("tvg-group", self.channels)
+        ):
+            group_channels = self.groups.get(group)
+            if group_channels is None:
+                group_channels = self.groups[group] = []
+            group_channels.append(title)
+
+    def update_positions(self, start=0):
+        for position in range(start, len(self.channels)):
+            self.positions[self.channels[position]] = position
+        self.favourite_channels = None
+
+    def get_group(self, group):
+        """Channels of group, in sorted order"""
+        return self.groups.get(group, [])
+
+    def get_favourites(self):
+        """Favourite channels which are in playlist, in sorted order"""
+        if self.favourite_channels is None:
+            self.favourite_channels = sorted(
+                (title for title in self.favourites if title in self.positions),
+                key=self.positions.__getitem__,
+            )
+        return self.favourite_channels
+
+    def add_favourite(self, title):
+        self.favourites[title] = None
+        self.favourite_channels = None
+
+    def remove_favourite(self, title):
+        self.favourites.pop(title, None)
+        self.favourite_channels = None
+
+    def remove_from_group(self, title, group):
+        group_channels = self.groups.get(group)
+        if group_channels is not None and title in group_channels:
+            group_channels.remove(title)
+            if not group_channels:
+                del self.groups[group]
+
+    def set_group(self, title, old_group, group):
+        """Channel has moved to another group (group override)"""
+        if title not in self.positions or old_group == group:
+            return
+        self.remove_from_group(title, old_group)
+        group_channels = self.groups.get(group)
+        if group_channels is None:
+            group_channels = self.groups[group] = []
+        group_positions = [self.positions[channel] for channel in group_channels]
+        group_channels.insert(bisect(group_positions, self.positions[title]), title)
+
+    def remove(self, title, group):
+        """Channel is not shown anymore (hidden)"""
+        position = self.positions.pop(title, None)
+        if position is None:
+            return
+        del self.channels[position]
+        self.remove_from_group(title, group)
+        self.update_positions(position)
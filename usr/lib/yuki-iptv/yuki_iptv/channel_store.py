@@ -0,0 +1,354 @@
+#
+# Copyright (c) 2023-2025 liya <liyaliya@tutamail.com>
+#
+# This file is part of yuki-iptv.
+#
+# yuki-iptv is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# yuki-iptv is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with yuki-iptv. If not, see <https://www.gnu.org/licenses/>.
+#
+# The Font Awesome pictograms are licensed under the CC BY 4.0 License.
+# Font Awesome Free 5.15.4 by @fontawesome - https://fontawesome.com
+# https://creativecommons.org/licenses/by/4.0/
+#
+# Column-oriented storage of playlist channels
+#
+# Every channel is a row. Values which repeat on many rows (groups,
+# catch-up settings, user agents) are stored once in a value pool,
+# columns hold uint32 ids. URLs and logos are split after the last "/",
+# prefix goes to the pool, the rest is kept per row. Values which are
+# (nearly) unique per channel are kept in plain lists.
+# Keys which are not known columns are kept in per-row dicts.
+#
+from array import array
+from operator import itemgetter
+from collections.abc import MutableMapping
+
+CHANNEL_POOLED_FIELDS = (
+    "tvg-group",
+    "tvg-url",
+    "catchup",
+    "catchup-source",
+    "catchup-days",
+    "useragent",
+    "referer",
+)
+CHANNEL_PREFIXED_FIELDS = ("tvg-logo", "url")
+CHANNEL_LIST_FIELDS = ("title", "orig_title", "tvg-name", "tvg-ID")
+CHANNEL_COLUMNS = CHANNEL_POOLED_FIELDS + CHANNEL_PREFIXED_FIELDS + CHANNEL_LIST_FIELDS
+CHANNEL_FIELDS = frozenset(CHANNEL_COLUMNS)
+
+get_channel_values = itemgetter(*CHANNEL_COLUMNS)
+
+
+class _Missing:
+    __slots__ = ()
+
+    def __repr__(self):
+        return "<missing>"
+
+    def __reduce__(self):
+        return "MISSING"
+
+
+# Key is not set for the channel
+MISSING = _Missing()
+
+
+class ValuePool:
+    """Distinct values, id 0 is MISSING"""
+
+    __slots__ = ("values", "ids")
+
+    def __init__(self, values=None):
+        self.values = values if values is not None else [MISSING]
+        self.ids = {value: value_id for value_id, value in enumerate(self.values)}
+
+    def add(self, value):
+        value_id = self.ids.get(value)
+        if value_id is None:
+            value_id = self.ids[value] = len(self.values)
+            self.values.append(value)
+        return value_id
+
+
+class ChannelRow(MutableMapping):
+    """Channel of ChannelStore, behaves like channel dict
+
+    Changes are written to the store. Pickled as a plain dict."""
+
+    __slots__ = ("store", "row")
+
+    def __init__(self, store, row):
+        self.store = store
+        self.row = row
+
+    def __getitem__(self, key):
+        value = self.store.get_value(self.row, key)
+        if value is MISSING:
+            raise KeyError(key)
+        return value
+
+    def __setitem__(self, key, value):
+        self.store.set_value(self.row, key, value)
+
+    def __delitem__(self, key):
+        if key not in self:
+            raise KeyError(key)
+        self.store.set_value(self.row, key, MISSING)
+
+    def __contains__(self, key):
+        return self.store.get_value(self.row, key) is not MISSING
+
+    def __iter__(self):
+        for key in self.store.keys_order:
+            if self.store.get_value(self.row, key) is not MISSING:
+                yield key
+        yield from self.store.extra.get(self.row, ())
+
+    def __len__(self):
+        return sum(1 for _key in self)
+
+    def __repr__(self):
+        return repr(dict(self))
+
+    def __reduce__(self):
+        return dict, (dict(self),)
+
+
+class ChannelStore(MutableMapping):
+    """Channel title -> channel, in insertion order
+
+    Channels are stored as rows of columns, values are ChannelRow.
+    Row of removed channel is not reused, the store is rebuilt
+    on every playlist load."""
+
+    # Key order of channel dicts made by M3UParser
+    keys_order = (
+        "title",
+        "tvg-name",
+        "tvg-ID",
+        "tvg-logo",
+        "tvg-group",
+        "tvg-url",
+        "catchup",
+        "catchup-source",
+        "catchup-days",
+        "useragent",
+        "referer",
+        "url",
+        "orig_title",
+    )
+
+    def __init__(self, channels=None):
+        self.rows = {}
+        self.row_count = 0
+        self.pool = ValuePool()
+        self.pooled = {field: array("I") for field in CHANNEL_POOLED_FIELDS}
+        self.prefixed = {field: (array("I"), []) for field in CHANNEL_PREFIXED_FIELDS}
+        self.lists = {field: [] for field in CHANNEL_LIST_FIELDS}
+        # Row -> dict of other keys
+        self.extra = {}
+        if channels is not None:
+            self.update(channels)
+
+    def add_rows(self, channels):
+        """Add channels (title -> channel dict) which are not in the store
+
+        Values are added column by column, which is much faster
+        than adding channels one by one."""
+        if not channels:
+            return
+        first_row = self.row_count
+        for row, title in enumerate(channels, first_row):
+            self.rows[title] = row
+        self.row_count += len(channels)
+        channels = list(channels.values())
+        try:
+            columns = dict(
+                zip(CHANNEL_COLUMNS, zip(*map(get_channel_values, channels)))
+            )
+        except KeyError:
+            columns = {
+                field: [channel.get(field, MISSING) for channel in channels]
+                for field in CHANNEL_COLUMNS
+            }
+        ids = self.pool.ids.get
+        add = self.pool.add
+        for field, column in self.pooled.items():
+            # id 0 is MISSING, so "or" is safe
+            column.extend([ids(value) or add(value) for value in columns[field]])
+        for field, (prefixes, rests) in self.prefixed.items():
+            for value in columns[field]:
+                if value.__class__ is str:
+                    prefix_end = value.rfind("/") + 1
+                    value, rest = value[:prefix_end], value[prefix_end:]
+                else:
+                    rest = MISSING
+                prefixes.append(ids(value) or add(value))
+                rests.append(rest)
+        titles = columns["title"]
+        for field, column in self.lists.items():
+            # tvg-name and orig_title are often equal to title, share the string
+            column.extend(
+                [
+                    title if value == title else value
+                    for title, value in zip(titles, columns[field])
+                ]
+            )
+        for row, channel in enumerate(channels, first_row):
+            if not CHANNEL_FIELDS.issuperset(channel):
+                self.extra[row] = {
+                    key: value
+                    for key, value in channel.items()
+                    if key not in CHANNEL_FIELDS
+                }
+
+    def update(self, channels=(), /, **kwargs):
+        if kwargs or not isinstance(channels, dict):
+            super().update(channels, **kwargs)
+            return
+        new_channels = {}
+        for title, channel in channels.items():
+            if title in self.rows:
+                self[title] = channel
+            else:
+                new_channels[title] = channel
+        self.add_rows(new_channels)
+
+    def get_value(self, row, key):
+        """Value of key in row, MISSING if it is not set"""
+        column = self.pooled.get(key)
+        if column is not None:
+            return self.pool.values[column[row]]
+        if key in self.prefixed:
+            prefixes, rests = self.prefixed[key]
+            value = self.pool.values[prefixes[row]]
+            if rests[row] is not MISSING:
+                value += rests[row]
+            return value
+        column = self.lists.get(key)
+        if column is not None:
+            return column[row]
+        return self.extra.get(row, {}).get(key, MISSING)
+
+    def set_value(self, row, key, value):
+        if key in self.pooled:
+            self.pooled[key][row] = self.pool.add(value)
+        elif key in self.prefixed:
+            prefixes, rests = self.prefixed[key]
+            if isinstance(value, str):
+                prefix_end = value.rfind("/") + 1
+                prefixes[row] = self.pool.add(value[:prefix_end])
+                rests[row] = value[prefix_end:]
+            else:
+                prefixes[row] = self.pool.add(value)
+                rests[row] = MISSING
+        elif key in self.lists:
+            self.lists[key][row] = value
+        elif value is MISSING:
+            self.extra.get(row, {}).pop(key, None)
+        else:
+            self.extra.setdefault(row, {})[key] = value
+
+    def get_column(self, key, titles):
+        """Values of key for channels, MISSING where it is not set"""
+        rows = [self.rows[title] for title in titles]
+        values = self.pool.values
+        if key in self.pooled:
+            column = self.pooled[key]
+            return [values[column[row]] for row in rows]
+        if key in self.prefixed:
+            prefixes, rests = self.prefixed[key]
+            return [
+                (
+                    values[prefixes[row]]
+                    if rests[row] is MISSING
+                    else values[prefixes[row]] + rests[row]
+                )
+                for row in rows
+            ]
+        if key in self.lists:
+            column = self.lists[key]
+            return [column[row] for row in rows]
+        return [self.extra.get(row, {}).get(key, MISSING) for row in rows]
+
+    def get_changed(self, other, titles):
+        """Titles of channels which are different in other store
+
+        Compared column by column, channels have to be in both stores."""
+        changed = set()
+        keys = set(CHANNEL_COLUMNS)
+        for store in (self, other):
+            for row_extra in store.extra.values():
+                keys.update(row_extra)
+        for key in keys:
+            for title, value, other_value in zip(
+                titles, self.get_column(key, titles), other.get_column(key, titles)
+            ):
+                if value != other_value:
+                    changed.add(title)
+        return changed
+
+    def __getitem__(self, title):
+        return ChannelRow(self, self.rows[title])
+
+    def __setitem__(self, title, channel):
+        if type(channel) is ChannelRow and channel.store is self:
+            channel = dict(channel)
+        row = self.rows.get(title)
+        if row is None:
+            self.add_rows({title: channel})
+        else:
+            for key in list(ChannelRow(self, row)):
+                if key not in channel:
+                    self.set_value(row, key, MISSING)
+            for key, value in channel.items():
+                self.set_value(row, key, value)
+
+    def __delitem__(self, title):
+        self.extra.pop(self.rows.pop(title), None)
+
+    def __contains__(self, title):
+        return title in self.rows
+
+    def __iter__(self):
+        return iter(self.rows)
+
+    def __len__(self):
+        return len(self.rows)
+
+    def __repr__(self):
+        return f"<ChannelStore of {len(self.rows)} channels>"
+
+    def clear(self):
+        self.__init__()
+
+    def __getstate__(self):
+        return {
+            "rows": self.rows,
+            "row_count": self.row_count,
+            "pool": self.pool.values,
+            "pooled": self.pooled,
+            "prefixed": self.prefixed,
+            "lists": self.lists,
+            "extra": self.extra,
+        }
+
+    def __setstate__(self, state):
+        self.rows = state["rows"]
+        self.row_count = state["row_count"]
+        self.pool = ValuePool(state["pool"])
+        self.pooled = state["pooled"]
+        self.prefixed = state["prefixed"]
+        self.lists = state["lists"]
+        self.extra = state["extra"]
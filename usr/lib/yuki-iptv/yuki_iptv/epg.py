@@ -21,80 +21,319 @@
 # Font Awesome Free 5.15.4 by @fontawesome - https://fontawesome.com
 # https://creativecommons.org/licenses/by/4.0/
 #
-import io
 import os
 import os.path
 import time
-import gzip
-import lzma
 import json
 import logging
 import hashlib
 import zipfile
+import tempfile
 import datetime
 import traceback
+import urllib.parse
 from pathlib import Path
 from yuki_iptv.i18n import _
 from yuki_iptv.xdg import CACHE_DIR
 from yuki_iptv.epg_xmltv import parse_as_xmltv
 from yuki_iptv.epg_jtv import parse_epg_zip_jtv
+from yuki_iptv.epg_cache import (
+    load_epg_cache,
+    save_epg_cache,
+    is_epg_cache_compatible,
+    read_epg_cache_metadata,
+    get_epg_coverage,
+)
+from yuki_iptv.epg_stream import EPGResponseStream, open_epg_stream
+from yuki_iptv.http_cache import (
+    read_validators,
+    save_validators,
+    get_conditional_headers,
+)
 from yuki_iptv.requests_timeout import requests_get
 
 logger = logging.getLogger(__name__)
-epg_array = {}
 
+# Temporary pre-parsed EPG files, written when EPG cache is disabled
+EPG_HANDOFF_PREFIX = "handoff-"
 
-def load_epg(epg_url, headers):
+
+def load_epg(epg_url, headers, tee_file=None):
     logger.info("Loading EPG...")
     # logger.debug(f"Address: '{epg_url}'")
     if os.path.isfile(epg_url.strip()):
-        epg_file = open(epg_url.strip(), "rb")
-        epg = epg_file.read()
-        epg_file.close()
+        epg = open(epg_url.strip(), "rb")
     else:
         logger.info(f"Headers: {json.dumps(headers)}")
         epg_req = requests_get(epg_url, headers=headers, stream=True, timeout=(35, 35))
         logger.info(f"EPG URL status code: {epg_req.status_code}")
-        epg = epg_req.content
-    logger.info("EPG loaded")
+        epg = EPGResponseStream(epg_req, tee_file)
     return epg
 
 
-def is_program_actual(sets0, future=False):
+def is_epg_actual(coverage, future=False, offset=0):
+    """Whether EPG has programmes for now (for tomorrow if future)
+
+    Uses coverage summary (get_epg_coverage), so it does not depend
+    on the number of programmes."""
     if future:
         current_time = time.time() + 86400  # 1 day
     else:
         current_time = time.time()
-    if sets0:
-        for prog1 in sets0:
-            pr1 = sets0[prog1]
-            for p in pr1:
-                if current_time > p["start"] and current_time < p["stop"]:
-                    return True
-    return False
+    current_time -= offset
+    return bool(
+        coverage["programmes"]
+        and coverage["min_start"] < current_time < coverage["max_stop"]
+    )
+
+
+def get_epg_offsets(settings, epg_urls):
+    """EPG URL -> time offset in seconds
+
+    Global offset plus per-source one from "epgoffsets" setting (hours)."""
+    return {
+        epg_url: 3600 * (settings["epgoffset"] + settings["epgoffsets"].get(epg_url, 0))
+        for epg_url in epg_urls
+    }
+
+
+def get_epg_source_name(epg_url):
+    """Short EPG source name for messages"""
+    epg_url = epg_url.strip()
+    if os.path.isfile(epg_url):
+        return os.path.basename(epg_url)
+    url = urllib.parse.urlparse(epg_url)
+    return url.netloc + url.path
+
+
+def get_retention_window(retention):
+    """Convert (past seconds, future seconds) to (min stop, max start)"""
+    if not retention:
+        return None
+    now = time.time()
+    return now - retention[0], now + retention[1]
+
+
+def prune_epg(epg, retention_window):
+    """Drop programmes outside of retention window"""
+    min_stop, max_start = retention_window
+    for channel_id in list(epg["epg"]):
+        programmes = [
+            programme
+            for programme in epg["epg"][channel_id]
+            if programme["start"] < max_start and programme["stop"] > min_stop
+        ]
+        if programmes:
+            epg["epg"][channel_id] = programmes
+        else:
+            epg["epg"].pop(channel_id)
+
+
+def get_epg_id_candidates(tvg_id, tvg_name, channel_name, epg_name):
+    """Names and ids to look up in EPG for channel, in priority order"""
+    epg_name = epg_name.lower().strip()
+    channel_name = channel_name.lower().strip()
+    tvg_name = tvg_name.lower().strip()
+    candidates = []
+    # First, match from EPG name
+    if epg_name:
+        candidates += [("name", epg_name), ("name", epg_name.replace(" ", "_"))]
+    # Second, match from tvg-id
+    if tvg_id:
+        candidates.append(("id", tvg_id))
+    # Third, match from tvg-name
+    if tvg_name:
+        candidates += [("name", tvg_name), ("name", tvg_name.replace(" ", "_"))]
+    # Last, match from channel name
+    if channel_name:
+        candidates += [
+            ("name", channel_name),
+            ("name", channel_name.replace(" ", "_")),
+        ]
+    return candidates
+
+
+def get_epg_scope(channels):
+    """EPG ids and names which can be matched by playlist channels
+
+    channels is iterable of (tvg-id, tvg-name, channel name, EPG name)"""
+    scope = {"ids": set(), "names": set()}
+    for channel in channels:
+        for kind, candidate in get_epg_id_candidates(*channel):
+            scope["ids" if kind == "id" else "names"].add(candidate)
+    return scope
+
+
+def get_parse_options_key(parse_options):
+    """Parse options in form which is stored in pre-parsed cache metadata"""
+    retention = None
+    scope = None
+    if parse_options["retention"]:
+        retention = list(parse_options["retention"])
+    if parse_options["scope"] is not None:
+        scope = hashlib.sha1(
+            json.dumps(
+                [
+                    sorted(parse_options["scope"]["ids"]),
+                    sorted(parse_options["scope"]["names"]),
+                ]
+            ).encode("utf-8")
+        ).hexdigest()
+    return {"retention": retention, "scope": scope}
+
+
+def scope_epg(epg, scope):
+    """Drop programmes of channels which playlist can not match"""
+    scoped_ids = set(scope["ids"])
+    for name in scope["names"]:
+        if name in epg["names"]:
+            scoped_ids.add(epg["names"][name])
+    for channel_id in list(epg["epg"]):
+        if channel_id not in scoped_ids:
+            epg["epg"].pop(channel_id)
+
 
+def apply_parse_options(epg, parse_options):
+    if parse_options["retention"]:
+        prune_epg(epg, get_retention_window(parse_options["retention"]))
+    if parse_options["scope"] is not None:
+        scope_epg(epg, parse_options["scope"])
 
-def parse_epg(epg_url, settings, return_dict, i, epgs):
+
+def parse_epg_stream(epg_stream, settings, parse_options):
+    epg_format, data = open_epg_stream(epg_stream)
+    if epg_format == "zip":
+        logger.info("ZIP file detected")
+        found_zip_format = False
+        with zipfile.ZipFile(data) as myzip:
+            namelist = myzip.namelist()
+            for name in namelist:
+                if name.endswith(".xml"):
+                    logger.info("XMLTV inside ZIP detected, trying to parse...")
+                    found_zip_format = True
+                    with myzip.open(name) as myfile:
+                        try:
+                            epg = parse_as_xmltv(
+                                myfile,
+                                settings,
+                                get_retention_window(parse_options["retention"]),
+                                parse_options["scope"],
+                            )
+                        except Exception:
+                            logger.info("Failed to parse as XMLTV!")
+                            epg = {"epg": None}
+                    break
+                if name.endswith(".ndx"):
+                    logger.info("JTV format detected, trying to parse...")
+                    found_zip_format = True
+                    epg = parse_epg_zip_jtv(myzip)
+                    if epg["epg"]:
+                        apply_parse_options(epg, parse_options)
+                    break
+        data.close()
+        if not found_zip_format:
+            logger.warning("No known EPG formats found in ZIP file!")
+            epg = {"epg": None}
+    elif epg_format == "unknown":
+        logger.warning("Unknown EPG format!")
+        epg = {"epg": None}
+    else:
+        logger.info(f"Trying XMLTV ({epg_format})...")
+        try:
+            epg = parse_as_xmltv(
+                data,
+                settings,
+                get_retention_window(parse_options["retention"]),
+                parse_options["scope"],
+            )
+        except Exception:
+            logger.warning("Failed to parse as XMLTV!")
+            logger.warning(traceback.format_exc())
+            epg = {"epg": None}
+    return epg
+
+
+def is_epg_cache_parsed_with(epg_cache_metadata, parse_options):
+    # Pre-parsed cache contains only programmes within retention window
+    # (and playlist scope), raw EPG has to be parsed again if they have changed
+    return is_epg_cache_compatible(epg_cache_metadata) and epg_cache_metadata.get(
+        "parse_options"
+    ) == get_parse_options_key(parse_options)
+
+
+def open_epg_cache(
+    epg_parsed_filename, epg_cache_filename, epg_cache_metadata, parse_options
+):
+    """Returns (pre-parsed EPG, None) or (None, raw EPG file) or (None, None)"""
+    epg = None
+    epg_stream = None
+    if is_epg_cache_parsed_with(epg_cache_metadata, parse_options):
+        logger.info("Reading pre-parsed EPG cache...")
+        try:
+            epg = load_epg_cache(epg_parsed_filename)
+        except Exception:
+            logger.warning("Failed to read pre-parsed EPG cache")
+            logger.warning(traceback.format_exc())
+    if epg is None and os.path.isfile(epg_cache_filename):
+        logger.info("Reading cached EPG...")
+        epg_stream = open(epg_cache_filename, "rb")
+    return epg, epg_stream
+
+
+def parse_epg(epg_url, settings, return_dict, i, parse_options, revalidate=False):
     epg_failed = False
     epg_outdated = False
     epg_cache_filename_hash = hashlib.sha512(epg_url.encode("utf-8")).hexdigest()
     epg_cache_filename = Path(CACHE_DIR, "epg", epg_cache_filename_hash + ".dat")
+    epg_cache_part_filename = Path(
+        CACHE_DIR, "epg", epg_cache_filename_hash + ".dat.part"
+    )
+    epg_parsed_filename = Path(CACHE_DIR, "epg", epg_cache_filename_hash + ".epgc")
+    epg_validators_filename = Path(
+        CACHE_DIR, "epg", epg_cache_filename_hash + ".validators"
+    )
+    # Pre-parsed cache metadata replaced the date file
     epg_date_filename = Path(CACHE_DIR, "epg", epg_cache_filename_hash + ".txt")
+    if os.path.isfile(epg_date_filename):
+        os.remove(epg_date_filename)
     cache_used = False
-    if (
-        os.path.isfile(epg_cache_filename)
-        and os.path.isfile(epg_date_filename)
-        and not settings["nocacheepg"]
-    ):
-        with open(epg_date_filename, "r") as epg_date_file:
-            epg_date = int(float(epg_date_file.read().strip()))
-            time_diff = int(time.time() - epg_date)
-            logger.debug(f"EPG last updated {time_diff} seconds ago")
-            if time_diff < 86400:  # 1 day
-                with open(epg_cache_filename, "rb") as epg_cache_file:
-                    logger.info("Reading cached EPG...")
-                    epg_data = epg_cache_file.read()
-                    cache_used = True
+    epg = None
+    epg_stream = None
+    epg_cache_file = None
+    epg_cache_date = int(time.time())
+    epg_cache_metadata = None
+    epg_validators = {}
+    epg_response_headers = None
+    conditional_headers = {}
+    if not settings["nocacheepg"]:
+        epg_cache_metadata = read_epg_cache_metadata(epg_parsed_filename)
+        epg_validators = read_validators(epg_validators_filename)
+    if epg_cache_metadata:
+        # Successful revalidation renews the cache as well as download
+        time_diff = int(
+            time.time()
+            - max(epg_cache_metadata["created"], epg_validators.get("validated", 0))
+        )
+        logger.debug(f"EPG last updated {time_diff} seconds ago")
+        if time_diff < 86400 and not revalidate:  # 1 day
+            epg, epg_stream = open_epg_cache(
+                epg_parsed_filename,
+                epg_cache_filename,
+                epg_cache_metadata,
+                parse_options,
+            )
+            if epg is not None or epg_stream is not None:
+                epg_cache_date = epg_cache_metadata["created"]
+                cache_used = True
+        elif not os.path.isfile(epg_url.strip()) and (
+            is_epg_cache_parsed_with(epg_cache_metadata, parse_options)
+            or os.path.isfile(epg_cache_filename)
+        ):
+            # Not modified response is useful only if cache can be used
+            conditional_headers = get_conditional_headers(epg_validators)
+        if not cache_used:
+            if conditional_headers:
+                logger.info("Revalidating EPG cache...")
             else:
                 logger.info("Cache is older than 1 day, removing")
     if not cache_used:
@@ -116,115 +355,271 @@ def parse_epg(epg_url, settings, return_dict, i, epgs):
             originURL = referer[:-1]
         if originURL:
             headers["Origin"] = originURL
-        epg_data = load_epg(epg_url, headers)
+        headers.update(conditional_headers)
+        if not settings["nocacheepg"] and not os.path.isfile(epg_url.strip()):
+            # Cache is written while the data is being downloaded and parsed
+            epg_cache_file = open(epg_cache_part_filename, "wb")
 
-    return_dict["epg_progress"] = _("Updating TV guide... (parsing {}/{})").format(
-        i, len(epgs)
-    )
-
-    obj = io.BytesIO(epg_data)
-    if zipfile.is_zipfile(obj):
-        logger.info("ZIP file detected")
-        found_zip_format = False
-        with zipfile.ZipFile(obj) as myzip:
-            namelist = myzip.namelist()
-            for name in namelist:
-                if name.endswith(".xml"):
-                    logger.info("XMLTV inside ZIP detected, trying to parse...")
-                    found_zip_format = True
-                    with myzip.open(name) as myfile:
-                        try:
-                            epg = parse_as_xmltv(myfile, settings)
-                        except Exception:
-                            logger.info("Failed to parse as XMLTV!")
-                            epg = {"epg": None}
-                    break
-                if name.endswith(".ndx"):
-                    logger.info("JTV format detected, trying to parse...")
-                    found_zip_format = True
-                    epg = parse_epg_zip_jtv(myzip)
-                    break
-        if not found_zip_format:
-            logger.warning("No known EPG formats found in ZIP file!")
-            epg = {"epg": None}
-    else:
+    if epg is None:
         try:
-            logger.info("Trying XMLTV gzip...")
-            data = gzip.GzipFile(fileobj=io.BytesIO(epg_data))
-            epg = parse_as_xmltv(data, settings)
+            if not cache_used:
+                epg_stream = load_epg(epg_url, headers, epg_cache_file)
+                if isinstance(epg_stream, EPGResponseStream):
+                    epg_response_headers = epg_stream.response.headers
+                    if conditional_headers and epg_stream.response.status_code == 304:
+                        logger.info("EPG not modified, using cache")
+                        epg_stream.close()
+                        epg_cache_file.close()
+                        epg_cache_file = None
+                        os.remove(epg_cache_part_filename)
+                        epg, epg_stream = open_epg_cache(
+                            epg_parsed_filename,
+                            epg_cache_filename,
+                            epg_cache_metadata,
+                            parse_options,
+                        )
+                        if epg is not None or epg_stream is not None:
+                            save_validators(
+                                epg_validators_filename,
+                                epg_response_headers,
+                                epg_validators,
+                            )
+                            epg_cache_date = epg_cache_metadata["created"]
+                            cache_used = True
+                        else:
+                            # Cache could not be read, download EPG again
+                            logger.warning("EPG cache is not usable, loading again")
+                            if os.path.isfile(epg_validators_filename):
+                                os.remove(epg_validators_filename)
+                            for header in conditional_headers:
+                                headers.pop(header)
+                            epg_cache_file = open(epg_cache_part_filename, "wb")
+                            epg_stream = load_epg(epg_url, headers, epg_cache_file)
+                            epg_response_headers = epg_stream.response.headers
+
+            if epg is None:
+                return_dict[f"epg_progress_{i}"] = "parsing"
+
+                epg = parse_epg_stream(epg_stream, settings, parse_options)
+                if isinstance(epg_stream, EPGResponseStream):
+                    epg_stream.drain()
+                    logger.info(f"EPG loaded, {epg_stream.bytes_read} bytes")
+                parsed_now = True
+            else:
+                parsed_now = False
         except Exception:
-            logger.info("Trying XMLTV lzma...")
-            try:
-                data = lzma.LZMAFile(filename=io.BytesIO(epg_data))
-                epg = parse_as_xmltv(data, settings)
-            except Exception:
-                logger.info("Trying XMLTV raw...")
-                try:
-                    epg = parse_as_xmltv(io.BytesIO(epg_data), settings)
-                except Exception:
-                    logger.info("Unknown EPG format!")
-                    epg = {"epg": None}
-    if not epg["epg"]:
+            if os.path.isfile(epg_cache_part_filename):
+                os.remove(epg_cache_part_filename)
+            raise
+        finally:
+            if epg_stream is not None:
+                epg_stream.close()
+            if epg_cache_file is not None:
+                epg_cache_file.close()
+    else:
+        parsed_now = False
+
+    # With scope, source may have no channels of current playlist
+    scoped_out = parse_options["scope"] is not None and bool(epg.get("ids"))
+    epg_handoff = None
+    if not epg["epg"] and not scoped_out:
         epg_failed = True
     else:
-        if is_program_actual(epg["epg"], future=cache_used):
-            if epg_url in epg_array:
-                epg_array.pop(epg_url)
-            epg_array[epg_url] = epg
-            epg = None
+        if parsed_now:
+            epg["coverage"] = get_epg_coverage(epg["epg"])
+        if not epg["epg"] or is_epg_actual(
+            epg["coverage"],
+            future=cache_used,
+            offset=get_epg_offsets(settings, [epg_url])[epg_url],
+        ):
+            epg_cache_metadata = {
+                "created": epg_cache_date,
+                "parse_options": get_parse_options_key(parse_options),
+            }
+            if not parsed_now:
+                epg_handoff = (str(epg_parsed_filename), False)
+            elif not settings["nocacheepg"]:
+                logger.info("Saving EPG cache...")
+                if epg_cache_file is not None:
+                    os.replace(epg_cache_part_filename, epg_cache_filename)
+                    save_validators(epg_validators_filename, epg_response_headers)
+                save_epg_cache(epg_parsed_filename, epg, epg_cache_metadata)
+                epg_handoff = (str(epg_parsed_filename), False)
+            else:
+                epg_handoff_fd, epg_handoff_filename = tempfile.mkstemp(
+                    prefix=EPG_HANDOFF_PREFIX,
+                    suffix=".epgc",
+                    dir=Path(CACHE_DIR, "epg"),
+                )
+                os.close(epg_handoff_fd)
+                save_epg_cache(epg_handoff_filename, epg, epg_cache_metadata)
+                epg_handoff = (epg_handoff_filename, True)
         else:
-            logger.warning("Programme not actual")
+            logger.warning(f"Programme not actual ({get_epg_source_name(epg_url)})")
             epg_outdated = True
-    if epg_data and not epg_failed and not epg_outdated:
-        if not cache_used and not settings["nocacheepg"]:
-            logger.info("Saving EPG cache...")
-            with open(epg_cache_filename, "wb") as epg_cache_file:
-                epg_cache_file.write(epg_data)
-            with open(epg_date_filename, "w") as epg_date_file:
-                epg_date_file.write(f"{int(time.time())}\n")
-    else:
-        if os.path.isfile(epg_cache_filename):
-            os.remove(epg_cache_filename)
-        if os.path.isfile(epg_date_filename):
-            os.remove(epg_date_filename)
-    return epg_failed, epg_outdated, cache_used
+    if epg_failed or epg_outdated:
+        for epg_remove_filename in (
+            epg_cache_filename,
+            epg_cache_part_filename,
+            epg_parsed_filename,
+            epg_validators_filename,
+        ):
+            if os.path.isfile(epg_remove_filename):
+                os.remove(epg_remove_filename)
+    return epg_failed, epg_outdated, cache_used, epg_handoff
+
+
+def get_epg_urls(epg_settings_url):
+    # Some playlists use comma as EPG urls separator, some - semicolon
+    epgs = [
+        epg_url.strip() for epg_url in epg_settings_url.replace(";", ",").split(",")
+    ]
+    # Sources are loaded concurrently, so load duplicates once.
+    # Last occurrence wins, as it did when sources were loaded one by one.
+    return list(reversed(dict.fromkeys(reversed(epgs))))
 
 
-def epg_worker(epg_settings_url, settings, return_dict):
+def epg_source_worker(
+    epg_url, settings, return_dict, i, parse_options, revalidate=False
+):
+    """Load and parse one EPG source, runs in EPG pool process
+
+    Parsed EPG is not sent back through the pipe, it is written to
+    pre-parsed cache format and (file name, is temporary) is returned,
+    see attach_epg."""
     epg_failed = False
     epg_outdated = False
+    epg_handoff = None
+    try:
+        return_dict[f"epg_progress_{i}"] = "loading"
+        epg_failed, epg_outdated, cache_used, epg_handoff = parse_epg(
+            epg_url, settings, return_dict, i, parse_options, revalidate
+        )
+        if cache_used and (epg_failed or epg_outdated):
+            logger.info("Trying without cache...")
+            return_dict[f"epg_progress_{i}"] = "loading"
+            epg_failed, epg_outdated, cache_used, epg_handoff = parse_epg(
+                epg_url, settings, return_dict, i, parse_options
+            )
+    except Exception:
+        epg_failed = True
+        logger.warning(traceback.format_exc())
+    return_dict[f"epg_progress_{i}"] = "done"
+    return epg_failed, epg_outdated, epg_handoff
+
+
+def attach_epg(epg_filename, temporary):
+    """Map EPG written by EPG pool process read-only
+
+    Temporary file (EPG cache disabled) is removed right away,
+    the mapping stays valid."""
+    try:
+        epg = load_epg_cache(epg_filename)
+    finally:
+        if temporary and os.path.isfile(epg_filename):
+            os.remove(epg_filename)
+    if epg is None:
+        raise Exception("Failed to attach EPG")
+    return epg
+
+
+def discard_epg_handoff(epg_handoff):
+    """Remove EPG written by EPG pool process which is not attached"""
+    if epg_handoff is not None and epg_handoff[1] and os.path.isfile(epg_handoff[0]):
+        os.remove(epg_handoff[0])
+
+
+def remove_stale_epg_files():
+    """Remove files left by EPG pool processes which were killed
+
+    Has to be called when no EPG source is being loaded."""
+    epg_cache_dir = Path(CACHE_DIR, "epg")
+    if not os.path.isdir(epg_cache_dir):
+        return
+    for filename in os.listdir(epg_cache_dir):
+        if filename.endswith(".part") or (
+            filename.startswith(EPG_HANDOFF_PREFIX) and filename.endswith(".epgc")
+        ):
+            try:
+                os.remove(Path(epg_cache_dir, filename))
+            except Exception:
+                logger.warning(f"Failed to remove {filename}")
+
+
+def get_epg_progress(return_dict, count):
+    progress = []
+    for i in range(1, count + 1):
+        status = return_dict.get(f"epg_progress_{i}")
+        if status == "loading":
+            progress.append(_("Updating TV guide... (loading {}/{})").format(i, count))
+        elif status == "parsing":
+            progress.append(_("Updating TV guide... (parsing {}/{})").format(i, count))
+    return "    ".join(progress)
+
+
+def epg_worker(
+    epgs,
+    settings,
+    return_dict,
+    epg_pool,
+    parse_options,
+    revalidate=False,
+    cancelled=None,
+):
+    """Load all EPG sources concurrently
+
+    Every source is downloaded and parsed in its own EPG pool process,
+    results are merged in the original (priority) order.
+    Stops waiting as soon as cancelled (threading.Event) is set.
+    Returns (failed, outdated source URLs, EPG array).
+    parse_options:
+        retention - (past seconds, future seconds) of programmes to keep
+        scope - EPG ids and names of playlist channels (get_epg_scope),
+                programmes of other channels are skipped; None to keep all"""
+    epg_failed = False
+    epg_outdated = []
+    epg_array = {}
     try:
-        # Some playlists use comma as EPG urls separator, some - semicolon
-        epgs = [
-            epg_url.strip() for epg_url in epg_settings_url.replace(";", ",").split(",")
-        ]
         if epgs:
             t = time.time()
             logger.info("Updating EPG...")
-            i = 0
-            for epg_url in epgs:
-                try:
-                    i += 1
-
-                    return_dict["epg_progress"] = _(
-                        "Updating TV guide... (loading {}/{})"
-                    ).format(i, len(epgs))
-
-                    epg_failed_, epg_outdated_, cache_used = parse_epg(
-                        epg_url, settings, return_dict, i, epgs
+            results = []
+            for i, epg_url in enumerate(epgs, 1):
+                return_dict[f"epg_progress_{i}"] = "queued"
+                results.append(
+                    epg_pool.apply_async(
+                        epg_source_worker,
+                        (epg_url, settings, return_dict, i, parse_options, revalidate),
                     )
-                    if cache_used and (epg_failed_ or epg_outdated_):
-                        logger.info("Trying without cache...")
-                        epg_failed_, epg_outdated_, cache_used = parse_epg(
-                            epg_url, settings, return_dict, i, epgs
-                        )
+                )
+            while not all(result.ready() for result in results):
+                if cancelled is not None and cancelled.is_set():
+                    logger.info("Updating EPG cancelled")
+                    for result in results:
+                        if result.ready():
+                            try:
+                                discard_epg_handoff(result.get()[2])
+                            except Exception:
+                                logger.warning(traceback.format_exc())
+                    for i in range(1, len(epgs) + 1):
+                        return_dict.pop(f"epg_progress_{i}", None)
+                    return_dict["epg_progress"] = ""
+                    return epg_failed, epg_outdated, epg_array
+                return_dict["epg_progress"] = get_epg_progress(return_dict, len(epgs))
+                next(result for result in results if not result.ready()).wait(0.5)
+            for i, (epg_url, result) in enumerate(zip(epgs, results), 1):
+                try:
+                    epg_failed_, epg_outdated_, epg_handoff = result.get()
+                    if epg_handoff is not None:
+                        epg_array[epg_url] = attach_epg(*epg_handoff)
                     if epg_failed_:
                         epg_failed = epg_failed_
                     if epg_outdated_:
-                        epg_outdated = epg_outdated_
+                        epg_outdated.append(epg_url)
                 except Exception:
                     epg_failed = True
                     logger.warning(traceback.format_exc())
+                return_dict.pop(f"epg_progress_{i}", None)
             logger.info(f"Updating EPG done, took {round(time.time() - t, 2)} seconds")
     except Exception:
         epg_failed = True
@@ -232,92 +627,60 @@ def epg_worker(epg_settings_url, settings, return_dict):
     return epg_failed, epg_outdated, epg_array
 
 
-def worker_get_epg_id(tvg_id, tvg_name, channel_name, epg_name, epg_array):
-    epg_name = epg_name.lower().strip()
-    channel_name = channel_name.lower().strip()
-    tvg_name = tvg_name.lower().strip()
-    found_id = ""
-    for data in epg_array:
-        # First, match from EPG name
-        if epg_name and epg_name in epg_array[data]["names"]:
-            found_id = epg_array[data]["names"][epg_name]
-            break
-        elif epg_name and epg_name.replace(" ", "_") in epg_array[data]["names"]:
-            found_id = epg_array[data]["names"][epg_name.replace(" ", "_")]
-            break
-        # Second, match from tvg-id
-        elif tvg_id and tvg_id in epg_array[data]["ids"]:
-            found_id = tvg_id
-            break
-        # Third, match from tvg-name
-        elif tvg_name and tvg_name in epg_array[data]["names"]:
-            found_id = epg_array[data]["names"][tvg_name]
-            break
-        elif tvg_name and tvg_name.replace(" ", "_") in epg_array[data]["names"]:
-            found_id = epg_array[data]["names"][tvg_name.replace(" ", "_")]
-            break
-        # Last, match from channel name
-        elif channel_name and channel_name in epg_array[data]["names"]:
-            found_id = epg_array[data]["names"][channel_name]
-            break
-        elif (
-            channel_name and channel_name.replace(" ", "_") in epg_array[data]["names"]
-        ):
-            found_id = epg_array[data]["names"][channel_name.replace(" ", "_")]
-            break
-    if not found_id:
-        found_id = ""
-    return found_id
+def worker_resolve_epg_id(tvg_id, tvg_name, channel_name, epg_name, epg_index):
+    """Find EPG id for channel, returns (EPG source, EPG id)"""
+    candidates = get_epg_id_candidates(tvg_id, tvg_name, channel_name, epg_name)
+    for data in epg_index.sources:
+        for kind, candidate in candidates:
+            if kind == "id":
+                if candidate in epg_index.sources[data]["ids"]:
+                    return data, candidate
+            elif candidate in epg_index.sources[data]["names"]:
+                found_id = epg_index.sources[data]["names"][candidate]
+                if found_id:
+                    return data, found_id
+                return None, ""
+    return None, ""
 
 
-def worker_get_epg_programmes(epg_id, epg_array):
-    ret = None
-    for data in epg_array:
-        if epg_id and epg_id in epg_array[data]["epg"]:
-            ret = epg_array[data]["epg"][epg_id]
-            break
-    if ret:
-        # Sort EPG entries by start time
-        ret.sort(key=lambda programme: programme["start"])
-    return ret
+def worker_get_epg_timeline(epg_id, epg_index):
+    return epg_index.get_timeline(epg_id)
 
 
-def worker_get_current_programme(epg_id, epg_array):
+def worker_get_current_programme(epg_id, epg_index):
     ret = None
-    if epg_id:
-        programmes = worker_get_epg_programmes(epg_id, epg_array)
-        if programmes:
-            for prog in programmes:
-                if time.time() > prog["start"] and time.time() < prog["stop"]:
-                    ret = prog
-                    break
+    timeline = epg_index.get_timeline(epg_id)
+    if timeline:
+        ret = timeline.current()
     return ret
 
 
-def worker_get_epg_icon(epg_id, epg_array):
+def worker_get_epg_icon(epg_id, epg_index):
     ret = ""
-    for data in epg_array:
-        if epg_id and epg_id in epg_array[data]["icons"]:
-            ret = epg_array[data]["icons"][epg_id]
-            break
+    if epg_id and epg_id in epg_index.icons:
+        ret = epg_index.icons[epg_id]
     if not ret:
         ret = ""
     return ret
 
 
-def worker_check_programmes_actual(epg_array):
-    program_actual = True
-    for data in epg_array:
-        if not is_program_actual(epg_array[data]["epg"]):
-            program_actual = False
-            break
-    return program_actual
+def worker_get_outdated_epg_sources(epg_index):
+    return [
+        epg_url
+        for epg_url, epg in epg_index.sources.items()
+        if epg["epg"]
+        and not is_epg_actual(epg["coverage"], offset=epg_index.offsets.get(epg_url, 0))
+    ]
+
+
+def worker_check_programmes_actual(epg_index):
+    return not worker_get_outdated_epg_sources(epg_index)
 
 
-def worker_get_all_epg_names(epg_array):
+def worker_get_all_epg_names(epg_index):
     names = set()
-    for data in epg_array:
-        d = epg_array[data]
+    for data in epg_index.sources:
+        d = epg_index.sources[data]
         if "_names" in d:
             names_epg = d["_names"]
         else:
@@ -328,11 +691,11 @@ def worker_get_all_epg_names(epg_array):
     return names
 
 
-def epg_is_in_date(programme, date_selected):
+def epg_day_range(date_selected):
     day_start_ts = int(date_selected.timestamp())
     day_end_ts = int(
         datetime.datetime(
             date_selected.year, date_selected.month, date_selected.day, 23, 59, 59
         ).timestamp()
     )
-    return programme["start"] < day_end_ts and programme["stop"] > day_start_ts
+    return day_start_ts, day_end_ts
@@ -0,0 +1,332 @@
+#
+# Copyright (c) 2023-2025 liya <liyaliya@tutamail.com>
+#
+# This file is part of yuki-iptv.
+#
+# yuki-iptv is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# yuki-iptv is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with yuki-iptv. If not, see <https://www.gnu.org/licenses/>.
+#
+# The Font Awesome pictograms are licensed under the CC BY 4.0 License.
+# Font Awesome Free 5.15.4 by @fontawesome - https://fontawesome.com
+# https://creativecommons.org/licenses/by/4.0/
+#
+# Pre-parsed EPG cache
+#
+# File layout:
+#   header (magic, version, byte order, metadata length)
+#   metadata (JSON, contains creation time and section offsets)
+#   sections (8-byte aligned, offsets are relative to the first section)
+#
+# Programmes are stored as columns: start/stop as float64 arrays,
+# title/desc/category/catchup-id as uint32 indexes into the string table.
+# Channel N programmes are programme_offsets[N]:programme_offsets[N + 1].
+# Coverage summary (see get_epg_coverage) is kept in metadata,
+# last stop of channel N is last_stop[N].
+#
+# The same format is used to hand parsed EPG from EPG pool processes
+# to the GUI process, which maps it read-only instead of unpickling.
+#
+import os
+import sys
+import json
+import mmap
+import time
+import struct
+import logging
+from array import array
+from collections.abc import Mapping
+from yuki_iptv.epg_programme import Programme
+
+logger = logging.getLogger(__name__)
+
+EPG_CACHE_MAGIC = b"YUKIEPGC"
+EPG_CACHE_VERSION = 3
+EPG_CACHE_HEADER = struct.Struct("<8sHBxI")
+EPG_CACHE_BYTEORDER = 1 if sys.byteorder == "little" else 2
+
+PROGRAMME_STRING_FIELDS = ("title", "desc", "category", "catchup-id")
+
+
+def _align(offset):
+    return (offset + 7) & ~7
+
+
+class StringTable:
+    def __init__(self):
+        self.strings = {}
+        self.offsets = array("Q", [0])
+        self.data = bytearray()
+
+    def add(self, string):
+        if not string:
+            string = ""
+        if string not in self.strings:
+            self.strings[string] = len(self.strings)
+            self.data += string.encode("utf-8", "surrogatepass")
+            self.offsets.append(len(self.data))
+        return self.strings[string]
+
+
+def get_epg_coverage(programmes):
+    """Coverage summary of EPG id -> programmes
+
+    min_start/max_stop are None if there are no programmes."""
+    coverage = {"min_start": None, "max_stop": None, "programmes": 0}
+    last_stop = {}
+    for channel_id, channel_programmes in programmes.items():
+        if channel_programmes:
+            channel_start = min(programme.start for programme in channel_programmes)
+            channel_stop = max(programme.stop for programme in channel_programmes)
+            last_stop[channel_id] = channel_stop
+            if coverage["min_start"] is None or channel_start < coverage["min_start"]:
+                coverage["min_start"] = channel_start
+            if coverage["max_stop"] is None or channel_stop > coverage["max_stop"]:
+                coverage["max_stop"] = channel_stop
+            coverage["programmes"] += len(channel_programmes)
+    coverage["last_stop"] = last_stop
+    return coverage
+
+
+def save_epg_cache(filename, epg, metadata):
+    if "coverage" not in epg:
+        epg["coverage"] = get_epg_coverage(epg["epg"])
+    strings = StringTable()
+    strings.add("")
+
+    channel_ids = array("I")
+    programme_offsets = array("Q", [0])
+    starts = array("d")
+    stops = array("d")
+    columns = {field: array("I") for field in PROGRAMME_STRING_FIELDS}
+    last_stops = array("d")
+    for channel_id, programmes in epg["epg"].items():
+        channel_ids.append(strings.add(channel_id))
+        last_stops.append(epg["coverage"]["last_stop"].get(channel_id, 0))
+        for programme in programmes:
+            starts.append(programme["start"])
+            stops.append(programme["stop"])
+            for field in PROGRAMME_STRING_FIELDS:
+                columns[field].append(strings.add(programme.get(field, "")))
+        programme_offsets.append(len(starts))
+
+    maps = {
+        "ids": {
+            channel_id: (
+                display_names
+                if isinstance(display_names, str)
+                else sorted(display_names)
+            )
+            for channel_id, display_names in epg["ids"].items()
+        },
+        "names": epg["names"],
+        "_names": sorted(epg["_names"]) if "_names" in epg else None,
+        "icons": epg["icons"],
+    }
+
+    sections = [
+        ("string_offsets", strings.offsets),
+        ("string_data", strings.data),
+        ("channel_ids", channel_ids),
+        ("programme_offsets", programme_offsets),
+        ("start", starts),
+        ("stop", stops),
+    ]
+    for field in PROGRAMME_STRING_FIELDS:
+        sections.append((field, columns[field]))
+    sections.append(("last_stop", last_stops))
+    sections.append(("maps", json.dumps(maps, separators=(",", ":")).encode("utf-8")))
+
+    metadata = dict(metadata)
+    metadata["coverage"] = {
+        key: value for key, value in epg["coverage"].items() if key != "last_stop"
+    }
+    metadata["channels"] = len(channel_ids)
+    metadata["programmes"] = len(starts)
+    metadata["sections"] = {}
+    section_offset = 0
+    for section_name, section_data in sections:
+        section_length = len(memoryview(section_data).cast("B"))
+        metadata["sections"][section_name] = [section_offset, section_length]
+        section_offset = _align(section_offset + section_length)
+
+    metadata_bytes = json.dumps(metadata).encode("utf-8")
+    header = EPG_CACHE_HEADER.pack(
+        EPG_CACHE_MAGIC, EPG_CACHE_VERSION, EPG_CACHE_BYTEORDER, len(metadata_bytes)
+    )
+    sections_start = _align(len(header) + len(metadata_bytes))
+
+    part_filename = f"{filename}.part"
+    with open(part_filename, "wb") as cache_file:
+        cache_file.write(header)
+        cache_file.write(metadata_bytes)
+        cache_file.write(b"\x00" * (sections_start - cache_file.tell()))
+        for section_name, section_data in sections:
+            section_start = sections_start + metadata["sections"][section_name][0]
+            cache_file.write(b"\x00" * (section_start - cache_file.tell()))
+            cache_file.write(section_data)
+    os.replace(part_filename, filename)
+
+
+def get_epg_cache_section(cache_view, metadata, section_name, typecode=None):
+    """Section as memoryview, data is not copied"""
+    offset, length = metadata["sections"][section_name]
+    offset += metadata["sections_start"]
+    section = cache_view[offset : offset + length]
+    if typecode:
+        return section.cast(typecode)
+    return section
+
+
+def read_epg_cache_header(cache_file):
+    header = cache_file.read(EPG_CACHE_HEADER.size)
+    if len(header) != EPG_CACHE_HEADER.size:
+        return None
+    magic, version, byteorder, metadata_length = EPG_CACHE_HEADER.unpack(header)
+    if magic != EPG_CACHE_MAGIC:
+        return None
+    metadata = json.loads(cache_file.read(metadata_length).decode("utf-8"))
+    metadata["version"] = version
+    metadata["byteorder"] = byteorder
+    metadata["sections_start"] = _align(EPG_CACHE_HEADER.size + metadata_length)
+    return metadata
+
+
+def read_epg_cache_metadata(filename):
+    """Read only the header of pre-parsed EPG cache, None if not readable"""
+    try:
+        with open(filename, "rb") as cache_file:
+            return read_epg_cache_header(cache_file)
+    except Exception:
+        return None
+
+
+def is_epg_cache_compatible(metadata):
+    return (
+        metadata is not None
+        and metadata["version"] == EPG_CACHE_VERSION
+        and metadata["byteorder"] == EPG_CACHE_BYTEORDER
+    )
+
+
+class MappedProgrammes(Mapping):
+    """EPG id -> programmes, backed by read-only mapped cache file
+
+    Columns are used in place, programmes of a channel are decoded
+    on first access. Strings are decoded once and shared."""
+
+    def __init__(self, cache_mmap, metadata):
+        cache_view = memoryview(cache_mmap)
+        self.string_offsets = get_epg_cache_section(
+            cache_view, metadata, "string_offsets", "Q"
+        )
+        self.string_data = get_epg_cache_section(cache_view, metadata, "string_data")
+        self.programme_offsets = get_epg_cache_section(
+            cache_view, metadata, "programme_offsets", "Q"
+        )
+        self.starts = get_epg_cache_section(cache_view, metadata, "start", "d")
+        self.stops = get_epg_cache_section(cache_view, metadata, "stop", "d")
+        self.columns = [
+            get_epg_cache_section(cache_view, metadata, field, "I")
+            for field in PROGRAMME_STRING_FIELDS
+        ]
+        self.last_stops = get_epg_cache_section(cache_view, metadata, "last_stop", "d")
+        self.maps = get_epg_cache_section(cache_view, metadata, "maps")
+        self._strings = {}
+        self._programmes = {}
+        self._channels = {
+            self.string(channel_id): channel_num
+            for channel_num, channel_id in enumerate(
+                get_epg_cache_section(cache_view, metadata, "channel_ids", "I")
+            )
+        }
+
+    def string(self, string_id):
+        string = self._strings.get(string_id)
+        if string is None:
+            string = str(
+                self.string_data[
+                    self.string_offsets[string_id] : self.string_offsets[string_id + 1]
+                ],
+                "utf-8",
+                "surrogatepass",
+            )
+            self._strings[string_id] = string
+        return string
+
+    def __getitem__(self, channel_id):
+        programmes = self._programmes.get(channel_id)
+        if programmes is None:
+            channel_num = self._channels[channel_id]
+            string = self.string
+            titles, descs, categories, catchup_ids = self.columns
+            programmes = [
+                Programme(
+                    self.starts[i],
+                    self.stops[i],
+                    string(titles[i]),
+                    string(descs[i]),
+                    string(categories[i]),
+                    string(catchup_ids[i]),
+                )
+                for i in range(
+                    self.programme_offsets[channel_num],
+                    self.programme_offsets[channel_num + 1],
+                )
+            ]
+            self._programmes[channel_id] = programmes
+        return programmes
+
+    def __iter__(self):
+        return iter(self._channels)
+
+    def __len__(self):
+        return len(self._channels)
+
+
+def load_epg_cache(filename):
+    """Map pre-parsed EPG cache read-only, returns None if cache is not usable
+
+    Mapping stays valid after the file is replaced or removed."""
+    t = time.time()
+    with open(filename, "rb") as cache_file:
+        metadata = read_epg_cache_header(cache_file)
+        if not is_epg_cache_compatible(metadata):
+            logger.info("Pre-parsed EPG cache has unsupported format")
+            return None
+        cache_mmap = mmap.mmap(cache_file.fileno(), 0, access=mmap.ACCESS_READ)
+    programmes = MappedProgrammes(cache_mmap, metadata)
+    maps = json.loads(str(programmes.maps, "utf-8"))
+
+    ret = {
+        "display_names": [],
+        "ids": {
+            channel_id: (
+                display_names if isinstance(display_names, str) else set(display_names)
+            )
+            for channel_id, display_names in maps["ids"].items()
+        },
+        "names": maps["names"],
+        "icons": maps["icons"],
+        "epg": programmes,
+        "created": metadata.get("created"),
+        "coverage": dict(
+            metadata["coverage"], last_stop=dict(zip(programmes, programmes.last_stops))
+        ),
+    }
+    if maps["_names"] is not None:
+        ret["_names"] = set(maps["_names"])
+    logger.info(
+        f"Pre-parsed EPG cache mapped ({metadata['programmes']} programmes), "
+        f"took {round(time.time() - t, 2)} seconds"
+    )
+    return ret
@@ -0,0 +1,234 @@
+#
+# Copyright (c) 2023-2025 liya <liyaliya@tutamail.com>
+#
+# This file is part of yuki-iptv.
+#
+# yuki-iptv is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# yuki-iptv is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with yuki-iptv. If not, see <https://www.gnu.org/licenses/>.
+#
+# The Font Awesome pictograms are licensed under the CC BY 4.0 License.
+# Font Awesome Free 5.15.4 by @fontawesome - https://fontawesome.com
+# https://creativecommons.org/licenses/by/4.0/
+#
+import math
+import time
+import logging
+from array import array
+from operator import attrgetter
+from bisect import bisect_left, bisect_right
+
+logger = logging.getLogger(__name__)
+
+
+class EPGTimeline:
+    """Programmes of one channel, sorted by start time
+
+    starts/stops are parallel to programmes, so all lookups are bisect
+    over starts. Programmes are expected not to overlap."""
+
+    __slots__ = ("programmes", "starts", "stops")
+
+    def __init__(self, programmes):
+        programmes.sort(key=attrgetter("start"))
+        self.programmes = programmes
+        self.starts = array("d", [programme.start for programme in programmes])
+        self.stops = array("d", [programme.stop for programme in programmes])
+
+    def __len__(self):
+        return len(self.programmes)
+
+    def at(self, ts):
+        """Index of programme running at ts, -1 if there is none"""
+        i = bisect_left(self.starts, ts) - 1
+        if i >= 0 and ts < self.stops[i]:
+            return i
+        return -1
+
+    def current(self, ts=None):
+        i = self.at(time.time() if ts is None else ts)
+        if i == -1:
+            return None
+        return self.programmes[i]
+
+    def next(self, ts=None):
+        i = bisect_right(self.starts, time.time() if ts is None else ts)
+        if i < len(self.programmes):
+            return self.programmes[i]
+        return None
+
+    def find(self, start):
+        """Index of programme which starts at start, -1 if there is none"""
+        i = bisect_left(self.starts, start)
+        if i < len(self.starts) and self.starts[i] == start:
+            return i
+        return -1
+
+    def prune(self, min_stop):
+        """Drop programmes which ended before min_stop, returns their count"""
+        count = bisect_right(self.stops, min_stop)
+        if count:
+            del self.programmes[:count]
+            del self.starts[:count]
+            del self.stops[:count]
+        return count
+
+    def range(self, t0, t1):
+        """Indexes of programmes which intersect (t0, t1)"""
+        lo = bisect_left(self.starts, t0)
+        if lo > 0 and self.stops[lo - 1] > t0:
+            lo -= 1
+        hi = bisect_left(self.starts, t1)
+        return range(lo, max(lo, hi))
+
+
+class EPGIndex:
+    """Timelines for every EPG id of all loaded sources
+
+    Built once after EPG load. If EPG id is present in several sources,
+    first source wins (sources are kept in priority order).
+    Timelines are built on first access, so mapped sources
+    (see MappedProgrammes) are decoded only for channels in use.
+    Sources store UTC times, offsets (EPG URL -> seconds) are applied
+    when timelines are built."""
+
+    def __init__(self, epg_array, offsets=None):
+        t = time.time()
+        self.sources = epg_array
+        self.offsets = offsets if offsets else {}
+        self.timelines = {}
+        # EPG id -> (EPG URL, programmes mapping of the source)
+        self.channels = {}
+        self.icons = {}
+        self.min_stop = None
+        # Channel title -> (EPG source, EPG id), filled by the GUI
+        self.epg_ids = {}
+        for epg_url, source in epg_array.items():
+            for epg_id in source["epg"]:
+                if epg_id and epg_id not in self.channels:
+                    self.channels[epg_id] = (epg_url, source["epg"])
+            for epg_id, icon in source["icons"].items():
+                if epg_id not in self.icons:
+                    self.icons[epg_id] = icon
+        logger.info(
+            f"EPG index built for {len(self.channels)} channels, "
+            f"took {round(time.time() - t, 2)} seconds"
+        )
+
+    def prune(self, min_stop):
+        """Drop expired programmes in place, lists are shared with sources
+
+        Timelines which are not built yet are pruned when they are built."""
+        t = time.time()
+        count = 0
+        self.min_stop = min_stop
+        for timeline in self.timelines.values():
+            count += timeline.prune(min_stop)
+        logger.info(
+            f"EPG pruned, {count} expired programmes removed, "
+            f"took {round(time.time() - t, 2)} seconds"
+        )
+
+    def get_timeline(self, epg_id):
+        if not epg_id:
+            return None
+        timeline = self.timelines.get(epg_id)
+        if timeline is None and epg_id in self.channels:
+            epg_url, source_programmes = self.channels[epg_id]
+            programmes = source_programmes[epg_id]
+            if not programmes:
+                return None
+            offset = self.offsets.get(epg_url, 0)
+            if offset:
+                programmes = [programme.shifted(offset) for programme in programmes]
+            timeline = EPGTimeline(programmes)
+            if self.min_stop is not None:
+                timeline.prune(self.min_stop)
+            self.timelines[epg_id] = timeline
+        return timeline
+
+    def update_channels(self, epg_url, epg_ids):
+        """Programmes of channels were replaced in source after index was built
+
+        Sources which are added to on demand (XTream short EPG) replace
+        programmes mapping of the source, timelines are built again."""
+        if epg_url not in self.sources:
+            return
+        source_programmes = self.sources[epg_url]["epg"]
+        for epg_id in epg_ids:
+            if epg_id not in self.channels or self.channels[epg_id][0] == epg_url:
+                self.channels[epg_id] = (epg_url, source_programmes)
+                self.timelines.pop(epg_id, None)
+
+    def invalidate_epg_ids(self, titles):
+        """Forget resolved EPG ids of channels, e.g. after EPG name change"""
+        for title in titles:
+            self.epg_ids.pop(title, None)
+
+
+class NowNextTable:
+    """Current and next programme of channels (by EPG id)
+
+    Entry is computed once and stays valid until its boundary, that is
+    the stop of the current programme or the start of the next one."""
+
+    def __init__(self, epg_index):
+        self.epg_index = epg_index
+        # EPG id -> (current programme, next programme, boundary)
+        self.entries = {}
+
+    def get_entry(self, epg_id, ts):
+        timeline = self.epg_index.get_timeline(epg_id)
+        if not timeline:
+            return None, None, math.inf
+        i = timeline.at(ts)
+        if i != -1:
+            current = timeline.programmes[i]
+            boundary = timeline.stops[i]
+            next_i = i + 1
+        else:
+            current = None
+            next_i = bisect_left(timeline.starts, ts)
+            boundary = timeline.starts[next_i] if next_i < len(timeline) else math.inf
+        next_programme = timeline.programmes[next_i] if next_i < len(timeline) else None
+        return current, next_programme, boundary
+
+    def get(self, epg_id, ts=None):
+        """(current programme, next programme, boundary)"""
+        entry = self.entries.get(epg_id)
+        if entry is None:
+            entry = self.entries[epg_id] = self.get_entry(
+                epg_id, time.time() if ts is None else ts
+            )
+        return entry
+
+    def refresh(self, ts=None):
+        """Recompute entries which boundary has passed
+
+        Returns EPG ids which current programme has changed."""
+        if ts is None:
+            ts = time.time()
+        changed = set()
+        for epg_id, entry in list(self.entries.items()):
+            if entry[2] <= ts:
+                self.entries[epg_id] = self.get_entry(epg_id, ts)
+                if self.entries[epg_id][0] is not entry[0]:
+                    changed.add(epg_id)
+        return changed
+
+    def invalidate(self, epg_ids):
+        """Forget entries of channels which programmes have changed"""
+        for epg_id in epg_ids:
+            self.entries.pop(epg_id, None)
+
+    def next_boundary(self):
+        return min((entry[2] for entry in self.entries.values()), default=math.inf)
@@ -20,116 +20,174 @@
 # Font Awesome Free 5.15.4 by @fontawesome - https://fontawesome.com
 # https://creativecommons.org/licenses/by/4.0/
 #
+import os
 import struct
 import logging
 import datetime
-from yuki_iptv.settings import parse_settings
+from array import array
+from concurrent.futures import ThreadPoolExecutor
+from yuki_iptv.epg_programme import Programme, StringPool
 
 logger = logging.getLogger(__name__)
 
+JTV_HEADERS = (
+    b"JTV 3.x TV Program Data\x0a\x0a\x0a",
+    b"JTV 3.x TV Program Data\xa0\xa0\xa0",
+)
+JTV_NDX_ENTRY = struct.Struct("<HQH")
+# FILETIME is in 100 ns intervals since 1601-01-01
+FILETIME_EPOCH_US = 11644473600 * 1000000
+JTV_MAX_TITLE = 1000  # Workaround, do not allow broken entries
 
-def parse_jtv(ndx, pdt, settings):
-    jtv_headers = [
-        b"JTV 3.x TV Program Data\x0A\x0A\x0A",
-        b"JTV 3.x TV Program Data\xA0\xA0\xA0",
-    ]
-    if pdt[0:26] not in jtv_headers:
-        logger.debug("Invalid PDT file!")
-        return []
 
-    schedules = []
+class JTVTimeConverter:
+    """FILETIME (local time, as JTV stores it) to Unix timestamps
 
-    if len(ndx[0:2]) != 2:
-        logger.debug("Invalid NDX file!")
-        return []
+    Local time offset is looked up once per hour instead of building
+    a datetime for every entry. EPG offset is applied by EPGIndex."""
 
-    total_num = struct.unpack("<H", ndx[0:2])[0]
-    ndx = ndx[2:]
+    def __init__(self):
+        self.local_offsets = {}
 
-    for i in range(0, total_num):
-        try:
-            entry = ndx[i * 12 : 12 + (i * 12)]
+    def convert(self, filetimes):
+        starts = array("d")
+        local_offsets = self.local_offsets
+        for filetime in filetimes:
+            # Same rounding as timedelta(microseconds=filetime / 10)
+            seconds, microseconds = divmod(
+                round(filetime / 10) - FILETIME_EPOCH_US, 1000000
+            )
+            hour = seconds // 3600
+            local_offset = local_offsets.get(hour)
+            if local_offset is None:
+                local_offset = (
+                    datetime.datetime(1970, 1, 1)
+                    + datetime.timedelta(seconds=hour * 3600)
+                ).timestamp() - hour * 3600
+                local_offsets[hour] = local_offset
+            starts.append(seconds + local_offset + microseconds / 1e6)
+        return starts
 
-            if len(entry[0:2]) != 2 or entry[0:2] != b"\x00\x00":
-                logger.debug("JTV format violation detected!")
-                continue
 
-            if len(entry[2:10]) != 8:
-                logger.debug("Broken JTV time detected")
-                continue
-            filetime = struct.unpack("<Q", entry[2:10])[0]
-            start_time = (
-                datetime.datetime(year=1601, month=1, day=1)  # FILETIME
-                + datetime.timedelta(microseconds=filetime / 10)
-            ).timestamp() + (3600 * settings["epgoffset"])
-
-            if len(entry[10:12]) != 2:
-                logger.debug("Broken JTV offset detected")
-                continue
-            offset = struct.unpack("<H", entry[10:12])[0]
+def decode_jtv_titles(pdt, offsets, intern):
+    """Titles at given PDT offsets, each offset is decoded once
 
-            if len(pdt[offset : offset + 2]) != 2:
-                logger.debug("Broken JTV count detected")
-                continue
-            count = struct.unpack("<H", pdt[offset : offset + 2])[0]
-
-            program_name = pdt[offset + 2 : offset + 2 + count]
+    Returns offset -> title, broken titles are None"""
+    titles = {}
+    for offset in offsets:
+        if offset in titles:
+            continue
+        titles[offset] = None
+        if offset + 2 > len(pdt):
+            continue
+        (count,) = struct.unpack_from("<H", pdt, offset)
+        if count >= JTV_MAX_TITLE:
+            continue
+        title = pdt[offset + 2 : offset + 2 + count]
+        try:
+            title = title.decode("utf-8")
+        except UnicodeDecodeError:
             try:
-                program_name = program_name.decode("utf-8")
+                title = title.decode("windows-1251")
             except UnicodeDecodeError:
-                program_name = program_name.decode("windows-1251")
-
-            if isinstance(program_name, str):
-                if count < 1000:  # Workaround, do not allow broken entries
-                    schedules.append(
-                        {
-                            "start": start_time,
-                            "stop": 0,
-                            "title": program_name,
-                            "desc": "",
-                        }
-                    )
-                    try:
-                        schedules[len(schedules) - 2]["stop"] = start_time
-                    except Exception:
-                        pass
-                else:
-                    logger.debug("Broken JTV entry found!")
-            else:
-                raise Exception("Program name decoding failed!")
-        except Exception:
-            logger.debug("JTV parse failed!")
+                continue
+        titles[offset] = intern(title)
+    return titles
+
+
+def parse_jtv(ndx, pdt, time_converter=None, intern=None):
+    if pdt[0:26] not in JTV_HEADERS:
+        logger.debug("Invalid PDT file!")
+        return []
+
+    if len(ndx) < 2:
+        logger.debug("Invalid NDX file!")
+        return []
+
+    if time_converter is None:
+        time_converter = JTVTimeConverter()
+    if intern is None:
+        intern = StringPool().intern
+
+    # Whole index is unpacked at once, truncated last entry is dropped
+    (total_num,) = struct.unpack_from("<H", ndx)
+    total_num = min(total_num, (len(ndx) - 2) // JTV_NDX_ENTRY.size)
+    entries = [
+        entry
+        for entry in JTV_NDX_ENTRY.iter_unpack(
+            memoryview(ndx)[2 : 2 + total_num * JTV_NDX_ENTRY.size]
+        )
+        if entry[0] == 0
+    ]
+    if len(entries) != total_num:
+        logger.debug(f"JTV format violation detected ({total_num - len(entries)})")
+
+    starts = time_converter.convert([entry[1] for entry in entries])
+    titles = decode_jtv_titles(pdt, [entry[2] for entry in entries], intern)
+
+    schedules = []
+    for start, (_, _, offset) in zip(starts, entries):
+        title = titles[offset]
+        if title is None:
+            logger.debug("Broken JTV entry found!")
+            continue
+        # Programme lasts until the next one starts
+        if schedules:
+            schedules[-1].stop = start
+        schedules.append(Programme(start, 0, title))
     # Remove last program because we don't know stop time
     if schedules:
-        schedules.pop(len(schedules) - 1)
+        schedules.pop()
     return schedules
 
 
+def get_jtv_channel_name(name):
+    channel_name = name.replace(".ndx", "")
+    try:
+        return str(bytes(channel_name, encoding="cp437"), encoding="cp866")
+    except UnicodeEncodeError:
+        return channel_name
+
+
 def parse_epg_zip_jtv(zip_file):
-    settings, settings_loaded = parse_settings()
-    array_out = {}
+    """Parse JTV archive, channels are read and decoded in parallel
+
+    ZIP members are inflated without holding the GIL,
+    so threads overlap decompression with decoding."""
     namelist = zip_file.namelist()
+    names = set(namelist)
+    channels = []
     for name in namelist:
         if name.endswith(".ndx"):
-            channel_name = name.replace(".ndx", "")
             pdt_filename = name.replace(".ndx", ".pdt")
-            if pdt_filename in namelist:
-                with zip_file.open(pdt_filename) as pdt_file:
-                    with zip_file.open(name) as ndx_file:
-                        parsed_jtv = parse_jtv(
-                            ndx_file.read(), pdt_file.read(), settings
-                        )
-                        if parsed_jtv:
-                            try:
-                                channel_u_name = str(
-                                    bytes(channel_name, encoding="cp437"),
-                                    encoding="cp866",
-                                )
-                            except UnicodeEncodeError:
-                                channel_u_name = channel_name
-                            array_out[channel_u_name] = parsed_jtv
+            if pdt_filename in names:
+                channels.append((name, pdt_filename))
             else:
                 logger.debug("No PDT file found for channel!")
+
+    time_converter = JTVTimeConverter()
+    intern = StringPool().intern
+
+    def parse_channel(channel):
+        ndx_filename, pdt_filename = channel
+        try:
+            return parse_jtv(
+                zip_file.read(ndx_filename),
+                zip_file.read(pdt_filename),
+                time_converter,
+                intern,
+            )
+        except Exception:
+            logger.debug("JTV parse failed!")
+            return []
+
+    array_out = {}
+    with ThreadPoolExecutor(min(8, os.cpu_count() or 1)) as executor:
+        for (ndx_filename, _), parsed_jtv in zip(
+            channels, executor.map(parse_channel, channels)
+        ):
+            if parsed_jtv:
+                array_out[get_jtv_channel_name(ndx_filename)] = parsed_jtv
     if not array_out:
         raise Exception("JTV parse failed!")
     ids = {x: x for x in list(array_out.keys())}
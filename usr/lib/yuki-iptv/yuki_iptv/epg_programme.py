@@ -0,0 +1,120 @@
+#
+# Copyright (c) 2023-2025 liya <liyaliya@tutamail.com>
+#
+# This file is part of yuki-iptv.
+#
+# yuki-iptv is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# yuki-iptv is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with yuki-iptv. If not, see <https://www.gnu.org/licenses/>.
+#
+# The Font Awesome pictograms are licensed under the CC BY 4.0 License.
+# Font Awesome Free 5.15.4 by @fontawesome - https://fontawesome.com
+# https://creativecommons.org/licenses/by/4.0/
+#
+PROGRAMME_FIELDS = {
+    "start": "start",
+    "stop": "stop",
+    "title": "title",
+    "desc": "desc",
+    "category": "category",
+    "catchup-id": "catchup_id",
+}
+
+
+def shift_time(ts, offset):
+    """Time moved by EPG offset, unknown (0) time is kept"""
+    return ts + offset if ts else 0
+
+
+class Programme:
+    """Compact programme record
+
+    Replaces per-programme dicts, keeps dict-style access
+    (programme["title"], "desc" in programme, programme.get("category"))
+    for existing code."""
+
+    __slots__ = ("start", "stop", "title", "desc", "category", "catchup_id")
+
+    def __init__(self, start, stop, title="", desc="", category="", catchup_id=""):
+        self.start = start
+        self.stop = stop
+        self.title = title
+        self.desc = desc
+        self.category = category
+        self.catchup_id = catchup_id
+
+    def __getitem__(self, key):
+        try:
+            return getattr(self, PROGRAMME_FIELDS[key])
+        except KeyError:
+            raise KeyError(key) from None
+
+    def __setitem__(self, key, value):
+        try:
+            setattr(self, PROGRAMME_FIELDS[key], value)
+        except KeyError:
+            raise KeyError(key) from None
+
+    def __contains__(self, key):
+        return key in PROGRAMME_FIELDS
+
+    def get(self, key, default=None):
+        if key in PROGRAMME_FIELDS:
+            return getattr(self, PROGRAMME_FIELDS[key])
+        return default
+
+    def keys(self):
+        return PROGRAMME_FIELDS.keys()
+
+    def shifted(self, offset):
+        """Copy with start/stop moved by offset, unknown (0) times are kept"""
+        return Programme(
+            shift_time(self.start, offset),
+            shift_time(self.stop, offset),
+            self.title,
+            self.desc,
+            self.category,
+            self.catchup_id,
+        )
+
+    def __eq__(self, other):
+        if not isinstance(other, Programme):
+            return NotImplemented
+        return self.__reduce__()[1] == other.__reduce__()[1]
+
+    def __repr__(self):
+        return f"Programme{self.__reduce__()[1]!r}"
+
+    def __reduce__(self):
+        # Plain tuple pickles smaller than slots state, strings shared
+        # between programmes stay shared after unpickling
+        return (
+            Programme,
+            (
+                self.start,
+                self.stop,
+                self.title,
+                self.desc,
+                self.category,
+                self.catchup_id,
+            ),
+        )
+
+
+class StringPool(dict):
+    """Deduplicates equal strings, repeated titles and categories
+    are stored once per EPG source"""
+
+    __slots__ = ()
+
+    def intern(self, string):
+        return self.setdefault(string, string)
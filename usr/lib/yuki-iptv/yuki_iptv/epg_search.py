@@ -0,0 +1,319 @@
+#
+# Copyright (c) 2023-2025 liya <liyaliya@tutamail.com>
+#
+# This file is part of yuki-iptv.
+#
+# yuki-iptv is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# yuki-iptv is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with yuki-iptv. If not, see <https://www.gnu.org/licenses/>.
+#
+# The Font Awesome pictograms are licensed under the CC BY 4.0 License.
+# Font Awesome Free 5.15.4 by @fontawesome - https://fontawesome.com
+# https://creativecommons.org/licenses/by/4.0/
+#
+# Full-text search over programmes of all loaded EPG sources
+#
+# Programmes of a source are rows in source order (as in pre-parsed cache).
+# Every distinct string is tokenized once: token -> string ids,
+# string id -> rows where it is used in one of the indexed fields.
+# Words of a query are matched as prefixes of tokens (words shorter than
+# EPG_SEARCH_MIN_PREFIX as whole tokens), all of them have to be found
+# in a programme.
+#
+import re
+import time
+import heapq
+import logging
+import threading
+import unicodedata
+from array import array
+from bisect import bisect_left, bisect_right
+from operator import itemgetter
+from itertools import chain
+from yuki_iptv.epg_cache import MappedProgrammes, PROGRAMME_STRING_FIELDS
+from yuki_iptv.epg_programme import Programme, shift_time
+
+logger = logging.getLogger(__name__)
+
+EPG_SEARCH_LIMIT = 500
+EPG_SEARCH_MIN_PREFIX = 3
+EPG_SEARCH_TOKEN_RE = re.compile(r"\w+")
+
+
+def normalize_search_text(text):
+    """Text in lower case without diacritics, "Café" -> "cafe" """
+    if not text.isascii():
+        text = "".join(
+            char
+            for char in unicodedata.normalize("NFKD", text)
+            if not unicodedata.combining(char)
+        )
+    return text.casefold()
+
+
+def get_search_tokens(text):
+    return set(EPG_SEARCH_TOKEN_RE.findall(normalize_search_text(text)))
+
+
+def get_search_columns(programmes):
+    """(channel ids, programme offsets, starts, stops, string columns, strings)
+
+    Mapped sources are used in place. Other sources are copied,
+    because timelines sort and prune programme lists of the source."""
+    if isinstance(programmes, MappedProgrammes):
+        return (
+            list(programmes),
+            programmes.programme_offsets,
+            programmes.starts,
+            programmes.stops,
+            programmes.columns,
+            programmes.string,
+        )
+    strings = {"": 0}
+    channel_ids = []
+    programme_offsets = array("Q", [0])
+    starts = array("d")
+    stops = array("d")
+    columns = [array("I") for _field in PROGRAMME_STRING_FIELDS]
+    for channel_id, channel_programmes in programmes.items():
+        channel_ids.append(channel_id)
+        for programme in channel_programmes:
+            starts.append(programme.start)
+            stops.append(programme.stop)
+            for column, field in zip(columns, PROGRAMME_STRING_FIELDS):
+                column.append(
+                    strings.setdefault(programme.get(field) or "", len(strings))
+                )
+        programme_offsets.append(len(starts))
+    return (
+        channel_ids,
+        programme_offsets,
+        starts,
+        stops,
+        columns,
+        list(strings).__getitem__,
+    )
+
+
+def get_search_signature(source):
+    """Changes when source is loaded from another pre-parsed EPG"""
+    coverage = source["coverage"]
+    return (
+        source.get("created"),
+        coverage["programmes"],
+        coverage["min_start"],
+        coverage["max_stop"],
+    )
+
+
+class EPGSourceSearchIndex:
+    """Inverted index of programmes of one EPG source"""
+
+    def __init__(self, programmes, fields):
+        (
+            self.channel_ids,
+            self.programme_offsets,
+            self.starts,
+            self.stops,
+            self.columns,
+            self.string,
+        ) = get_search_columns(programmes)
+        # Columns of indexed fields
+        self.search_columns = [
+            self.columns[PROGRAMME_STRING_FIELDS.index(field)] for field in fields
+        ]
+        string_rows = {}
+        for column in self.search_columns:
+            for row, string_id in enumerate(column):
+                if string_id:
+                    rows = string_rows.get(string_id)
+                    if rows is None:
+                        rows = string_rows[string_id] = array("I")
+                    rows.append(row)
+        token_strings = {}
+        for string_id in string_rows:
+            for token in get_search_tokens(self.string(string_id)):
+                token_strings.setdefault(token, []).append(string_id)
+        self.string_rows = string_rows
+        self.token_strings = token_strings
+        self.tokens = sorted(token_strings)
+
+    def find_string_ids(self, query_token):
+        """Ids of strings which have a token starting with query_token
+
+        Short query tokens have to match the whole token, as prefixes
+        they would match too much."""
+        if len(query_token) < EPG_SEARCH_MIN_PREFIX:
+            return set(self.token_strings.get(query_token, ()))
+        string_ids = set()
+        i = bisect_left(self.tokens, query_token)
+        while i < len(self.tokens) and self.tokens[i].startswith(query_token):
+            string_ids.update(self.token_strings[self.tokens[i]])
+            i += 1
+        return string_ids
+
+    def get_token_rows(self, string_ids):
+        rows = set()
+        for string_id in string_ids:
+            rows.update(self.string_rows[string_id])
+        return rows
+
+    def find_rows(self, query_tokens):
+        """Rows which have tokens starting with every query token
+
+        None if nothing is found. Row may be returned more than once
+        (once per indexed field) if there is only one query token.
+        Starts from the rarest query token, rows of much more common tokens
+        are not collected, instead indexed columns of found rows are checked."""
+        matches = []
+        for query_token in query_tokens:
+            string_ids = self.find_string_ids(query_token)
+            if not string_ids:
+                return None
+            matches.append(
+                (
+                    sum(len(self.string_rows[string_id]) for string_id in string_ids),
+                    string_ids,
+                )
+            )
+        matches.sort(key=itemgetter(0))
+        if len(matches) == 1:
+            return chain.from_iterable(
+                self.string_rows[string_id] for string_id in matches[0][1]
+            )
+        rows = self.get_token_rows(matches[0][1])
+        for count, string_ids in matches[1:]:
+            if count < len(rows) * 4:
+                rows &= self.get_token_rows(string_ids)
+            else:
+                rows = {
+                    row
+                    for column in self.search_columns
+                    for row in rows
+                    if column[row] in string_ids
+                }
+            if not rows:
+                return None
+        return rows
+
+    def get_channel_mask(self, use_channel):
+        """Byte per row, 1 if channel of the row passes use_channel(EPG id)"""
+        mask = bytearray(len(self.starts))
+        programme_offsets = self.programme_offsets
+        for channel_num, channel_id in enumerate(self.channel_ids):
+            if use_channel(channel_id):
+                channel_start = programme_offsets[channel_num]
+                channel_end = programme_offsets[channel_num + 1]
+                mask[channel_start:channel_end] = b"\x01" * (
+                    channel_end - channel_start
+                )
+        return mask
+
+    def get_channel_id(self, row):
+        return self.channel_ids[bisect_right(self.programme_offsets, row) - 1]
+
+    def get_programme(self, row, offset=0):
+        titles, descs, categories, catchup_ids = self.columns
+        return Programme(
+            shift_time(self.starts[row], offset),
+            shift_time(self.stops[row], offset),
+            self.string(titles[row]),
+            self.string(descs[row]),
+            self.string(categories[row]),
+            self.string(catchup_ids[row]),
+        )
+
+
+class EPGSearchIndex:
+    """Search indexes of all loaded EPG sources
+
+    Updated after every EPG load, indexes of unchanged sources are reused."""
+
+    def __init__(self):
+        # EPG URL -> (source signature, EPGSourceSearchIndex)
+        self.sources = {}
+        self.fields = ()
+        self.lock = threading.Lock()
+
+    def update(self, epg_array, fields):
+        with self.lock:
+            t = time.time()
+            sources = {}
+            indexed = 0
+            for epg_url, source in epg_array.items():
+                signature = get_search_signature(source)
+                if (
+                    fields == self.fields
+                    and epg_url in self.sources
+                    and self.sources[epg_url][0] == signature
+                ):
+                    sources[epg_url] = self.sources[epg_url]
+                else:
+                    sources[epg_url] = (
+                        signature,
+                        EPGSourceSearchIndex(source["epg"], fields),
+                    )
+                    indexed += 1
+            self.sources = sources
+            self.fields = fields
+            logger.info(
+                f"EPG search index updated, {indexed} of {len(sources)} sources "
+                f"indexed, took {round(time.time() - t, 2)} seconds"
+            )
+
+    def search(self, text, epg_index, epg_ids=None, min_stop=None):
+        """(EPG id, Programme) sorted by start time, at most EPG_SEARCH_LIMIT
+
+        Programmes are taken from the same sources as in epg_index,
+        with its EPG offsets applied."""
+        query_tokens = sorted(get_search_tokens(text), key=len, reverse=True)
+        if not query_tokens:
+            return []
+        found = []
+        for epg_url, (_signature, source_index) in self.sources.items():
+
+            def use_channel(epg_id):
+                # EPG id is present in several sources - first source wins
+                return (
+                    epg_ids is None or epg_id in epg_ids
+                ) and epg_index.channels.get(epg_id, (None,))[0] == epg_url
+
+            def is_not_expired(row):
+                return shift_time(source_index.stops[row], offset) >= min_stop
+
+            rows = source_index.find_rows(query_tokens)
+            if rows is None:
+                continue
+            offset = epg_index.offsets.get(epg_url, 0)
+            rows = filter(source_index.get_channel_mask(use_channel).__getitem__, rows)
+            if min_stop is not None:
+                rows = filter(is_not_expired, rows)
+            # Enough rows to have EPG_SEARCH_LIMIT unique ones
+            rows = heapq.nsmallest(
+                EPG_SEARCH_LIMIT * len(source_index.search_columns),
+                rows,
+                key=source_index.starts.__getitem__,
+            )
+            for row in list(dict.fromkeys(rows))[:EPG_SEARCH_LIMIT]:
+                found.append(
+                    (
+                        shift_time(source_index.starts[row], offset),
+                        row,
+                        offset,
+                        source_index,
+                    )
+                )
+        found.sort(key=itemgetter(0))
+        return [
+            (source_index.get_channel_id(row), source_index.get_programme(row, offset))
+            for _start, row, offset, source_index in found[:EPG_SEARCH_LIMIT]
+        ]
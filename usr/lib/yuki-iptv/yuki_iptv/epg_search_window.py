@@ -0,0 +1,150 @@
+#
+# Copyright (c) 2023-2025 liya <liyaliya@tutamail.com>
+#
+# This file is part of yuki-iptv.
+#
+# yuki-iptv is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# yuki-iptv is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with yuki-iptv. If not, see <https://www.gnu.org/licenses/>.
+#
+# The Font Awesome pictograms are licensed under the CC BY 4.0 License.
+# Font Awesome Free 5.15.4 by @fontawesome - https://fontawesome.com
+# https://creativecommons.org/licenses/by/4.0/
+#
+import datetime
+import traceback
+from PyQt6 import QtCore, QtWidgets
+from yuki_iptv.i18n import _
+from yuki_iptv.qt_exception import show_exception
+
+
+class EPGSearchWindow(QtWidgets.QMainWindow):
+    search_delay = 300  # ms
+
+    def __init__(self):
+        super().__init__()
+        try:
+            self.widget = QtWidgets.QWidget()
+            self.layout = QtWidgets.QVBoxLayout()
+            self.widget.setLayout(self.layout)
+            self.setCentralWidget(self.widget)
+
+            self.search_edit = QtWidgets.QLineEdit()
+            self.search_edit.setPlaceholderText(_("Search"))
+            self.search_edit.setClearButtonEnabled(True)
+            self.search_edit.textChanged.connect(self.search_changed)
+            self.search_edit.returnPressed.connect(self.search)
+
+            self.search_timer = QtCore.QTimer(self)
+            self.search_timer.setSingleShot(True)
+            self.search_timer.setInterval(self.search_delay)
+            self.search_timer.timeout.connect(self.search)
+
+            self.results_label = QtWidgets.QLabel()
+
+            self.results_table = QtWidgets.QTableWidget()
+            self.results_table.setColumnCount(4)
+            self.results_table.setHorizontalHeaderLabels(
+                [_("Channel"), _("Time"), _("Title"), ""]
+            )
+            self.results_table.setEditTriggers(
+                QtWidgets.QAbstractItemView.EditTrigger.NoEditTriggers
+            )
+            self.results_table.setSelectionBehavior(
+                QtWidgets.QAbstractItemView.SelectionBehavior.SelectRows
+            )
+            self.results_table.verticalHeader().hide()
+            self.results_table.horizontalHeader().setSectionResizeMode(
+                2, QtWidgets.QHeaderView.ResizeMode.Stretch
+            )
+
+            self.layout.addWidget(self.search_edit)
+            self.layout.addWidget(self.results_label)
+            self.layout.addWidget(self.results_table)
+        except Exception:
+            show_exception(traceback.format_exc())
+
+    def first(self):
+        try:
+            self.search_edit.setFocus()
+            self.search_edit.selectAll()
+            self.search()
+        except Exception:
+            show_exception(traceback.format_exc())
+
+    def search_changed(self):
+        try:
+            self.search_timer.start()
+        except Exception:
+            show_exception(traceback.format_exc())
+
+    def search(self):
+        try:
+            self.search_timer.stop()
+            results = []
+            if self.search_edit.text().strip():
+                results = self.search_epg(self.search_edit.text())
+            self.set_results(results)
+        except Exception:
+            show_exception(traceback.format_exc())
+
+    def set_results(self, results):
+        try:
+            self.results_table.setRowCount(0)
+            self.results_table.setRowCount(len(results))
+            for row, (channel, programme, archive_link) in enumerate(results):
+                time_start = datetime.datetime.fromtimestamp(programme["start"])
+                time_stop = datetime.datetime.fromtimestamp(programme["stop"])
+                title = programme["title"]
+                if programme["category"]:
+                    title = f"({programme['category']}) {title}"
+                title_item = QtWidgets.QTableWidgetItem(title)
+                if programme["desc"]:
+                    title_item.setToolTip(programme["desc"])
+                self.results_table.setItem(row, 0, QtWidgets.QTableWidgetItem(channel))
+                self.results_table.setItem(
+                    row,
+                    1,
+                    QtWidgets.QTableWidgetItem(
+                        f"{time_start.strftime('%d.%m.%y %H:%M')} - "
+                        f"{time_stop.strftime('%H:%M')}"
+                    ),
+                )
+                self.results_table.setItem(row, 2, title_item)
+                if archive_link:
+                    archive_label = QtWidgets.QLabel(
+                        f'<a href="#__archive__{archive_link}">'
+                        f"{_('Open archive')}</a>"
+                    )
+                    archive_label.linkActivated.connect(self.open_archive)
+                    self.results_table.setCellWidget(row, 3, archive_label)
+            self.results_table.resizeColumnToContents(0)
+            self.results_table.resizeColumnToContents(1)
+            self.results_table.resizeColumnToContents(3)
+            self.results_label.setText(
+                "{}: {}".format(_("Programmes found"), len(results))
+            )
+        except Exception:
+            show_exception(traceback.format_exc())
+
+    def open_archive(self, link):
+        try:
+            self.do_open_archive(link)
+        except Exception:
+            show_exception(traceback.format_exc())
+
+    def _set(self, **kwargs):
+        try:
+            for func in kwargs:
+                setattr(self, func, kwargs[func])
+        except Exception:
+            show_exception(traceback.format_exc())
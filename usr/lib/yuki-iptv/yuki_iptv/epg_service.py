@@ -0,0 +1,107 @@
+#
+# Copyright (c) 2023-2025 liya <liyaliya@tutamail.com>
+#
+# This file is part of yuki-iptv.
+#
+# yuki-iptv is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# yuki-iptv is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with yuki-iptv. If not, see <https://www.gnu.org/licenses/>.
+#
+# The Font Awesome pictograms are licensed under the CC BY 4.0 License.
+# Font Awesome Free 5.15.4 by @fontawesome - https://fontawesome.com
+# https://creativecommons.org/licenses/by/4.0/
+#
+import os
+import logging
+import threading
+from multiprocessing import get_context
+from yuki_iptv.epg import epg_worker, remove_stale_epg_files
+
+logger = logging.getLogger(__name__)
+
+
+class EPGService:
+    """Long-lived EPG worker processes
+
+    Processes are started on first load and reused by every update,
+    so interpreter start-up and imports are paid once per session.
+    Requests:
+        load - load or refresh EPG sources, blocks the calling thread
+        progress - status text of running update
+        cancel - stop running update (e.g. on playlist switch)
+        shutdown - stop worker processes"""
+
+    def __init__(self, return_dict):
+        self.return_dict = return_dict
+        self.pool = None
+        self.processes = 0
+        self.running = False
+        self.cancelled = threading.Event()
+        self.lock = threading.Lock()
+
+    def start(self, processes):
+        with self.lock:
+            if self.pool is not None and self.processes >= processes:
+                return self.pool
+            if self.pool is not None:
+                self.pool.close()
+            self.processes = processes
+            self.pool = get_context("spawn").Pool(processes)
+            logger.info(f"EPG service started, {processes} processes")
+            return self.pool
+
+    def load(self, epgs, settings, parse_options, revalidate=False):
+        """Returns (failed, outdated, EPG array), EPG array is None if cancelled"""
+        self.cancelled.clear()
+        self.running = True
+        try:
+            # Previous update may have been cancelled in the middle of writing
+            remove_stale_epg_files()
+            # Every EPG source is parsed in its own process
+            pool = self.start(min(len(epgs), os.cpu_count() or 1))
+            epg_failed, epg_outdated, epg_array = epg_worker(
+                epgs,
+                settings,
+                self.return_dict,
+                pool,
+                parse_options,
+                revalidate,
+                self.cancelled,
+            )
+        finally:
+            self.running = False
+        if self.cancelled.is_set():
+            return epg_failed, epg_outdated, None
+        return epg_failed, epg_outdated, epg_array
+
+    def progress(self):
+        return self.return_dict.get("epg_progress", "")
+
+    def cancel(self):
+        """Running parses are killed, processes are started again on next load"""
+        with self.lock:
+            if self.running:
+                logger.info("Cancelling EPG update...")
+                self.cancelled.set()
+                if self.pool is not None:
+                    self.pool.terminate()
+                    self.pool = None
+
+    def shutdown(self):
+        with self.lock:
+            if self.pool is not None:
+                if self.running:
+                    self.cancelled.set()
+                    self.pool.terminate()
+                else:
+                    self.pool.close()
+                self.pool = None
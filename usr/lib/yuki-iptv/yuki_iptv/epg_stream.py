@@ -0,0 +1,177 @@
+#
+# Copyright (c) 2023-2025 liya <liyaliya@tutamail.com>
+#
+# This file is part of yuki-iptv.
+#
+# yuki-iptv is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# yuki-iptv is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with yuki-iptv. If not, see <https://www.gnu.org/licenses/>.
+#
+# The Font Awesome pictograms are licensed under the CC BY 4.0 License.
+# Font Awesome Free 5.15.4 by @fontawesome - https://fontawesome.com
+# https://creativecommons.org/licenses/by/4.0/
+#
+import io
+import bz2
+import gzip
+import lzma
+import queue
+import shutil
+import logging
+import tempfile
+import threading
+
+try:
+    from compression import zstd  # Python 3.14+
+except ImportError:
+    try:
+        import zstandard as zstd
+    except ImportError:
+        zstd = None
+
+logger = logging.getLogger(__name__)
+
+EPG_CHUNK_SIZE = 1024 * 1024  # 1 MB
+EPG_PREFETCH_CHUNKS = 32
+EPG_SNIFF_SIZE = 1024
+
+
+class EPGResponseStream(io.RawIOBase):
+    """Read-only file object over HTTP response chunks
+
+    Response is downloaded in a separate thread, up to EPG_PREFETCH_CHUNKS
+    chunks ahead of the parser, so network transfer does not wait for parsing.
+    Every chunk is also written to tee_file (if set) as it arrives,
+    so the cache is filled while the data is being parsed."""
+
+    def __init__(self, response, tee_file=None):
+        self.response = response
+        self.tee_file = tee_file
+        self.bytes_read = 0
+        self._chunks = queue.Queue(EPG_PREFETCH_CHUNKS)
+        self._buffer = memoryview(b"")
+        self._eof = False
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._download, daemon=True)
+        self._thread.start()
+
+    def _put(self, item):
+        while not self._stop.is_set():
+            try:
+                self._chunks.put(item, timeout=1)
+                return True
+            except queue.Full:
+                pass
+        return False
+
+    def _download(self):
+        try:
+            for chunk in self.response.iter_content(EPG_CHUNK_SIZE):
+                if chunk:
+                    if self.tee_file is not None:
+                        self.tee_file.write(chunk)
+                    if not self._put(chunk):
+                        return
+            self._put(None)
+        except Exception as e:
+            self._put(e)
+
+    def readable(self):
+        return True
+
+    def readinto(self, b):
+        while not self._buffer:
+            if self._eof:
+                return 0
+            chunk = self._chunks.get()
+            if chunk is None:
+                self._eof = True
+                return 0
+            if isinstance(chunk, Exception):
+                self._eof = True
+                raise chunk
+            self.bytes_read += len(chunk)
+            self._buffer = memoryview(chunk)
+        size = min(len(b), len(self._buffer))
+        b[:size] = self._buffer[:size]
+        self._buffer = self._buffer[size:]
+        return size
+
+    def drain(self):
+        # Read the rest of the response, parser can stop before the end of data
+        while self.read(EPG_CHUNK_SIZE):
+            pass
+
+    def close(self):
+        if not self.closed:
+            self._stop.set()
+            self.response.close()
+            self._thread.join()
+        super().close()
+
+
+def open_zstd(stream):
+    if zstd is None:
+        raise Exception(
+            "zstd compressed EPG is not supported, install zstandard Python module"
+        )
+    if hasattr(zstd, "ZstdFile"):
+        return zstd.ZstdFile(stream)
+    return zstd.ZstdDecompressor().stream_reader(stream, read_across_frames=True)
+
+
+def sniff_epg_format(head):
+    """EPG format from the first bytes of data, "unknown" if not recognized"""
+    if head.startswith(b"\x1f\x8b"):
+        return "gzip"
+    if head.startswith(b"\xfd7zXZ\x00") or head.startswith(b"\x5d\x00\x00"):
+        return "lzma"
+    if head.startswith(b"BZh"):
+        return "bz2"
+    if head.startswith(b"\x28\xb5\x2f\xfd"):
+        return "zstd"
+    if head.startswith(b"PK\x03\x04"):
+        return "zip"
+    if head.startswith(b"\xff\xfe") or head.startswith(b"\xfe\xff"):
+        return "xml"  # UTF-16
+    if head.lstrip(b"\xef\xbb\xbf").lstrip().startswith(b"<"):
+        return "xml"
+    return "unknown"
+
+
+def open_epg_stream(fileobj):
+    """Pick decompressor from the first bytes of EPG data
+
+    Returns (format, file object), format is one of gzip, lzma, bz2, zstd,
+    zip, xml or unknown. Data is never read into memory as a whole,
+    compressed data is decompressed incrementally while parser reads it.
+    ZIP needs random access, so non-seekable streams are spooled to disk."""
+    if isinstance(fileobj, io.BufferedReader):
+        stream = fileobj
+    else:
+        stream = io.BufferedReader(fileobj, EPG_CHUNK_SIZE)
+    # Leading whitespace of XML may be longer than a few bytes
+    epg_format = sniff_epg_format(stream.peek(EPG_SNIFF_SIZE)[:EPG_SNIFF_SIZE])
+    if epg_format == "gzip":
+        return epg_format, gzip.GzipFile(fileobj=stream)
+    if epg_format == "lzma":
+        return epg_format, lzma.LZMAFile(stream)
+    if epg_format == "bz2":
+        return epg_format, bz2.BZ2File(stream)
+    if epg_format == "zstd":
+        return epg_format, open_zstd(stream)
+    if epg_format == "zip" and not stream.seekable():
+        spool_file = tempfile.TemporaryFile()
+        shutil.copyfileobj(stream, spool_file, EPG_CHUNK_SIZE)
+        spool_file.seek(0)
+        return epg_format, spool_file
+    return epg_format, stream
@@ -0,0 +1,175 @@
+#
+# Copyright (c) 2021, 2022 Astroncia
+# Copyright (c) 2023-2025 liya <liyaliya@tutamail.com>
+#
+# This file is part of yuki-iptv.
+#
+# yuki-iptv is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# yuki-iptv is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with yuki-iptv. If not, see <https://www.gnu.org/licenses/>.
+#
+# The Font Awesome pictograms are licensed under the CC BY 4.0 License.
+# Font Awesome Free 5.15.4 by @fontawesome - https://fontawesome.com
+# https://creativecommons.org/licenses/by/4.0/
+#
+import datetime
+
+# Date of the Unix epoch as proleptic Gregorian ordinal
+EPOCH_ORDINAL = datetime.date(1970, 1, 1).toordinal()
+
+
+def parse_timestamp(ts_string):
+    # Assume UTC if no timezone specified
+    if " " not in ts_string.strip():
+        ts_string += " +0000"
+
+    ts = 0
+
+    try:
+        ts_string_split = ts_string.split(" ")
+
+        tzinfo = ts_string_split[1]
+        sign = 1
+        if tzinfo.startswith("-"):
+            sign = -1
+        tzinfo = datetime.timezone(
+            sign * datetime.timedelta(hours=int(tzinfo[1:3]), minutes=int(tzinfo[3:5]))
+        )
+
+        first = ts_string_split[0]
+
+        try:
+            ts = datetime.datetime(
+                year=int(first[0:4]),
+                month=int(first[4:6]),
+                day=int(first[6:8]),
+                hour=int(first[8:10]),
+                minute=int(first[10:12]),
+                second=int(first[12:14]),
+                tzinfo=tzinfo,
+            ).timestamp()
+        except Exception:
+            try:
+                ts = datetime.datetime(
+                    year=int(first[0:4]),
+                    month=int(first[4:6]),
+                    day=int(first[6:8]),
+                    hour=int(first[8:10]),
+                    minute=int(first[10:12]),
+                    tzinfo=tzinfo,
+                ).timestamp()
+            except Exception:
+                try:
+                    ts = datetime.datetime(
+                        year=int(first[0:4]),
+                        month=int(first[4:6]),
+                        day=int(first[6:8]),
+                        hour=int(first[8:10]),
+                        tzinfo=tzinfo,
+                    ).timestamp()
+                except Exception:
+                    try:
+                        ts = datetime.datetime(
+                            year=int(first[0:4]),
+                            month=int(first[4:6]),
+                            day=int(first[6:8]),
+                            tzinfo=tzinfo,
+                        ).timestamp()
+                    except Exception:
+                        try:
+                            ts = datetime.datetime(
+                                year=int(first[0:4]),
+                                month=int(first[4:6]),
+                                day=1,
+                                tzinfo=tzinfo,
+                            ).timestamp()
+                        except Exception:
+                            try:
+                                ts = datetime.datetime(
+                                    year=int(first[0:4]), month=1, day=1, tzinfo=tzinfo
+                                ).timestamp()
+                            except Exception:
+                                pass
+    except Exception:
+        pass
+
+    return ts
+
+
+class TimestampParser:
+    """XMLTV timestamp parser
+
+    Fast path handles the common "YYYYmmddHHMMSS +ZZZZ" form (timezone may be
+    omitted) with integer arithmetic. Timezone offsets and dates are memoized,
+    in XMLTV file there are only few distinct of them. Anything else goes to
+    parse_timestamp(). Times are UTC, EPG offset is applied by EPGIndex."""
+
+    __slots__ = ("offsets", "days")
+
+    def __init__(self):
+        self.offsets = {}
+        self.days = {}
+
+    def get_offset(self, tz_string):
+        offset = None
+        if (
+            len(tz_string) == 5
+            and tz_string[0] in "+-"
+            and tz_string[1:].isdecimal()
+            and int(tz_string[1:3]) < 24
+        ):
+            offset = int(tz_string[1:3]) * 3600 + int(tz_string[3:5]) * 60
+            if tz_string[0] == "-":
+                offset = -offset
+        self.offsets[tz_string] = offset
+        return offset
+
+    def get_day(self, date_string):
+        day = None
+        if date_string.isdecimal():
+            try:
+                day = (
+                    datetime.date(
+                        int(date_string[0:4]),
+                        int(date_string[4:6]),
+                        int(date_string[6:8]),
+                    ).toordinal()
+                    - EPOCH_ORDINAL
+                ) * 86400
+            except ValueError:
+                pass
+        self.days[date_string] = day
+        return day
+
+    def parse(self, ts_string):
+        if len(ts_string) == 20 and ts_string[14] == " ":
+            offset = self.offsets.get(ts_string[15:], False)
+            if offset is False:
+                offset = self.get_offset(ts_string[15:])
+        elif len(ts_string) == 14:
+            # Assume UTC if no timezone specified
+            offset = 0
+        else:
+            offset = None
+        if offset is not None:
+            day = self.days.get(ts_string[0:8], False)
+            if day is False:
+                day = self.get_day(ts_string[0:8])
+            time_string = ts_string[8:14]
+            if day is not None and time_string.isdecimal():
+                time_int = int(time_string)
+                hour = time_int // 10000
+                minute = time_int // 100 % 100
+                second = time_int % 100
+                if hour < 24 and minute < 60 and second < 60:
+                    return float(day + hour * 3600 + minute * 60 + second - offset)
+        return parse_timestamp(ts_string)
@@ -20,132 +20,130 @@
 # The Font Awesome pictograms are licensed under the CC BY 4.0 License.
 # Font Awesome Free 5.15.4 by @fontawesome - https://fontawesome.com
 # https://creativecommons.org/licenses/by/4.0/
-#
+import math
 import logging
-import datetime
-from xml.etree.ElementTree import iterparse
+from xml.etree.ElementTree import XMLParser, iterparse
+from yuki_iptv.epg_timestamp import TimestampParser
+from yuki_iptv.epg_programme import Programme, StringPool
+
+try:
+    import lxml.etree
+except ImportError:
+    lxml = None
 
 logger = logging.getLogger(__name__)
 
+XMLTV_CHUNK_SIZE = 64 * 1024
+XMLTV_TEXT_TAGS = ("display-name", "title", "desc", "category")
 
-def parse_timestamp(ts_string, settings):
-    # Assume UTC if no timezone specified
-    if " " not in ts_string.strip():
-        ts_string += " +0000"
-
-    ts = 0
-
-    try:
-        ts_string_split = ts_string.split(" ")
-
-        tzinfo = ts_string_split[1]
-        sign = 1
-        if tzinfo.startswith("-"):
-            sign = -1
-        tzinfo = datetime.timezone(
-            sign * datetime.timedelta(hours=int(tzinfo[1:3]), minutes=int(tzinfo[3:5]))
-        )
-
-        first = ts_string_split[0]
-
-        try:
-            ts = datetime.datetime(
-                year=int(first[0:4]),
-                month=int(first[4:6]),
-                day=int(first[6:8]),
-                hour=int(first[8:10]),
-                minute=int(first[10:12]),
-                second=int(first[12:14]),
-                tzinfo=tzinfo,
-            ).timestamp()
-        except Exception:
-            try:
-                ts = datetime.datetime(
-                    year=int(first[0:4]),
-                    month=int(first[4:6]),
-                    day=int(first[6:8]),
-                    hour=int(first[8:10]),
-                    minute=int(first[10:12]),
-                    tzinfo=tzinfo,
-                ).timestamp()
-            except Exception:
-                try:
-                    ts = datetime.datetime(
-                        year=int(first[0:4]),
-                        month=int(first[4:6]),
-                        day=int(first[6:8]),
-                        hour=int(first[8:10]),
-                        tzinfo=tzinfo,
-                    ).timestamp()
-                except Exception:
-                    try:
-                        ts = datetime.datetime(
-                            year=int(first[0:4]),
-                            month=int(first[4:6]),
-                            day=int(first[6:8]),
-                            tzinfo=tzinfo,
-                        ).timestamp()
-                    except Exception:
-                        try:
-                            ts = datetime.datetime(
-                                year=int(first[0:4]),
-                                month=int(first[4:6]),
-                                day=1,
-                                tzinfo=tzinfo,
-                            ).timestamp()
-                        except Exception:
-                            try:
-                                ts = datetime.datetime(
-                                    year=int(first[0:4]), month=1, day=1, tzinfo=tzinfo
-                                ).timestamp()
-                            except Exception:
-                                pass
-
-        if ts != 0:
-            ts += 3600 * settings["epgoffset"]
-    except Exception:
-        pass
 
-    return ts
+class XMLTVBuilder:
+    """Collects channels and programmes reported by XMLTV parser backend
+
+    Programmes outside of retention window (min stop, max start) are skipped.
+    With scope (ids and names of playlist channels) programmes of channels
+    which can not be matched are skipped too, channels are still indexed."""
+
+    def __init__(self, retention_window=None, scope=None):
+        self.scope = scope
+        self.scoped_ids = None
+        if scope is not None:
+            self.scoped_ids = set(scope["ids"])
+        if retention_window:
+            self.min_stop, self.max_start = retention_window
+        else:
+            self.min_stop, self.max_start = -math.inf, math.inf
+        self.parse_timestamp = TimestampParser().parse
+        # Programme usually starts when the previous one stops
+        self.last_stop = (None, None)
+        self.strings = StringPool()
+        self.ret = {
+            "display_names": [],
+            "ids": {},
+            "names": {},
+            "_names": set(),
+            "icons": {},
+            "epg": {},
+        }
+
+    def add_channel(self, attrib, display_names, icon):
+        if "id" in attrib:
+            id = attrib["id"]
+            if id not in self.ret["ids"]:
+                self.ret["ids"][id] = set()
+            first = True
+            for display_name in display_names:
+                self.ret["ids"][id].add(display_name)
+                self.ret["names"][display_name.lower().strip()] = id
+                if (
+                    self.scoped_ids is not None
+                    and display_name.lower().strip() in self.scope["names"]
+                ):
+                    self.scoped_ids.add(id)
+                if first:
+                    first = False
+                    self.ret["_names"].add(display_name.strip())
+            self.ret["icons"][id] = icon
+
+    def add_programme(self, attrib, title, desc, category):
+        if (
+            "start" in attrib
+            and "stop" in attrib
+            and "channel" in attrib
+            and attrib["start"]
+            and attrib["stop"]
+            and attrib["channel"]
+            and (self.scoped_ids is None or attrib["channel"] in self.scoped_ids)
+        ):
+            catchup_id = ""
+            if "catchup-id" in attrib and attrib["catchup-id"]:
+                catchup_id = attrib["catchup-id"]
+            if attrib["start"] == self.last_stop[0]:
+                start = self.last_stop[1]
+            else:
+                start = self.parse_timestamp(attrib["start"])
+            stop = self.parse_timestamp(attrib["stop"])
+            self.last_stop = (attrib["stop"], stop)
+            if start < self.max_start and stop > self.min_stop:
+                channel = attrib["channel"]
+                if channel not in self.ret["epg"]:
+                    self.ret["epg"][channel] = []
+                intern = self.strings.setdefault
+                self.ret["epg"][channel].append(
+                    Programme(
+                        start,
+                        stop,
+                        intern(title, title),
+                        intern(desc, desc),
+                        intern(category, category),
+                        intern(catchup_id, catchup_id),
+                    )
+                )
 
 
-def parse_as_xmltv(data, settings):
+def parse_xmltv_etree(data, builder):
+    """ElementTree iterparse, builds an element for every tag"""
     icon = ""
     title = ""
     desc = ""
     category = ""
+    display_names = []
 
-    ret = {
-        "display_names": [],
-        "ids": {},
-        "names": {},
-        "_names": set(),
-        "icons": {},
-        "epg": {},
-    }
-
-    for event, elem in iterparse(data):
+    root = None
+    for event, elem in iterparse(data, events=("start", "end")):
+        if root is None:
+            root = elem
         if event == "end":
             if elem.tag == "display-name":
                 if elem.text:
-                    ret["display_names"].append(elem.text)
+                    display_names.append(elem.text)
             elif elem.tag == "icon":
                 if "src" in elem.attrib:
                     icon = elem.attrib["src"]
             elif elem.tag == "channel":
                 if "id" in elem.attrib:
-                    id = elem.attrib["id"]
-                    if id not in ret["ids"]:
-                        ret["ids"][id] = set()
-                    first = True
-                    for display_name in ret["display_names"]:
-                        ret["ids"][id].add(display_name)
-                        ret["names"][display_name.lower().strip()] = id
-                        if first:
-                            first = False
-                            ret["_names"].add(display_name.strip())
-                    ret["icons"][id] = icon
-                    ret["display_names"].clear()
+                    builder.add_channel(elem.attrib, display_names, icon)
+                    display_names.clear()
                     icon = ""
             elif elem.tag == "title":
                 if elem.text:
@@ -157,32 +155,126 @@ def parse_as_xmltv(data, settings):
                 if elem.text:
                     category = elem.text
             elif elem.tag == "programme":
-                if (
-                    "start" in elem.attrib
-                    and "stop" in elem.attrib
-                    and "channel" in elem.attrib
-                    and elem.attrib["start"]
-                    and elem.attrib["stop"]
-                    and elem.attrib["channel"]
-                ):
-                    catchup_id = ""
-                    if "catchup-id" in elem.attrib and elem.attrib["catchup-id"]:
-                        catchup_id = elem.attrib["catchup-id"]
-                    if elem.attrib["channel"] not in ret["epg"]:
-                        ret["epg"][elem.attrib["channel"]] = []
-                    start = parse_timestamp(elem.attrib["start"], settings)
-                    stop = parse_timestamp(elem.attrib["stop"], settings)
-                    e = {
-                        "start": start,
-                        "stop": stop,
-                        "title": title,
-                        "desc": desc,
-                        "category": category,
-                        "catchup-id": catchup_id,
-                    }
-                    ret["epg"][elem.attrib["channel"]].append(e)
+                builder.add_programme(elem.attrib, title, desc, category)
                 title = ""
                 desc = ""
                 category = ""
             elem.clear()
-    return ret
+            if elem.tag in ("channel", "programme"):
+                # Cleared elements are still referenced by root element,
+                # drop them so memory does not grow with the file size
+                root.clear()
+
+
+class XMLTVTarget:
+    """Parser target which handles only the tags XMLTV parsing needs,
+    no elements are built. Same semantics as parse_xmltv_etree."""
+
+    def __init__(self, builder):
+        self.builder = builder
+        self.icon = ""
+        self.values = {"title": "", "desc": "", "category": ""}
+        self.display_names = []
+        self.attrib = {}
+        self.text_tag = None
+        self.text = []
+        self.collect_text = False
+
+    def start(self, tag, attrib):
+        if self.text_tag is not None:
+            # Like Element.text, only text before the first child is used
+            self.collect_text = False
+        elif tag in XMLTV_TEXT_TAGS:
+            self.text_tag = tag
+            self.collect_text = True
+        elif tag == "icon":
+            if "src" in attrib:
+                self.icon = attrib["src"]
+        elif tag == "channel" or tag == "programme":
+            self.attrib = attrib
+
+    def data(self, data):
+        if self.collect_text:
+            self.text.append(data)
+
+    def end(self, tag):
+        if self.text_tag is not None:
+            if tag != self.text_tag:
+                return
+            text = "".join(self.text)
+            self.text_tag = None
+            self.text.clear()
+            self.collect_text = False
+            if text:
+                if tag == "display-name":
+                    self.display_names.append(text)
+                else:
+                    self.values[tag] = text
+        elif tag == "channel":
+            if "id" in self.attrib:
+                self.builder.add_channel(self.attrib, self.display_names, self.icon)
+                self.display_names.clear()
+                self.icon = ""
+        elif tag == "programme":
+            self.builder.add_programme(
+                self.attrib,
+                self.values["title"],
+                self.values["desc"],
+                self.values["category"],
+            )
+            self.values = {"title": "", "desc": "", "category": ""}
+
+    def close(self):
+        pass
+
+
+def feed_xmltv_parser(data, parser):
+    while True:
+        chunk = data.read(XMLTV_CHUNK_SIZE)
+        if not chunk:
+            break
+        parser.feed(chunk)
+    parser.close()
+
+
+def parse_xmltv_expat(data, builder):
+    """expat (through ElementTree XMLParser) with XMLTVTarget"""
+    feed_xmltv_parser(data, XMLParser(target=XMLTVTarget(builder)))
+
+
+def parse_xmltv_lxml(data, builder):
+    """libxml2 (lxml) with XMLTVTarget"""
+    feed_xmltv_parser(
+        data,
+        lxml.etree.XMLParser(
+            target=XMLTVTarget(builder), huge_tree=True, resolve_entities=False
+        ),
+    )
+
+
+XMLTV_BACKENDS = {
+    "etree": parse_xmltv_etree,
+    "expat": parse_xmltv_expat,
+    "lxml": parse_xmltv_lxml,
+}
+
+
+def get_xmltv_backend(name="auto"):
+    """Backend from "epgparser" setting: auto (lxml if installed, otherwise
+    expat), expat, lxml or etree"""
+    if name == "auto":
+        return "expat" if lxml is None else "lxml"
+    if name == "lxml" and lxml is None:
+        logger.warning("lxml is not installed, using expat XMLTV parser")
+        return "expat"
+    if name not in XMLTV_BACKENDS:
+        return "expat"
+    return name
+
+
+def parse_as_xmltv(data, settings, retention_window=None, scope=None):
+    builder = XMLTVBuilder(retention_window, scope)
+    backend = get_xmltv_backend(settings.get("epgparser", "auto"))
+    logger.info(f"XMLTV parser: {backend}")
+    XMLTV_BACKENDS[backend](data, builder)
+    return builder.ret
@@ -31,6 +31,7 @@ from PyQt6 import QtWidgets, QtCore, QtGui
 from yuki_iptv.i18n import _, ngettext
 from yuki_iptv.xdg import SAVE_FOLDER_DEFAULT
 from yuki_iptv.multi_epg import MultiEPGWindow
+from yuki_iptv.epg_search_window import EPGSearchWindow
 from yuki_iptv.qt_exception import show_exception
 from yuki_iptv.misc import YukiData, WINDOW_SIZE
 
@@ -637,6 +638,28 @@ class YukiGUIClass:
         self.nocacheepg_label = QtWidgets.QLabel("{}:".format(_("Do not cache EPG")))
         self.nocacheepg_flag = QtWidgets.QCheckBox()
 
+        self.epgdays_label = QtWidgets.QLabel(
+            "{}:".format(_("Keep TV guide for\nnext days"))
+        )
+        self.epgdays_choose = QtWidgets.QSpinBox()
+        self.epgdays_choose.setMinimum(1)
+        self.epgdays_choose.setMaximum(31)
+
+        self.epgscope_label = QtWidgets.QLabel(
+            "{}:".format(_("Load TV guide only\nfor playlist channels"))
+        )
+        self.epgscope_flag = QtWidgets.QCheckBox()
+
+        self.epgsearchdesc_label = QtWidgets.QLabel(
+            "{}:".format(_("Search TV guide\nin descriptions"))
+        )
+        self.epgsearchdesc_flag = QtWidgets.QCheckBox()
+
+        self.xtreamshortepg_label = QtWidgets.QLabel(
+            "{}:".format(_("XTream: load TV guide\nonly for shown channels"))
+        )
+        self.xtreamshortepg_flag = QtWidgets.QCheckBox()
+
         self.scrrecnosubfolders_label = QtWidgets.QLabel(
             "{}:".format(_("Do not create screenshots\nand recordings subfolders"))
         )
@@ -831,6 +854,14 @@ class YukiGUIClass:
         self.tab_epg.layout.addWidget(self.donot_flag, 0, 1)
         self.tab_epg.layout.addWidget(self.nocacheepg_label, 1, 0)
         self.tab_epg.layout.addWidget(self.nocacheepg_flag, 1, 1)
+        self.tab_epg.layout.addWidget(self.epgdays_label, 2, 0)
+        self.tab_epg.layout.addWidget(self.epgdays_choose, 2, 1)
+        self.tab_epg.layout.addWidget(self.epgscope_label, 3, 0)
+        self.tab_epg.layout.addWidget(self.epgscope_flag, 3, 1)
+        self.tab_epg.layout.addWidget(self.epgsearchdesc_label, 4, 0)
+        self.tab_epg.layout.addWidget(self.epgsearchdesc_flag, 4, 1)
+        self.tab_epg.layout.addWidget(self.xtreamshortepg_label, 5, 0)
+        self.tab_epg.layout.addWidget(self.xtreamshortepg_flag, 5, 1)
         self.tab_epg.setLayout(self.tab_epg.layout)
 
         self.tab_other.layout = QtWidgets.QGridLayout()
@@ -1169,6 +1200,11 @@ class YukiGUIClass:
         self.multiepg_win.setWindowTitle(_("Multi-EPG"))
         self.multiepg_win.setWindowIcon(self.main_icon)
 
+        self.epgsearch_win = EPGSearchWindow()
+        self.epgsearch_win.resize(800, 500)
+        self.epgsearch_win.setWindowTitle(_("Search TV guide"))
+        self.epgsearch_win.setWindowIcon(self.main_icon)
+
         self.scheduler_win = QtWidgets.QMainWindow()
         self.scheduler_win.resize(1200, 650)
         self.scheduler_win.setWindowTitle(_("Recording scheduler"))
@@ -1218,6 +1254,10 @@ class YukiGUIClass:
             "autoreconnection": self.autoreconnection_flag.isChecked(),
             "channellogos": self.channellogos_select.currentIndex(),
             "nocacheepg": self.nocacheepg_flag.isChecked(),
+            "epgdays": self.epgdays_choose.value(),
+            "epgscope": self.epgscope_flag.isChecked(),
+            "epgsearchdesc": self.epgsearchdesc_flag.isChecked(),
+            "xtreamshortepg": self.xtreamshortepg_flag.isChecked(),
             "scrrecnosubfolders": self.scrrecnosubfolders_flag.isChecked(),
             "hidetvprogram": self.hidetvprogram_flag.isChecked(),
             "hidechannellogos": self.hidechannellogos_flag.isChecked(),
@@ -1232,6 +1272,8 @@ class YukiGUIClass:
             "playlist_useragent": YukiData.settings["playlist_useragent"],
             "playlist_referer": YukiData.settings["playlist_referer"],
             "playlist_udp_proxy": YukiData.settings["playlist_udp_proxy"],
+            "epgparser": YukiData.settings["epgparser"],
+            "epgoffsets": YukiData.settings["epgoffsets"],
         }
 
         return settings_arr
@@ -1738,6 +1780,10 @@ class YukiGUIClass:
         self.autoreconnection_flag.setChecked(YukiData.settings["autoreconnection"])
         self.channellogos_select.setCurrentIndex(YukiData.settings["channellogos"])
         self.nocacheepg_flag.setChecked(YukiData.settings["nocacheepg"])
+        self.epgdays_choose.setValue(YukiData.settings["epgdays"])
+        self.epgscope_flag.setChecked(YukiData.settings["epgscope"])
+        self.epgsearchdesc_flag.setChecked(YukiData.settings["epgsearchdesc"])
+        self.xtreamshortepg_flag.setChecked(YukiData.settings["xtreamshortepg"])
         self.scrrecnosubfolders_flag.setChecked(YukiData.settings["scrrecnosubfolders"])
         self.hidetvprogram_flag.setChecked(YukiData.settings["hidetvprogram"])
         self.sort_widget.setCurrentIndex(YukiData.settings["sort"])
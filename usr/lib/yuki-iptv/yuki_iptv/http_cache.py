@@ -0,0 +1,66 @@
+#
+# Copyright (c) 2023-2025 liya <liyaliya@tutamail.com>
+#
+# This file is part of yuki-iptv.
+#
+# yuki-iptv is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# yuki-iptv is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with yuki-iptv. If not, see <https://www.gnu.org/licenses/>.
+#
+# The Font Awesome pictograms are licensed under the CC BY 4.0 License.
+# Font Awesome Free 5.15.4 by @fontawesome - https://fontawesome.com
+# https://creativecommons.org/licenses/by/4.0/
+#
+# HTTP cache validators (ETag / Last-Modified)
+#
+# Validators of cached file are stored next to it as JSON, together with
+# the time of the last successful download or revalidation.
+#
+import json
+import time
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+def read_validators(filename):
+    try:
+        with open(filename, encoding="utf8") as validators_file:
+            return json.load(validators_file)
+    except Exception:
+        return {}
+
+
+def save_validators(filename, headers, validators=None):
+    """Save validators from response headers
+
+    304 response can omit validators, then previous ones (if any) are kept."""
+    validators = dict(validators) if validators else {}
+    if "ETag" in headers:
+        validators["etag"] = headers["ETag"]
+    if "Last-Modified" in headers:
+        validators["last-modified"] = headers["Last-Modified"]
+    validators["validated"] = int(time.time())
+    try:
+        with open(filename, "w", encoding="utf8") as validators_file:
+            json.dump(validators, validators_file)
+    except Exception:
+        logger.warning(f"Failed to save cache validators to {filename}")
+
+
+def get_conditional_headers(validators):
+    headers = {}
+    if "etag" in validators:
+        headers["If-None-Match"] = validators["etag"]
+    if "last-modified" in validators:
+        headers["If-Modified-Since"] = validators["last-modified"]
+    return headers
@@ -81,6 +81,7 @@ main_keybinds_default = {
     "mpv_frame_step": QtCore.Qt.Key.Key_Period,
     "mpv_frame_back_step": QtCore.Qt.Key.Key_Comma,
     "show_multi_epg": QtCore.Qt.Key.Key_U,
+    "show_epg_search": "Ctrl+F",
 }
 
 main_keybinds_translations = {
@@ -125,4 +126,5 @@ main_keybinds_translations = {
     "mpv_frame_step": _("&Frame step").replace("&", ""),
     "mpv_frame_back_step": _("Fra&me back step").replace("&", ""),
     "show_multi_epg": _("Multi-EPG"),
+    "show_epg_search": _("Search TV guide"),
 }
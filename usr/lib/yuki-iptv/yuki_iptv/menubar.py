@@ -124,6 +124,7 @@ def reload_menubar_shortcuts():
     YukiData.streaminformationAction.setShortcut(kbd("open_stream_info"))
     YukiData.showepgAction.setShortcut(kbd("show_tvguide_2"))
     YukiData.forceupdateepgAction.setShortcut(kbd("force_update_epg"))
+    YukiData.epgsearchAction.setShortcut(kbd("show_epg_search"))
     YukiData.sortAction.setShortcut(kbd("show_sort"))
     YukiData.settingsAction.setShortcut(kbd("show_settings"))
     sec_keys_1 = [
@@ -324,6 +325,10 @@ def init_menubar(data):
     YukiData.multiepgAction.triggered.connect(lambda: YukiData.show_multi_epg())
     YukiData.multiepgAction.setShortcut(kbd("show_multi_epg"))
 
+    YukiData.epgsearchAction = QtGui.QAction(_("Search TV guide"), data)
+    YukiData.epgsearchAction.triggered.connect(lambda: YukiData.show_epg_search())
+    YukiData.epgsearchAction.setShortcut(kbd("show_epg_search"))
+
     YukiData.forceupdateepgAction = QtGui.QAction(_("&Update TV guide"), data)
     YukiData.forceupdateepgAction.triggered.connect(lambda: YukiData.force_update_epg())
     YukiData.forceupdateepgAction.setShortcut(kbd("force_update_epg"))
@@ -460,6 +465,7 @@ def populate_menubar(
     view_menu.addAction(YukiData.streaminformationAction)
     view_menu.addAction(YukiData.showepgAction)
     view_menu.addAction(YukiData.multiepgAction)
+    view_menu.addAction(YukiData.epgsearchAction)
 
     # Options
 
@@ -607,6 +613,7 @@ def init_menubar_player(
     get_keybind,
     show_tvguide_2,
     show_multi_epg,
+    show_epg_search,
     reload_playlist,
     show_shortcuts,
     yuki_track_set,
@@ -22,6 +22,8 @@
 # https://creativecommons.org/licenses/by/4.0/
 #
 import time
+from yuki_iptv.epg_index import EPGIndex, NowNextTable
+from yuki_iptv.epg_search import EPGSearchIndex
 
 WINDOW_SIZE = (1200, 650)
 DOCKWIDGET_CONTROLPANEL_HEIGHT = int(WINDOW_SIZE[1] / 10)
@@ -34,6 +36,7 @@ DOCKWIDGET_CONTROLPANEL_HEIGHT_LOW = DOCKWIDGET_CONTROLPANEL_HEIGHT_HIGH - (
 )
 DOCKWIDGET_PLAYLIST_WIDTH = int((WINDOW_SIZE[0] / 2) - 200)
 TVGUIDE_WIDTH = int(WINDOW_SIZE[0] / 5)
+PROGRAMME_BOUNDARY_MAX_INTERVAL = 3600 * 1000  # ms
 
 
 class YukiData:
@@ -43,6 +46,8 @@ class YukiData:
     bitrate_failed = False
     channel_logos_process = None
     channel_logos_request_old = {}
+    channel_index = None
+    channel_rows = {}
     channel_sets = None
     channel_sort = {}
     connprinted = False
@@ -57,16 +62,20 @@ class YukiData:
     do_save_settings = False
     do_play_args = ()
     exiting = False
-    epg_array = {}
+    epg_index = EPGIndex({})
     epg_pool_running = False
-    epg_pool = None
+    epg_service = None
     epg_data = None
     epg_failed = False
+    epg_full_view = False
     epg_icons = None
     epg_ready = None
+    epg_search_index = EPGSearchIndex()
     epg_selected_date = None
     epg_thread_2 = None
     epg_update_date = 0
+    epg_update_pending = False
+    epg_prune_date = 0
     epg_update_allowed = None
     epg_updating = None
     event_handler = None
@@ -95,6 +104,7 @@ class YukiData:
     movie_logos_process = None
     movie_logos_request_old = {}
     mp_manager_dict = None
+    now_next = NowNextTable(epg_index)
     old_value = 100
     playlists_search = ""
     playlists_saved = None
@@ -108,6 +118,7 @@ class YukiData:
     prev_cursor = None
     previous_text = ""
     prog_match_arr = None
+    programme_boundary_timer = None
     record_file = None
     recording_time = 0
     recViaScheduler = False
@@ -152,6 +163,8 @@ class YukiData:
     xtream_list_lock = False
     xtream_expiration_list = {}
     is_xtream = False
+    xtream_short_epg = None
+    playlist_hash = None
     groups_sorted = []
     qt_info = ""
     mpris_loop = None
@@ -373,39 +373,41 @@ class MultiEPGWindow(QtWidgets.QMainWindow):
             for channel in self.channels:
                 epg_id = self.get_epg_id(channel)
                 if epg_id:
-                    epg_programmes = self.get_epg_programmes(epg_id)
-                    if epg_programmes:
-                        for programme in epg_programmes:
-                            if self.epg_is_in_date(programme, day_start):
-                                desc = ""
-                                if "desc" in programme:
-                                    desc = programme["desc"]
-                                category = ""
-                                if "category" in programme and programme["category"]:
-                                    category = f"({programme['category']}) "
-                                time_start = datetime.datetime.fromtimestamp(
-                                    programme["start"]
-                                )
-                                time_stop = datetime.datetime.fromtimestamp(
-                                    programme["stop"]
-                                )
-                                _time = (
-                                    f"{time_start.strftime('%H:%M')} - "
-                                    f"{time_stop.strftime('%H:%M')}"
-                                )
-                                if time_start < day_start:
-                                    time_start = day_start
-                                if time_stop > day_end:
-                                    time_stop = day_end
-                                self.create_cell(
-                                    _time,
-                                    programme["title"],
-                                    desc,
-                                    category,
-                                    self.format_time_cell(time_start),
-                                    self.format_time_cell(time_stop),
-                                    channel,
-                                )
+                    timeline = self.get_epg_timeline(epg_id)
+                    if timeline:
+                        for programme_index in timeline.range(
+                            *self.epg_day_range(day_start)
+                        ):
+                            programme = timeline.programmes[programme_index]
+                            desc = ""
+                            if "desc" in programme:
+                                desc = programme["desc"]
+                            category = ""
+                            if "category" in programme and programme["category"]:
+                                category = f"({programme['category']}) "
+                            time_start = datetime.datetime.fromtimestamp(
+                                programme["start"]
+                            )
+                            time_stop = datetime.datetime.fromtimestamp(
+                                programme["stop"]
+                            )
+                            _time = (
+                                f"{time_start.strftime('%H:%M')} - "
+                                f"{time_stop.strftime('%H:%M')}"
+                            )
+                            if time_start < day_start:
+                                time_start = day_start
+                            if time_stop > day_end:
+                                time_stop = day_end
+                            self.create_cell(
+                                _time,
+                                programme["title"],
+                                desc,
+                                category,
+                                self.format_time_cell(time_start),
+                                self.format_time_cell(time_stop),
+                                channel,
+                            )
             self.update_time()
         except Exception:
             show_exception(traceback.format_exc())
@@ -23,33 +23,275 @@
 #
 import os
 import json
+import codecs
 import chardet
+import hashlib
 import logging
+import tempfile
 import traceback
+from pathlib import Path
+from functools import partial
+from itertools import chain
 from PyQt6 import QtWidgets
 from yuki_iptv.i18n import _
 from yuki_iptv.misc import YukiData
+from yuki_iptv.xdg import CACHE_DIR
 from yuki_iptv.playlist_m3u import M3UParser
 from yuki_iptv.qt_exception import show_exception
 from yuki_iptv.playlist_xspf import parse_xspf
+from yuki_iptv.channel_store import ChannelStore
+from yuki_iptv.channel_index import ChannelIndex
+from yuki_iptv.playlist_cache import (
+    save_parsed_playlist,
+    load_parsed_playlist,
+    get_playlist_diff,
+)
 from yuki_iptv.requests_timeout import requests_get
-from yuki_iptv.xtream import load_xtream, convert_xtream_to_m3u, XTreamFailedClass
+from yuki_iptv.http_cache import (
+    read_validators,
+    save_validators,
+    get_conditional_headers,
+)
+from yuki_iptv.xtream import (
+    load_xtream,
+    convert_xtream_to_m3u,
+    XTreamFailedClass,
+    XTreamShortEPG,
+)
 from thirdparty.xtream import Serie
 
 
 logger = logging.getLogger(__name__)
 
+PLAYLIST_CHUNK_SIZE = 1024 * 1024  # 1 MB
+CHANNEL_BATCH_SIZE = 1000
+
 
 class PlaylistsFail:
     status_code = 400
 
+    def close(self):
+        pass
+
+
+def remove_playlist_cache(playlist_cache_filename, playlist_validators_filename):
+    # Server does not support revalidation, cached copy is useless
+    for playlist_cache_remove in (
+        playlist_cache_filename,
+        playlist_validators_filename,
+    ):
+        if os.path.isfile(playlist_cache_remove):
+            os.remove(playlist_cache_remove)
+
+
+class PlaylistDownload:
+    """Remote playlist, downloaded in chunks while it is parsed
+
+    Data is written to the cache file (if server supports revalidation)
+    or to a temporary file, so it can be read again as a whole
+    if playlist turns out not to be UTF-8."""
+
+    def __init__(self, req, playlist_cache_filename, playlist_validators_filename):
+        self.req = req
+        self.playlist_cache_filename = playlist_cache_filename
+        self.playlist_validators_filename = playlist_validators_filename
+        self.cache = req.status_code == 200 and (
+            "ETag" in req.headers or "Last-Modified" in req.headers
+        )
+        if self.cache:
+            self.file = open(f"{playlist_cache_filename}.part", "w+b")
+        else:
+            self.file = tempfile.TemporaryFile()
+            if req.status_code == 200:
+                try:
+                    remove_playlist_cache(
+                        playlist_cache_filename, playlist_validators_filename
+                    )
+                except Exception:
+                    logger.warning("Failed to remove playlist cache")
+                    logger.warning(traceback.format_exc())
+        self.chunks = self.download()
+
+    def download(self):
+        try:
+            for chunk in self.req.iter_content(PLAYLIST_CHUNK_SIZE):
+                if chunk:
+                    self.file.write(chunk)
+                    yield chunk
+        finally:
+            self.req.close()
+        logger.info(f"{self.file.tell()} bytes")
+        if self.cache:
+            try:
+                self.file.flush()
+                os.replace(
+                    f"{self.playlist_cache_filename}.part",
+                    self.playlist_cache_filename,
+                )
+                save_validators(self.playlist_validators_filename, self.req.headers)
+            except Exception:
+                logger.warning("Failed to save playlist cache")
+                logger.warning(traceback.format_exc())
+            self.cache = False
+
+    def read(self):
+        """Whole playlist, the rest of it is downloaded first"""
+        for _chunk in self.chunks:
+            pass
+        self.file.seek(0)
+        return self.file.read()
 
-def load_playlist():
+    def close(self):
+        self.chunks.close()
+        self.file.close()
+        if self.cache:
+            # Not downloaded completely
+            try:
+                os.remove(f"{self.playlist_cache_filename}.part")
+            except Exception:
+                pass
+
+
+def read_file_chunks(filename):
+    with open(filename, "rb") as playlist_file:
+        yield from iter(partial(playlist_file.read, PLAYLIST_CHUNK_SIZE), b"")
+
+
+def read_file(filename):
+    with open(filename, "rb") as playlist_file:
+        return playlist_file.read()
+
+
+def decode_lines(chunks):
+    """Lines of UTF-8 text from chunks of bytes, decoded incrementally
+
+    Raises UnicodeDecodeError if data is not UTF-8."""
+    decoder = codecs.getincrementaldecoder("utf-8")()
+    line_start = ""
+    for chunk in chunks:
+        lines = (line_start + decoder.decode(chunk)).split("\n")
+        line_start = lines.pop()
+        yield from lines
+    yield line_start + decoder.decode(b"", True)
+
+
+def hash_chunks(chunks, content_hash):
+    for chunk in chunks:
+        content_hash.update(chunk)
+        yield chunk
+
+
+def decode_playlist(data, show_error=show_exception):
+    """Playlist which is not UTF-8, in guessed encoding, None if failed"""
+    logger.warning("Playlist is not UTF-8 encoding")
+    logger.info("Trying to detect encoding...")
+    guess_encoding = ""
+    try:
+        guess_encoding = chardet.detect(data)["encoding"]
+    except Exception:
+        pass
+    if guess_encoding:
+        logger.info(f"Guessed encoding: {guess_encoding}")
+        try:
+            return data.decode(guess_encoding)
+        except Exception:
+            logger.warning("Wrong encoding guess!")
+    else:
+        logger.warning("Unknown encoding!")
+    show_error(
+        _(
+            "Failed to load playlist - unknown "
+            "encoding! Please use playlists "
+            "in UTF-8 encoding."
+        )
+    )
+    return None
+
+
+def is_xspf(text):
+    return '<?xml version="' in text and (
+        "http://xspf.org/" in text or "https://xspf.org/" in text
+    )
+
+
+def read_playlist_channels(m3u_parser, lines, progress_callback=None):
+    """(channels, groups, movies) of M3U or XSPF playlist, None if it is empty
+
+    M3U is parsed line by line as lines are read, XSPF as a whole.
+    EPG URL of playlist is in m3u_parser.epg_url_final."""
+    lines = iter(lines)
+    head = []
+    for line in lines:
+        head.append(line)
+        if line.strip():
+            break
+    else:
+        return None
+    lines = chain(head, lines)
+    if head[-1].strip().startswith("<"):
+        text = "\n".join(lines)
+        if is_xspf(text):
+            channels = parse_xspf(text)[0]
+            m3u_parser.epg_url_final = ""
+        else:
+            channels = m3u_parser.parse_m3u_lines(text.split("\n"), progress_callback)
+    else:
+        channels = m3u_parser.parse_m3u_lines(lines, progress_callback)
+
+    array = ChannelStore()
+    # Used as an ordered set
+    groups = {}
+    movies = {}
+    # Channels are added to the store in batches, column by column
+    batch = {}
+    for channel in channels:
+        if "tvg-group" in channel:
+            if (
+                channel["tvg-group"].lower() == "vod"
+                or channel["tvg-group"].lower().startswith("vod ")
+                or channel["tvg-group"].lower().endswith(" vod")
+            ):
+                movies[channel["title"]] = channel
+            else:
+                batch[channel["title"]] = channel
+                if len(batch) == CHANNEL_BATCH_SIZE:
+                    array.update(batch)
+                    batch = {}
+                groups[channel["tvg-group"]] = None
+    array.update(batch)
+    return array, list(groups), movies
+
+
+def get_udp_proxy():
+    return (
+        YukiData.settings["playlist_udp_proxy"]
+        if YukiData.settings["playlist_udp_proxy"]
+        else YukiData.settings["udp_proxy"]
+    )
+
+
+def get_parser_options():
+    # Parsed playlist cache is valid only for the same parser settings
+    return {"udp_proxy": get_udp_proxy()}
+
+
+def fetch_playlist(progress_callback=None, show_error=show_exception):
+    """Download (or read) and parse playlist
+
+    Returns (playlist, xt), playlist is None if it could not be loaded.
+    Only XTream API data is set to YukiData here, so it can be used
+    from another thread with show_error that does not show dialogs
+    (XTream playlists are always loaded in the main thread)."""
     m3u = ""
-    array = {}
-    groups = []
+    content_hash = hashlib.sha256()
+    # Playlist as chunks of bytes, read while it is parsed
+    m3u_chunks = None
+    # Reads the whole playlist again, if it is not UTF-8
+    read_playlist = None
+    playlist_download = None
 
     xt = XTreamFailedClass()
+    YukiData.xtream_short_epg = None
 
     logger.info("Loading playlist...")
     if YukiData.settings["m3u"]:
@@ -71,10 +313,18 @@ def load_playlist():
                     for movie1 in xt.series:
                         if isinstance(movie1, Serie):
                             YukiData.series[movie1.name] = movie1
-                    YukiData.settings["epg_temporary"] = (
+                    xmltv_url = (
                         f"{xtream_url}/xmltv.php?username="
                         f"{xtream_username}&password={xtream_password}"
                     )
+                    if YukiData.settings["xtreamshortepg"]:
+                        # Full dump is loaded only for full TV guide
+                        YukiData.xtream_short_epg = XTreamShortEPG(
+                            xt, xt.channels, xmltv_url
+                        )
+                        YukiData.settings["epg_temporary"] = ""
+                    else:
+                        YukiData.settings["epg_temporary"] = xmltv_url
                     logger.info("XTream init done")
                 except Exception:
                     exc = traceback.format_exc()
@@ -110,31 +360,8 @@ def load_playlist():
             if os.path.isfile(YukiData.settings["m3u"]):
                 YukiData.is_xtream = False
                 logger.info("Playlist is local file")
-                try:
-                    file = open(YukiData.settings["m3u"], encoding="utf8")
-                    m3u = file.read()
-                    file.close()
-                except Exception:
-                    logger.warning("Playlist is not UTF-8 encoding")
-                    logger.info("Trying to detect encoding...")
-                    m3u_file = open(YukiData.settings["m3u"], "rb")
-                    try:
-                        m3u_file_read = m3u_file.read()
-                        m3u_encoding = chardet.detect(m3u_file_read)["encoding"]
-                        logger.info(f"Detected encoding: {m3u_encoding}")
-                        m3u = m3u_file_read.decode(m3u_encoding)
-                    except Exception:
-                        logger.warning("Encoding detection error!")
-                        show_exception(
-                            _(
-                                "Failed to load playlist - unknown "
-                                "encoding! Please use playlists "
-                                "in UTF-8 encoding."
-                            )
-                        )
-                    finally:
-                        m3u_file_read = None
-                        m3u_file.close()
+                m3u_chunks = read_file_chunks(YukiData.settings["m3u"])
+                read_playlist = partial(read_file, YukiData.settings["m3u"])
             else:
                 YukiData.is_xtream = False
                 logger.info("Playlist is remote URL")
@@ -158,117 +385,120 @@ def load_playlist():
                     if originURL:
                         headers["Origin"] = originURL
                     logger.info(f"Loading playlist with headers {json.dumps(headers)}")
+                    playlist_cache_filename_hash = hashlib.sha512(
+                        YukiData.settings["m3u"].encode("utf-8")
+                    ).hexdigest()
+                    playlist_cache_filename = Path(
+                        CACHE_DIR, "playlist", playlist_cache_filename_hash + ".dat"
+                    )
+                    playlist_validators_filename = Path(
+                        CACHE_DIR,
+                        "playlist",
+                        playlist_cache_filename_hash + ".validators",
+                    )
+                    playlist_validators = {}
+                    if os.path.isfile(playlist_cache_filename):
+                        playlist_validators = read_validators(
+                            playlist_validators_filename
+                        )
                     try:
                         m3u_req = requests_get(
                             YukiData.settings["m3u"],
-                            headers=headers,
+                            headers={
+                                **headers,
+                                **get_conditional_headers(playlist_validators),
+                            },
                             timeout=(5, 15),  # connect, read timeout
+                            stream=True,
                         )
                     except Exception:
                         logger.warning(traceback.format_exc())
                         m3u_req = PlaylistsFail()
 
-                    if m3u_req.status_code != 200:
-                        logger.warning("Playlist load failed, trying empty user agent")
-                        m3u_req = requests_get(
-                            YukiData.settings["m3u"],
-                            headers={"User-Agent": ""},
-                            timeout=(5, 15),  # connect, read timeout
+                    if m3u_req.status_code == 304 and playlist_validators:
+                        logger.info("Playlist not modified, using cached copy")
+                        m3u_req.close()
+                        m3u_chunks = read_file_chunks(playlist_cache_filename)
+                        read_playlist = partial(read_file, playlist_cache_filename)
+                        save_validators(
+                            playlist_validators_filename,
+                            m3u_req.headers,
+                            playlist_validators,
                         )
-
-                    logger.info(f"Status code: {m3u_req.status_code}")
-                    logger.info(f"{len(m3u_req.content)} bytes")
-                    m3u = m3u_req.content
-                    try:
-                        m3u = m3u.decode("utf-8")
-                    except Exception:
-                        logger.warning("Playlist is not UTF-8 encoding")
-                        logger.info("Trying to detect encoding...")
-                        guess_encoding = ""
-                        try:
-                            guess_encoding = chardet.detect(m3u)["encoding"]
-                        except Exception:
-                            pass
-                        if guess_encoding:
-                            logger.info(f"Guessed encoding: {guess_encoding}")
-                            try:
-                                m3u = m3u.decode(guess_encoding)
-                            except Exception:
-                                logger.warning("Wrong encoding guess!")
-                                show_exception(
-                                    _(
-                                        "Failed to load playlist - unknown "
-                                        "encoding! Please use playlists "
-                                        "in UTF-8 encoding."
-                                    )
-                                )
-                        else:
-                            logger.warning("Unknown encoding!")
-                            show_exception(
-                                _(
-                                    "Failed to load playlist - unknown "
-                                    "encoding! Please use playlists "
-                                    "in UTF-8 encoding."
-                                )
+                    else:
+                        if m3u_req.status_code != 200:
+                            logger.warning(
+                                "Playlist load failed, trying empty user agent"
+                            )
+                            m3u_req.close()
+                            m3u_req = requests_get(
+                                YukiData.settings["m3u"],
+                                headers={"User-Agent": ""},
+                                timeout=(5, 15),  # connect, read timeout
+                                stream=True,
                             )
+
+                        logger.info(f"Status code: {m3u_req.status_code}")
+                        playlist_download = PlaylistDownload(
+                            m3u_req,
+                            playlist_cache_filename,
+                            playlist_validators_filename,
+                        )
+                        m3u_chunks = playlist_download.chunks
+                        read_playlist = playlist_download.read
                 except Exception:
                     m3u = ""
                     exp3 = traceback.format_exc()
                     logger.warning("Playlist URL loading error!" + "\n" + exp3)
-                    show_exception(traceback.format_exc(), _("Playlist loading error!"))
+                    show_error(traceback.format_exc(), _("Playlist loading error!"))
 
-    m3u_parser = M3UParser(
-        YukiData.settings["playlist_udp_proxy"]
-        if YukiData.settings["playlist_udp_proxy"]
-        else YukiData.settings["udp_proxy"],
-    )
-    if m3u:
+    m3u_parser = M3UParser(get_udp_proxy())
+    playlist = None
+    if m3u or m3u_chunks is not None:
         try:
-            is_xspf = '<?xml version="' in m3u and (
-                "http://xspf.org/" in m3u or "https://xspf.org/" in m3u
-            )
-            if not is_xspf:
-                m3u_data0 = m3u_parser.parse_m3u(m3u)
-            else:
-                m3u_data0 = parse_xspf(m3u)
-            m3u_data_got = m3u_data0[0]
-            m3u_data = []
-            YukiData.settings["epg_temporary"] = m3u_data0[1]
-
-            for m3u_datai in m3u_data_got:
-                if "tvg-group" in m3u_datai:
-                    if (
-                        m3u_datai["tvg-group"].lower() == "vod"
-                        or m3u_datai["tvg-group"].lower().startswith("vod ")
-                        or m3u_datai["tvg-group"].lower().endswith(" vod")
-                    ):
-                        YukiData.movies[m3u_datai["title"]] = m3u_datai
-                    else:
-                        m3u_data.append(m3u_datai)
-
-            for m3u_line in m3u_data:
-                array[m3u_line["title"]] = m3u_line
-                if m3u_line["tvg-group"] not in groups:
-                    groups.append(m3u_line["tvg-group"])
+            playlist_channels = None
+            if m3u_chunks is not None:
+                try:
+                    playlist_channels = read_playlist_channels(
+                        m3u_parser,
+                        decode_lines(hash_chunks(m3u_chunks, content_hash)),
+                        progress_callback,
+                    )
+                except UnicodeDecodeError:
+                    playlist_data = read_playlist()
+                    content_hash = hashlib.sha256(playlist_data)
+                    m3u = decode_playlist(playlist_data, show_error)
+            elif m3u:
+                content_hash.update(m3u.encode("utf-8"))
+            if m3u:
+                playlist_channels = read_playlist_channels(
+                    m3u_parser, m3u.split("\n"), progress_callback
+                )
+            if playlist_channels is not None:
+                array, groups, movies = playlist_channels
+                playlist = {
+                    "array": array,
+                    "groups": groups,
+                    "movies": movies,
+                    "epg_url": m3u_parser.epg_url_final,
+                    "hash": content_hash.hexdigest(),
+                }
         except Exception:
             logger.warning("Playlist parsing error!" + "\n" + traceback.format_exc())
-            show_exception(traceback.format_exc(), _("Playlist loading error!"))
-            m3u = ""
-            array = {}
-            groups = []
+            show_error(traceback.format_exc(), _("Playlist loading error!"))
+        finally:
+            if playlist_download is not None:
+                playlist_download.close()
 
-    m3u_exists = not not m3u
+    return playlist, xt
 
-    logger.info(
-        "{} channels, {} groups, {} movies, {} series".format(
-            len(array),
-            len([group2 for group2 in groups if group2 != _("All channels")]),
-            len(YukiData.movies),
-            len(YukiData.series),
-        )
-    )
 
-    for ch3 in array.copy():
+def apply_channel_sets(array, groups):
+    """Channel settings (group, hidden) applied to parsed channels
+
+    Channels are changed in place, returns (channels, groups)."""
+    groups = dict.fromkeys(groups)
+    for ch3 in list(array):
         if YukiData.settings["m3u"] in YukiData.channel_sets:
             if ch3 in YukiData.channel_sets[YukiData.settings["m3u"]]:
                 if "group" in YukiData.channel_sets[YukiData.settings["m3u"]][ch3]:
@@ -276,25 +506,45 @@ def load_playlist():
                         array[ch3]["tvg-group"] = YukiData.channel_sets[
                             YukiData.settings["m3u"]
                         ][ch3]["group"]
-                        if (
+                        groups[
                             YukiData.channel_sets[YukiData.settings["m3u"]][ch3][
                                 "group"
                             ]
-                            not in groups
-                        ):
-                            groups.append(
-                                YukiData.channel_sets[YukiData.settings["m3u"]][ch3][
-                                    "group"
-                                ]
-                            )
+                        ] = None
                 if "hidden" in YukiData.channel_sets[YukiData.settings["m3u"]][ch3]:
                     if YukiData.channel_sets[YukiData.settings["m3u"]][ch3]["hidden"]:
                         array.pop(ch3)
 
-    if _("All channels") in groups:
-        groups.remove(_("All channels"))
-    groups = [_("All channels"), _("Favourites")] + groups
+    groups.pop(_("All channels"), None)
+    groups = [_("All channels"), _("Favourites")] + list(groups)
+    return array, groups
+
+
+def update_channel_sets(title):
+    """Channel settings (group, hidden) of shown channel have changed
+
+    Returns group of the channel if it was moved to another group."""
+    if title not in YukiData.array:
+        return None
+    channel_sets = YukiData.channel_sets.get(YukiData.settings["m3u"], {}).get(
+        title, {}
+    )
+    channel = YukiData.array[title]
+    group = channel["tvg-group"]
+    if channel_sets.get("hidden"):
+        YukiData.channel_index.remove(title, group)
+        if YukiData.array_sorted is not YukiData.array:
+            YukiData.array_sorted.remove(title)
+        del YukiData.array[title]
+        return None
+    if channel_sets.get("group") and channel_sets["group"] != group:
+        channel["tvg-group"] = channel_sets["group"]
+        YukiData.channel_index.set_group(title, group, channel_sets["group"])
+        return channel_sets["group"]
+    return None
+
 
+def sort_channels(array):
     def sort_custom(sub):
         try:
             return YukiData.channel_sort.index(sub)
@@ -315,9 +565,124 @@ def load_playlist():
                 return arr0
         return arr0
 
+    return doSort(array)
+
+
+def update_channel_index():
+    YukiData.channel_index = ChannelIndex(
+        YukiData.array, YukiData.array_sorted, YukiData.favourite_sets
+    )
+
+
+def set_playlist(playlist):
+    """Use parsed playlist (None if it is not loaded), returns groups"""
+    array = ChannelStore()
+    groups = []
+    if playlist is not None:
+        array = playlist["array"]
+        groups = playlist["groups"]
+        YukiData.movies.update(playlist["movies"])
+        if not YukiData.is_xtream:
+            YukiData.settings["epg_temporary"] = playlist["epg_url"]
+        YukiData.playlist_hash = playlist["hash"]
+
+    logger.info(
+        "{} channels, {} groups, {} movies, {} series".format(
+            len(array),
+            len([group2 for group2 in groups if group2 != _("All channels")]),
+            len(YukiData.movies),
+            len(YukiData.series),
+        )
+    )
+
+    array, groups = apply_channel_sets(array, groups)
     YukiData.array = array
-    YukiData.array_sorted = doSort(array)
+    YukiData.array_sorted = sort_channels(array)
+    update_channel_index()
+    return groups
+
+
+def is_playlist_cacheable():
+    # XTream series and API client need live connection
+    return YukiData.settings["m3u"] and not YukiData.settings["m3u"].startswith(
+        "XTREAM::::::::::::::"
+    )
+
+
+def save_playlist(playlist):
+    try:
+        save_parsed_playlist(YukiData.settings["m3u"], playlist, get_parser_options())
+    except Exception:
+        logger.warning("Failed to save parsed playlist cache")
+        logger.warning(traceback.format_exc())
+
+
+def load_playlist(progress_callback=None):
+    playlist, xt = fetch_playlist(progress_callback)
+    if playlist is not None and is_playlist_cacheable():
+        save_playlist(playlist)
+    groups = set_playlist(playlist)
 
     logger.info("Playlist loading done!")
 
-    return groups, m3u_exists, xt
+    return groups, playlist is not None, xt
+
+
+def load_cached_playlist():
+    """Playlist from parsed playlist cache, None if it is not cached
+
+    Cached copy is shown at startup, fresh copy is loaded
+    in background with revalidate_playlist."""
+    if not is_playlist_cacheable():
+        return None
+    playlist = load_parsed_playlist(YukiData.settings["m3u"], get_parser_options())
+    if playlist is None:
+        return None
+    YukiData.is_xtream = False
+    YukiData.xtream_short_epg = None
+    groups = set_playlist(playlist)
+
+    logger.info("Playlist loading done (from parsed playlist cache)!")
+
+    return groups, True, XTreamFailedClass()
+
+
+def log_playlist_error(error, title=""):
+    logger.warning(f"Playlist revalidation failed: {title}")
+
+
+def revalidate_playlist():
+    """Fresh copy of playlist loaded from cache, None if it is not changed
+
+    Called from another thread. Channel settings are applied and
+    the difference with loaded channels is found here, so the main
+    thread only has to swap channels, see update_playlist."""
+    logger.info("Revalidating playlist...")
+    playlist, _xt = fetch_playlist(show_error=log_playlist_error)
+    if playlist is None or playlist["hash"] == YukiData.playlist_hash:
+        logger.info("Playlist not changed")
+        return None
+    save_playlist(playlist)
+    array, groups = apply_channel_sets(playlist["array"], playlist["groups"])
+    return {
+        "array": array,
+        "groups": groups,
+        "movies": playlist["movies"],
+        "epg_url": playlist["epg_url"],
+        "hash": playlist["hash"],
+        "diff": get_playlist_diff(YukiData.array, array),
+    }
+
+
+def update_playlist(playlist_update):
+    """Use fresh copy of playlist, in the main thread
+
+    Returns (groups, added, removed, changed)."""
+    YukiData.array = playlist_update["array"]
+    YukiData.array_sorted = sort_channels(YukiData.array)
+    update_channel_index()
+    YukiData.movies.clear()
+    YukiData.movies.update(playlist_update["movies"])
+    YukiData.settings["epg_temporary"] = playlist_update["epg_url"]
+    YukiData.playlist_hash = playlist_update["hash"]
+    return (playlist_update["groups"],) + playlist_update["diff"]
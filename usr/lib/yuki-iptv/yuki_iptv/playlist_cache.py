@@ -0,0 +1,133 @@
+#
+# Copyright (c) 2023-2025 liya <liyaliya@tutamail.com>
+#
+# This file is part of yuki-iptv.
+#
+# yuki-iptv is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# yuki-iptv is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with yuki-iptv. If not, see <https://www.gnu.org/licenses/>.
+#
+# The Font Awesome pictograms are licensed under the CC BY 4.0 License.
+# Font Awesome Free 5.15.4 by @fontawesome - https://fontawesome.com
+# https://creativecommons.org/licenses/by/4.0/
+#
+# Parsed playlist cache
+#
+# File layout:
+#   header (magic, version, metadata length)
+#   metadata (JSON, contains playlist URL, content hash and parser options)
+#   channels (ChannelStore), groups and movies (pickle)
+#
+# Cache file name is derived from playlist URL. Content hash (SHA-256
+# of playlist data) tells whether playlist has changed since it was parsed.
+# Channels are cached as parsed, before channel settings are applied.
+#
+import os
+import json
+import time
+import pickle
+import struct
+import hashlib
+import logging
+from pathlib import Path
+from yuki_iptv.xdg import CACHE_DIR
+
+logger = logging.getLogger(__name__)
+
+PLAYLIST_CACHE_MAGIC = b"YUKIPLSC"
+PLAYLIST_CACHE_VERSION = 2
+PLAYLIST_CACHE_HEADER = struct.Struct("<8sHxxI")
+
+
+def get_playlist_cache_filename(playlist_url):
+    playlist_cache_filename_hash = hashlib.sha512(
+        playlist_url.encode("utf-8")
+    ).hexdigest()
+    return Path(CACHE_DIR, "playlist", playlist_cache_filename_hash + ".parsed")
+
+
+def save_parsed_playlist(playlist_url, playlist, options):
+    """Save parsed playlist, options are parser settings it depends on"""
+    t = time.time()
+    metadata_bytes = json.dumps(
+        {
+            "url": playlist_url,
+            "hash": playlist["hash"],
+            "options": options,
+            "epg_url": playlist["epg_url"],
+            "created": time.time(),
+        }
+    ).encode("utf-8")
+    filename = get_playlist_cache_filename(playlist_url)
+    part_filename = f"{filename}.part"
+    with open(part_filename, "wb") as cache_file:
+        cache_file.write(
+            PLAYLIST_CACHE_HEADER.pack(
+                PLAYLIST_CACHE_MAGIC, PLAYLIST_CACHE_VERSION, len(metadata_bytes)
+            )
+        )
+        cache_file.write(metadata_bytes)
+        pickle.dump(
+            (playlist["array"], playlist["groups"], playlist["movies"]),
+            cache_file,
+            pickle.HIGHEST_PROTOCOL,
+        )
+    os.replace(part_filename, filename)
+    logger.info(
+        f"Parsed playlist cache saved, took {round(time.time() - t, 2)} seconds"
+    )
+
+
+def load_parsed_playlist(playlist_url, options):
+    """Parsed playlist from cache, None if there is no usable cache"""
+    t = time.time()
+    filename = get_playlist_cache_filename(playlist_url)
+    if not os.path.isfile(filename):
+        return None
+    try:
+        with open(filename, "rb") as cache_file:
+            header = cache_file.read(PLAYLIST_CACHE_HEADER.size)
+            if len(header) != PLAYLIST_CACHE_HEADER.size:
+                return None
+            magic, version, metadata_length = PLAYLIST_CACHE_HEADER.unpack(header)
+            if magic != PLAYLIST_CACHE_MAGIC or version != PLAYLIST_CACHE_VERSION:
+                logger.info("Parsed playlist cache has unsupported format")
+                return None
+            metadata = json.loads(cache_file.read(metadata_length).decode("utf-8"))
+            if metadata["url"] != playlist_url or metadata["options"] != options:
+                logger.info("Parsed playlist cache is outdated")
+                return None
+            array, groups, movies = pickle.load(cache_file)
+    except Exception:
+        logger.warning("Failed to read parsed playlist cache")
+        return None
+    logger.info(
+        f"Parsed playlist cache loaded ({len(array)} channels), "
+        f"took {round(time.time() - t, 2)} seconds"
+    )
+    return {
+        "array": array,
+        "groups": groups,
+        "movies": movies,
+        "epg_url": metadata["epg_url"],
+        "hash": metadata["hash"],
+    }
+
+
+def get_playlist_diff(old_array, new_array):
+    """(added, removed, changed) channel titles of two channel stores"""
+    added = [title for title in new_array if title not in old_array]
+    removed = [title for title in old_array if title not in new_array]
+    common = [title for title in new_array if title in old_array]
+    changed_titles = old_array.get_changed(new_array, common)
+    changed = [title for title in common if title in changed_titles]
+    return added, removed, changed
@@ -27,6 +27,39 @@ from yuki_iptv.i18n import _
 
 logger = logging.getLogger(__name__)
 
+M3U_PROGRESS_CHANNELS = 10000
+
+
+def parse_extinf(line_info):
+    """Attributes and title of #EXTINF line, in one pass over the line
+
+    Returns (key -> value, title). Attribute is key="value", value ends
+    at the next quote. If key is repeated, first value wins.
+    Title is the text after the first comma outside of attribute values."""
+    attributes = {}
+    title_parts = []
+    # Text between quotes, every part except the last is followed by quote
+    parts = line_info.split('"')
+    last = len(parts) - 1
+    i = 0
+    while i < last:
+        text = parts[i]
+        if text.endswith("=") and i + 1 < last:
+            text = text[:-1]
+            key = text.rsplit(None, 1)[-1] if text and not text[-1].isspace() else ""
+            key = key.rpartition(",")[2].rpartition("=")[2]
+            if key not in attributes:
+                attributes[key] = parts[i + 1]
+            # Only ="value" is removed from title, key is kept
+            title_parts.append(text)
+            i += 2
+        else:
+            title_parts.append(text + '"')
+            i += 1
+    title_parts.append(parts[last])
+    title = "".join(title_parts).split(",", 1)
+    return attributes, title[1].strip() if len(title) == 2 else ""
+
 
 class M3UParser:
     def __init__(self, udp_proxy):
@@ -36,29 +69,17 @@ class M3UParser:
         self.m3u_epg = ""
         self.catchup_data = ["default", "7", ""]
         self.epg_url_final = ""
-        self.regexp_cache = {}
 
-    def parse_regexp(self, name, line_info, default="", custom_regex=False):
-        regexp = name
-        if not custom_regex:
-            regexp += '="(.*?)"'
-        if regexp not in self.regexp_cache:
-            self.regexp_cache[regexp] = re.compile(regexp)
-        re_match = self.regexp_cache[regexp].search(line_info)
+    def parse_catchup_days(self, attributes):
+        res = attributes.get("catchup-days", self.catchup_data[1])
         try:
-            res = re_match.group(1)
-        except AttributeError:
-            res = default
-        if name == "catchup-days":
-            try:
-                res = str(int(res))
-            except Exception:
-                logger.warning(
-                    f"M3U STANDARDS VIOLATION: catchup-days is not int (got '{res}')"
-                )
-                res = default
-        res = res.strip()
-        return res
+            res = str(int(res))
+        except Exception:
+            logger.warning(
+                f"M3U STANDARDS VIOLATION: catchup-days is not int (got '{res}')"
+            )
+            res = self.catchup_data[1]
+        return res.strip()
 
     def parse_url_kodi_style_arguments(self, url):
         useragent = ""
@@ -94,14 +115,6 @@ class M3UParser:
             logger.debug("")
         return url, useragent, referrer
 
-    def get_title(self, line_info):
-        title_regex = re.sub('\\="(.*?)"', "", line_info).split(",", 1)
-        if len(title_regex) < 2:
-            title = ""
-        else:
-            title = title_regex[1].strip()
-        return title
-
     def parse_channel(self, line_info, ch_url, overrides):
         if self.udp_proxy and (
             ch_url.startswith("udp://") or ch_url.startswith("rtp://")
@@ -114,44 +127,42 @@ class M3UParser:
             ch_url = ch_url.replace("//udp/", "/udp/").replace("//rtp/", "/rtp/")
             ch_url = ch_url.replace("@", "")
 
-        tvg_url = self.parse_regexp("tvg-url", line_info)
-        url_tvg = self.parse_regexp("url-tvg", line_info)
+        attributes, title = parse_extinf(line_info)
+
+        tvg_url = attributes.get("tvg-url", "").strip()
+        url_tvg = attributes.get("url-tvg", "").strip()
         if not tvg_url and url_tvg:
             tvg_url = url_tvg
 
-        group = self.parse_regexp("group-title", line_info, "")
+        group = attributes.get("group-title", "").strip()
         if not group:
-            group = self.parse_regexp("tvg-group", line_info, self.all_channels)
+            group = attributes.get("tvg-group", self.all_channels).strip()
             if not group:
                 group = self.all_channels
 
-        catchup_tag = self.parse_regexp("catchup", line_info, "")
+        catchup_tag = attributes.get("catchup", "").strip()
         if not catchup_tag:
-            catchup_tag = self.parse_regexp(
-                "catchup-type", line_info, self.catchup_data[0]
-            )
+            catchup_tag = attributes.get("catchup-type", self.catchup_data[0]).strip()
 
         ch_array = {
-            "title": self.get_title(line_info),
-            "tvg-name": self.parse_regexp("tvg-name", line_info),
-            "tvg-ID": self.parse_regexp("tvg-id", line_info),
-            "tvg-logo": self.parse_regexp("tvg-logo", line_info),
+            "title": title,
+            "tvg-name": attributes.get("tvg-name", "").strip(),
+            "tvg-ID": attributes.get("tvg-id", "").strip(),
+            "tvg-logo": attributes.get("tvg-logo", "").strip(),
             "tvg-group": group,
             "tvg-url": tvg_url,
             "catchup": catchup_tag,
-            "catchup-source": self.parse_regexp(
-                "catchup-source", line_info, self.catchup_data[2]
-            ),
-            "catchup-days": self.parse_regexp(
-                "catchup-days", line_info, self.catchup_data[1]
-            ),
-            "useragent": self.parse_regexp("user-agent", line_info),
+            "catchup-source": attributes.get(
+                "catchup-source", self.catchup_data[2]
+            ).strip(),
+            "catchup-days": self.parse_catchup_days(attributes),
+            "useragent": attributes.get("user-agent", "").strip(),
             "referer": "",
             "url": ch_url,
         }
         ch_array["orig_title"] = ch_array["title"]
 
-        tvg_id_2 = self.parse_regexp("tvg-ID", line_info)
+        tvg_id_2 = attributes.get("tvg-ID", "").strip()
         if tvg_id_2 and not ch_array["tvg-ID"]:
             ch_array["tvg-ID"] = tvg_id_2
 
@@ -173,17 +184,28 @@ class M3UParser:
         return ch_array
 
     def parse_m3u(self, m3u_str):
+        channels = list(self.parse_m3u_lines(m3u_str.split("\n")))
+        return [channels, self.epg_url_final]
+
+    def parse_m3u_lines(self, lines, progress_callback=None):
+        """Channels of playlist, yielded as soon as they are parsed
+
+        lines can be any iterable, e.g. lines of a file being downloaded.
+        EPG URL of playlist is in epg_url_final after the last channel.
+        progress_callback(channel count) is called every
+        M3U_PROGRESS_CHANNELS channels."""
         self.epg_urls = []
         self.m3u_epg = ""
         self.catchup_data = ["default", "7", ""]
         self.epg_url_final = ""
-        if not ("#EXTM3U" in m3u_str and "#EXTINF" in m3u_str):
-            raise Exception("Malformed M3U: no #EXTM3U and #EXTINF tags found")
-        channels = []
+        has_extm3u = False
+        count = 0
         titles = set()
         buffer = []
-        for line in m3u_str.split("\n"):
+        for line in lines:
             line = line.rstrip("\n").rstrip().strip()
+            if not has_extm3u and "#EXTM3U" in line:
+                has_extm3u = True
             if line.startswith("#EXTM3U"):
                 epg_m3u_url = ""
                 if 'x-tvg-url="' in line:
@@ -273,12 +295,18 @@ class M3UParser:
                             if parsed_channel["tvg-url"]:
                                 if parsed_channel["tvg-url"] not in self.epg_urls:
                                     self.epg_urls.append(parsed_channel["tvg-url"])
-                            channels.append(parsed_channel)
+                            yield parsed_channel
+                            count += 1
+                            if progress_callback and not count % M3U_PROGRESS_CHANNELS:
+                                progress_callback(count)
                         buffer.clear()
         buffer.clear()
         self.epg_url_final = self.m3u_epg
         if self.epg_urls and not self.m3u_epg:
             self.epg_url_final = ",".join(self.epg_urls)
-        if not channels:
+        if not has_extm3u:
+            raise Exception("Malformed M3U: no #EXTM3U and #EXTINF tags found")
+        if not count:
             raise Exception("No channels found")
-        return [channels, self.epg_url_final]
+        if progress_callback:
+            progress_callback(count)
@@ -36,6 +36,7 @@ def parse_settings():
         "udp_proxy": "",
         "save_folder": SAVE_FOLDER_DEFAULT,
         "epgoffset": 0,
+        "epgoffsets": {},
         "sort": 0,
         "sort_categories": 0,
         "description_view": 0,
@@ -52,6 +53,11 @@ def parse_settings():
         "autoreconnection": False,
         "channellogos": 0,
         "nocacheepg": False,
+        "epgdays": 7,
+        "epgscope": False,
+        "epgsearchdesc": False,
+        "xtreamshortepg": True,
+        "epgparser": "auto",
         "scrrecnosubfolders": False,
         "hidetvprogram": False,
         "rewindenable": False,
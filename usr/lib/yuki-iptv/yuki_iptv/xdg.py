@@ -56,5 +56,5 @@ LOCAL_DIR = str(Path(get_config_dir(), "yuki-iptv"))
 CACHE_DIR = str(get_cache_dir())
 SAVE_FOLDER_DEFAULT = str(Path(CACHE_DIR, "saves"))
 
-for folder_name in ("epg", "logo", "xtream"):
+for folder_name in ("epg", "logo", "playlist", "xtream"):
     Path(CACHE_DIR, folder_name).mkdir(parents=True, exist_ok=True)
@@ -22,18 +22,33 @@
 # https://creativecommons.org/licenses/by/4.0/
 #
 import json
+import time
+import base64
 import hashlib
 import logging
+import threading
 import traceback
 from PyQt6 import QtWidgets
 from functools import partial
+from operator import attrgetter
+from concurrent.futures import ThreadPoolExecutor
 from yuki_iptv.i18n import _
 from yuki_iptv.misc import YukiData
 from yuki_iptv.threads import execute_in_main_thread
+from yuki_iptv.epg_cache import get_epg_coverage
+from yuki_iptv.epg_programme import Programme
+from yuki_iptv.requests_timeout import requests_get
 from thirdparty.xtream import XTream
 
 logger = logging.getLogger(__name__)
 
+# Key of XTream short EPG in EPG sources (in place of EPG URL)
+XTREAM_SHORT_EPG = "xtream-short-epg"
+XTREAM_SHORT_EPG_LIMIT = 10  # programmes per channel
+XTREAM_SHORT_EPG_TTL = 1800  # seconds
+XTREAM_SHORT_EPG_RETRY = 300  # seconds, after failure or empty EPG
+XTREAM_SHORT_EPG_WORKERS = 4
+
 
 class XTreamFailedClass:
     auth_data = {}
@@ -123,3 +138,152 @@ def convert_xtream_to_m3u(data, skip_init=False, append_group=""):
         output += line + "\n" + url + "\n"
 
     return output
+
+
+def decode_xtream_text(text):
+    """Titles and descriptions of short EPG are base64 encoded"""
+    if not text:
+        return ""
+    try:
+        return base64.b64decode(text, validate=True).decode("utf-8")
+    except Exception:
+        return text
+
+
+def parse_xtream_short_epg(data):
+    """Programmes from get_short_epg response, sorted by start time"""
+    programmes = []
+    if not isinstance(data, dict) or not isinstance(data.get("epg_listings"), list):
+        return programmes
+    for listing in data["epg_listings"]:
+        try:
+            programmes.append(
+                Programme(
+                    float(listing["start_timestamp"]),
+                    float(listing["stop_timestamp"]),
+                    decode_xtream_text(listing.get("title")),
+                    decode_xtream_text(listing.get("description")),
+                )
+            )
+        except Exception:
+            pass
+    programmes.sort(key=attrgetter("start"))
+    return programmes
+
+
+class XTreamShortEPG:
+    """Short EPG (get_short_epg) of XTream channels, fetched on request
+
+    Used instead of full xmltv.php dump of the provider: only requested
+    channels (visible or playing) are fetched, in batches. Programmes
+    of a channel are kept until XTREAM_SHORT_EPG_TTL expires or they run out.
+    source has the same layout as parsed EPG, so it is one of EPG sources
+    of EPGIndex (under XTREAM_SHORT_EPG key)."""
+
+    def __init__(self, xt, channels, xmltv_url):
+        self.xt = xt
+        self.xmltv_url = xmltv_url
+        # EPG id -> stream id
+        self.stream_ids = {}
+        ids = {}
+        names = {}
+        for channel in channels:
+            epg_id = channel.epg_channel_id or f"{XTREAM_SHORT_EPG}:{channel.id}"
+            self.stream_ids.setdefault(epg_id, channel.id)
+            ids.setdefault(epg_id, set()).add(channel.name)
+            names[channel.name.lower().strip()] = epg_id
+        self.source = {
+            "display_names": [],
+            "ids": ids,
+            "names": names,
+            "_names": {channel.name.strip() for channel in channels},
+            "icons": {},
+            "epg": {},
+            "coverage": get_epg_coverage({}),
+        }
+        # EPG id -> time when programmes have to be fetched again
+        self.expires = {}
+        self.pending = set()
+        self.lock = threading.Lock()
+
+    def request(self, epg_ids, callback):
+        """Fetch short EPG of channels which are not fetched yet or expired
+
+        callback(EPG id -> programmes) is called from the fetch thread
+        once for the whole batch."""
+        current_time = time.time()
+        with self.lock:
+            batch = [
+                epg_id
+                for epg_id in dict.fromkeys(epg_ids)
+                if epg_id in self.stream_ids
+                and epg_id not in self.pending
+                and self.expires.get(epg_id, 0) <= current_time
+            ]
+            self.pending.update(batch)
+        if batch:
+            threading.Thread(
+                target=self.fetch_batch, args=(batch, callback), daemon=True
+            ).start()
+
+    def fetch(self, epg_id):
+        """Programmes of channel, None if request failed"""
+        try:
+            req = requests_get(
+                self.xt.get_live_epg_URL_by_stream_and_limit(
+                    self.stream_ids[epg_id], XTREAM_SHORT_EPG_LIMIT
+                ),
+                headers=self.xt.connection_headers,
+                timeout=(5, 15),  # connect, read timeout
+            )
+            req.raise_for_status()
+            return parse_xtream_short_epg(req.json())
+        except Exception:
+            logger.warning(f"XTream short EPG request failed for '{epg_id}'")
+            logger.debug(traceback.format_exc())
+            return None
+
+    def fetch_batch(self, batch, callback):
+        t = time.time()
+        fetched = {}
+        try:
+            with ThreadPoolExecutor(XTREAM_SHORT_EPG_WORKERS) as executor:
+                for epg_id, programmes in zip(batch, executor.map(self.fetch, batch)):
+                    if programmes is not None:
+                        fetched[epg_id] = programmes
+            current_time = time.time()
+            with self.lock:
+                for epg_id in batch:
+                    expires = current_time + XTREAM_SHORT_EPG_RETRY
+                    if fetched.get(epg_id):
+                        # Fetch again when fetched programmes run out
+                        expires = max(
+                            expires,
+                            min(
+                                current_time + XTREAM_SHORT_EPG_TTL,
+                                fetched[epg_id][-1].stop,
+                            ),
+                        )
+                    self.expires[epg_id] = expires
+            logger.info(
+                f"XTream short EPG fetched for {len(fetched)} of {len(batch)} "
+                f"channels, took {round(time.time() - t, 2)} seconds"
+            )
+            if fetched:
+                callback(fetched)
+        except Exception:
+            logger.warning("XTream short EPG fetch failed")
+            logger.warning(traceback.format_exc())
+        finally:
+            with self.lock:
+                self.pending.difference_update(batch)
+
+    def merge(self, programmes):
+        """Add fetched programmes to source
+
+        Programmes mapping is replaced, not changed in place,
+        because EPG index can be built from it in another thread."""
+        epg = dict(self.source["epg"])
+        epg.update(programmes)
+        self.source["epg"] = epg
+        self.source["coverage"] = get_epg_coverage(epg)